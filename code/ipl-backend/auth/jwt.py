@@ -1,5 +1,8 @@
 # auth/jwt.py
 import os
+import threading
+import time
+from collections import OrderedDict
 from datetime import datetime, timedelta, timezone
 from typing import Optional
 
@@ -15,6 +18,14 @@ if not SECRET_KEY:
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_DAYS = 0.5
 
+# Verified-token cache: token -> (user_id, valid_until). Entries never
+# outlive the token's own exp, so expired tokens still get a 401.
+TOKEN_CACHE_SIZE = 10000
+TOKEN_CACHE_TTL = 300  # seconds
+
+_token_cache: "OrderedDict[str, tuple]" = OrderedDict()
+_token_cache_lock = threading.Lock()
+
 # Security scheme for dependency injection
 security = HTTPBearer()
 
@@ -41,6 +52,7 @@ def create_access_token(user_id: int) -> str:
 def verify_access_token(token: str) -> int:
     """
     Verify and decode a JWT access token.
+    Already-verified tokens are answered from a small LRU cache.
     
     Args:
         token: The JWT token to verify
@@ -51,6 +63,15 @@ def verify_access_token(token: str) -> int:
     Raises:
         HTTPException: If token is invalid or expired (401)
     """
+    now = time.time()
+    with _token_cache_lock:
+        cached = _token_cache.get(token)
+        if cached is not None:
+            if cached[1] > now:
+                _token_cache.move_to_end(token)
+                return cached[0]
+            del _token_cache[token]
+
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
         user_id_str: Optional[str] = payload.get("sub")
@@ -63,6 +84,13 @@ def verify_access_token(token: str) -> int:
             )
         
         user_id = int(user_id_str)
+
+        valid_until = min(float(payload.get("exp", now)), now + TOKEN_CACHE_TTL)
+        with _token_cache_lock:
+            _token_cache[token] = (user_id, valid_until)
+            if len(_token_cache) > TOKEN_CACHE_SIZE:
+                _token_cache.popitem(last=False)
+
         return user_id
         
     except JWTError:
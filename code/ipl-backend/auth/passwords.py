@@ -0,0 +1,98 @@
+# auth/passwords.py
+"""
+Password hashing off the request workers.
+
+bcrypt costs ~100-250 ms of CPU per call, so hashing and verification run
+on a small dedicated process pool instead of the API threadpool. At most
+HASH_MAX_PENDING operations may be queued or running; beyond that callers
+get a 503 with Retry-After instead of piling up.
+
+The bcrypt cost is BCRYPT_ROUNDS. Hashes with any other cost are upgraded
+on the next successful login (verify_password returns the new hash).
+"""
+import asyncio
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional, Tuple
+
+from fastapi import HTTPException, status
+from passlib.context import CryptContext
+
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+HASH_WORKERS = int(os.getenv("HASH_WORKERS", "2"))
+HASH_MAX_PENDING = int(os.getenv("HASH_MAX_PENDING", "32"))
+HASH_RETRY_AFTER = 2  # seconds, sent with the 503
+
+# Built once per process (API process and each pool worker).
+# min == max == default: hashes with a different cost need an update.
+pwd_context = CryptContext(
+    schemes=["bcrypt"],
+    deprecated="auto",
+    bcrypt__rounds=BCRYPT_ROUNDS,
+    bcrypt__min_rounds=BCRYPT_ROUNDS,
+    bcrypt__max_rounds=BCRYPT_ROUNDS,
+)
+
+
+_state = {"pool": None, "pending": 0}
+
+
+# ---------- run inside pool workers ----------
+
+def _hash(password: str) -> str:
+    return pwd_context.hash(password)
+
+
+def _verify_and_update(password: str, hashed: str) -> Tuple[bool, Optional[str]]:
+    return pwd_context.verify_and_update(password, hashed)
+
+
+# ---------- API side ----------
+
+def get_pool() -> ProcessPoolExecutor:
+    if _state["pool"] is None:
+        _state["pool"] = ProcessPoolExecutor(max_workers=HASH_WORKERS)
+    return _state["pool"]
+
+
+def shutdown_pool() -> None:
+    pool, _state["pool"] = _state["pool"], None
+    if pool is not None:
+        pool.shutdown(wait=False, cancel_futures=True)
+
+
+async def _run(fn, *args):
+    # Only touched from the event loop thread, so a plain counter is enough
+    if _state["pending"] >= HASH_MAX_PENDING:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Too many sign-ins right now, please retry shortly",
+            headers={"Retry-After": str(HASH_RETRY_AFTER)},
+        )
+
+    _state["pending"] += 1
+    try:
+        return await asyncio.get_running_loop().run_in_executor(get_pool(), fn, *args)
+    finally:
+        _state["pending"] -= 1
+
+
+async def hash_password(password: str) -> str:
+    return await _run(_hash, password)
+
+
+async def verify_password(password: str, hashed: str) -> Tuple[bool, Optional[str]]:
+    """
+    (ok, new_hash). new_hash is set when the stored hash should be replaced
+    (different bcrypt cost); store it to upgrade the user transparently.
+    """
+    return await _run(_verify_and_update, password, hashed)
+
+
+def hasher_stats() -> dict:
+    return {
+        "workers": HASH_WORKERS,
+        "pending": _state["pending"],
+        "max_pending": HASH_MAX_PENDING,
+        "bcrypt_rounds": BCRYPT_ROUNDS,
+    }
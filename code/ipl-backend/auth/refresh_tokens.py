@@ -0,0 +1,175 @@
+# auth/refresh_tokens.py
+"""
+Rotating, revocable refresh tokens.
+
+Tokens are random strings; only their SHA-256 is stored (a fast hash is
+enough for 256-bit random secrets, no bcrypt involved). Every /auth/refresh
+rotates the token: the presented one is revoked and a new one issued in the
+same family. Presenting a revoked token again means it leaked, so the whole
+family (that login's session) is revoked.
+
+Revoked hashes are also kept in memory (until their expiry) and checked
+first; other processes' revocations are picked up every
+REVOKED_SYNC_SECONDS.
+"""
+import hashlib
+import os
+import secrets
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Dict, Optional, Tuple
+
+from sqlalchemy import select, update
+from sqlalchemy.orm import Session
+
+from models import RefreshToken
+
+REFRESH_TOKEN_EXPIRE_DAYS = int(os.getenv("REFRESH_TOKEN_EXPIRE_DAYS", "60"))
+REVOKED_SYNC_SECONDS = 60
+
+
+def hash_token(token: str) -> str:
+    return hashlib.sha256(token.encode()).hexdigest()
+
+
+# ---------- in-memory revocation set ----------
+
+_lock = threading.Lock()
+_revoked: Dict[str, datetime] = {}   # token_hash -> expires_at
+_sync = {"synced_at": 0.0, "since": None}
+
+
+def _remember_revoked(token_hash: str, expires_at: datetime) -> None:
+    with _lock:
+        _revoked[token_hash] = expires_at
+
+
+def _sync_revoked(db: Session) -> None:
+    """Load revocations made since the last sync (all live ones the first time)."""
+    if time.monotonic() - _sync["synced_at"] < REVOKED_SYNC_SECONDS:
+        return
+
+    now = datetime.utcnow()
+    query = db.query(RefreshToken.token_hash, RefreshToken.expires_at).filter(
+        RefreshToken.revoked_at.isnot(None),
+        RefreshToken.expires_at > now,
+    )
+    if _sync["since"] is not None:
+        query = query.filter(RefreshToken.revoked_at >= _sync["since"])
+
+    rows = query.all()
+    with _lock:
+        for token_hash, expires_at in rows:
+            _revoked[token_hash] = expires_at
+        # Expired tokens are rejected anyway; forget them
+        for token_hash in [h for h, exp in _revoked.items() if exp <= now]:
+            del _revoked[token_hash]
+
+    _sync["since"] = now - timedelta(seconds=REVOKED_SYNC_SECONDS)
+    _sync["synced_at"] = time.monotonic()
+
+
+def is_revoked(db: Session, token_hash: str) -> bool:
+    _sync_revoked(db)
+    return token_hash in _revoked
+
+
+# ---------- issue / rotate / revoke ----------
+
+def issue_refresh_token(db: Session, user_id: int, family_id: Optional[str] = None) -> str:
+    """New refresh token (does not commit). A new login starts a new family."""
+    token = secrets.token_urlsafe(32)
+    db.add(RefreshToken(
+        user_id=user_id,
+        token_hash=hash_token(token),
+        family_id=family_id or secrets.token_hex(16),
+        expires_at=datetime.utcnow() + timedelta(days=REFRESH_TOKEN_EXPIRE_DAYS),
+    ))
+    return token
+
+
+def revoke_family(db: Session, family_id: str) -> None:
+    """Revoke every live token of a login session (does not commit)."""
+    now = datetime.utcnow()
+    rows = (
+        db.query(RefreshToken)
+        .filter(RefreshToken.family_id == family_id, RefreshToken.revoked_at.is_(None))
+        .all()
+    )
+    for row in rows:
+        row.revoked_at = now
+        _remember_revoked(row.token_hash, row.expires_at)
+
+
+def _replayed(db: Session, token_hash: str) -> None:
+    """A revoked token was presented again: assume it leaked, end the session."""
+    family_id = (
+        select(RefreshToken.family_id)
+        .where(RefreshToken.token_hash == token_hash)
+        .scalar_subquery()
+    )
+    now = datetime.utcnow()
+    revoked = db.execute(
+        update(RefreshToken)
+        .where(RefreshToken.family_id == family_id, RefreshToken.revoked_at.is_(None))
+        .values(revoked_at=now)
+        .returning(RefreshToken.token_hash, RefreshToken.expires_at)
+    ).all()
+    db.commit()
+
+    for revoked_hash, expires_at in revoked:
+        _remember_revoked(revoked_hash, expires_at)
+
+
+def rotate_refresh_token(db: Session, token: str) -> Optional[Tuple[int, str]]:
+    """
+    (user_id, new refresh token), or None if the token is unknown, expired
+    or revoked. Commits.
+
+    A replay found in the in-memory set costs one UPDATE of its family; the
+    normal path claims the token with one UPDATE ... RETURNING, no SELECT.
+    """
+    token_hash = hash_token(token)
+    if is_revoked(db, token_hash):
+        _replayed(db, token_hash)
+        return None
+
+    # Single use, also across processes: only one caller flips revoked_at
+    now = datetime.utcnow()
+    claimed = db.execute(
+        update(RefreshToken)
+        .where(
+            RefreshToken.token_hash == token_hash,
+            RefreshToken.revoked_at.is_(None),
+            RefreshToken.expires_at > now,
+        )
+        .values(revoked_at=now)
+        .returning(RefreshToken.user_id, RefreshToken.family_id, RefreshToken.expires_at)
+    ).first()
+
+    if claimed is None:
+        db.rollback()
+        # Unknown, expired, or revoked by another process since the last sync
+        row = db.query(RefreshToken.revoked_at, RefreshToken.expires_at).filter(
+            RefreshToken.token_hash == token_hash
+        ).first()
+        if row is not None and row.revoked_at is not None and row.expires_at > now:
+            _replayed(db, token_hash)
+        return None
+
+    new_token = issue_refresh_token(db, claimed.user_id, claimed.family_id)
+    db.commit()
+    _remember_revoked(token_hash, claimed.expires_at)
+
+    return claimed.user_id, new_token
+
+
+def revoke_refresh_token(db: Session, token: str) -> bool:
+    """Logout: revoke the token's whole family. Commits."""
+    row = db.query(RefreshToken).filter(RefreshToken.token_hash == hash_token(token)).first()
+    if row is None:
+        return False
+    revoke_family(db, row.family_id)
+    db.commit()
+    return True
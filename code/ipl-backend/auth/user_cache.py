@@ -0,0 +1,67 @@
+# auth/user_cache.py
+"""
+Cache of User rows for get_current_user, so authenticated requests don't
+SELECT the user every time.
+
+Entries are detached column snapshots; each request gets its own
+session-bound copy via Session.merge(load=False), which issues no SQL.
+ORM updates/deletes of a User drop its entry (mapper events); entries also
+expire after USER_CACHE_TTL for changes made by other processes.
+"""
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional
+
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session, make_transient_to_detached
+
+from models import User
+
+USER_CACHE_SIZE = 5000
+USER_CACHE_TTL = 60  # seconds
+
+_lock = threading.Lock()
+_users: "OrderedDict[int, tuple]" = OrderedDict()  # user_id -> (cached_at, snapshot)
+
+
+def invalidate_user(user_id: int) -> None:
+    with _lock:
+        _users.pop(user_id, None)
+
+
+@event.listens_for(User, "after_update")
+@event.listens_for(User, "after_delete")
+def _user_changed(mapper, connection, target):
+    invalidate_user(target.id)
+
+
+def _snapshot(user: User) -> User:
+    columns = {attr.key: getattr(user, attr.key) for attr in inspect(User).column_attrs}
+    snapshot = User(**columns)
+    make_transient_to_detached(snapshot)
+    return snapshot
+
+
+def get_cached_user(db: Session, user_id: int) -> Optional[User]:
+    now = time.monotonic()
+    with _lock:
+        cached = _users.get(user_id)
+        if cached is not None and now - cached[0] < USER_CACHE_TTL:
+            _users.move_to_end(user_id)
+            snapshot = cached[1]
+        else:
+            snapshot = None
+
+    if snapshot is not None:
+        return db.merge(snapshot, load=False)
+
+    user = db.query(User).filter(User.id == user_id).first()
+    if user is None:
+        return None
+
+    with _lock:
+        _users[user_id] = (now, _snapshot(user))
+        if len(_users) > USER_CACHE_SIZE:
+            _users.popitem(last=False)
+    return user
@@ -0,0 +1,239 @@
+"""
+Season backfill: pull results for many ICC games and score them.
+
+Usage:
+    python backfill.py --games 268119 268120
+    python backfill.py --range 268100-268155 --concurrency 8 --workers 4
+    python backfill.py --range 268100-268155 --retry-unmatched
+
+Fetching is async with bounded concurrency, the CPU-bound aggregation runs
+in a process pool, and results + scoring are written in batches. Progress
+is kept in a checkpoint file so an interrupted run can be resumed. Failed
+games are retried on the next run; games with no Match row ("unmatched")
+only with --retry-unmatched.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+
+import httpx
+from sqlalchemy import or_, and_, func
+
+from database import SessionLocal
+from models import Match
+from match_results import write_match_results
+from scoring import apply_scoring_for_matches
+from services.result_engine import fetch_match_inputs, compute_match_result
+from xfactor_catalog import xfactor_catalog
+
+
+DEFAULT_CHECKPOINT = "backfill_checkpoint.json"
+
+
+# ============================================================================
+# CHECKPOINT
+# ============================================================================
+
+def load_checkpoint(path: str) -> dict:
+    if not os.path.exists(path):
+        return {"done": [], "unmatched": [], "failed": {}}
+    with open(path) as f:
+        return json.load(f)
+
+
+def save_checkpoint(path: str, checkpoint: dict):
+    # Write-then-rename so a crash never leaves a half-written file
+    tmp = f"{path}.tmp"
+    with open(tmp, "w") as f:
+        json.dump(checkpoint, f, indent=2)
+    os.replace(tmp, path)
+
+
+# ============================================================================
+# ICC GAME -> MATCH ROW
+# ============================================================================
+
+def find_match_for_game(db, game_id: int, scorecard) -> Match:
+    """
+    Match by stored icc_game_id first, else by the two team names on the
+    same day (and remember the game id for next time).
+    """
+    match = db.query(Match).filter(Match.icc_game_id == game_id).first()
+    if match:
+        return match
+
+    detail = scorecard["Matchdetail"]
+    teams = scorecard["Teams"]
+    home = teams[detail["Team_Home"]]["Name_Full"]
+    away = teams[detail["Team_Away"]]["Name_Full"]
+    day = datetime.strptime(detail["Match"]["Date"], "%m/%d/%Y").date()
+
+    match = (
+        db.query(Match)
+        .filter(
+            or_(
+                and_(Match.home_team == home, Match.away_team == away),
+                and_(Match.home_team == away, Match.away_team == home),
+            ),
+            func.date(Match.start_time) == day,
+        )
+        .first()
+    )
+
+    if match:
+        match.icc_game_id = game_id
+    return match
+
+
+# ============================================================================
+# PIPELINE
+# ============================================================================
+
+async def fetch_and_compute(client, game_id, semaphore, pool, rules):
+    """Returns (game_id, scorecard, result, error)."""
+    try:
+        async with semaphore:
+            scorecard, innings = await fetch_match_inputs(client, game_id, rules)
+
+        loop = asyncio.get_running_loop()
+        result = await loop.run_in_executor(pool, compute_match_result, scorecard, innings, rules)
+        return game_id, scorecard, result, None
+    except Exception as e:
+        # ICC errors, or a malformed game tripping up the engine: record it
+        # as failed (retried on the next run) instead of ending the season
+        return game_id, None, None, e
+
+
+def flush_batch(batch, checkpoint):
+    """Map games to matches, write results, score, then checkpoint."""
+    db = SessionLocal()
+    try:
+        results = {}
+        failed = set()
+        for game_id, scorecard, result in batch:
+            try:
+                match = find_match_for_game(db, game_id, scorecard)
+            except (KeyError, ValueError) as e:
+                # Scorecard without the fields we map on, or an odd date
+                checkpoint["failed"][str(game_id)] = repr(e)
+                print(f"⚠️  game {game_id} could not be mapped to a match: {e!r}")
+                failed.add(game_id)
+                continue
+            if not match:
+                if game_id not in checkpoint["unmatched"]:
+                    checkpoint["unmatched"].append(game_id)
+                continue
+            results[match.id] = result
+
+        matches = write_match_results(db, results)
+        db.commit()
+
+        apply_scoring_for_matches(matches, db)
+    finally:
+        db.close()
+
+    for game_id, _, _ in batch:
+        if game_id in failed:
+            continue
+        checkpoint["failed"].pop(str(game_id), None)
+        if game_id not in checkpoint["unmatched"]:
+            checkpoint["done"].append(game_id)
+
+
+async def run_backfill(game_ids, concurrency, workers, batch_size, checkpoint_path, retry_unmatched=False):
+    checkpoint = load_checkpoint(checkpoint_path)
+    skip = set(checkpoint["done"])
+    if retry_unmatched:
+        # e.g. the Match rows were added since; re-listed if still unmatched
+        retried = set(game_ids)
+        checkpoint["unmatched"] = [g for g in checkpoint["unmatched"] if g not in retried]
+    else:
+        skip |= set(checkpoint["unmatched"])
+    pending = [g for g in game_ids if g not in skip]
+
+    print(f"🏏 {len(pending)} games to backfill ({len(game_ids) - len(pending)} already done)")
+    if not pending:
+        return
+
+    semaphore = asyncio.Semaphore(concurrency)
+    rules = xfactor_catalog.get().rules
+    started = time.monotonic()
+    processed = 0
+    batch = []
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        async with httpx.AsyncClient(timeout=10) as client:
+            tasks = [
+                asyncio.create_task(fetch_and_compute(client, g, semaphore, pool, rules))
+                for g in pending
+            ]
+
+            for task in asyncio.as_completed(tasks):
+                game_id, scorecard, result, error = await task
+
+                if error is None:
+                    batch.append((game_id, scorecard, result))
+                else:
+                    checkpoint["failed"][str(game_id)] = repr(error)
+                    print(f"⚠️  game {game_id} failed: {error!r}")
+
+                processed += 1
+
+                if len(batch) >= batch_size or processed == len(pending):
+                    flush_batch(batch, checkpoint)
+                    save_checkpoint(checkpoint_path, checkpoint)
+                    batch = []
+
+                    elapsed = time.monotonic() - started
+                    print(
+                        f"   {processed}/{len(pending)} games "
+                        f"({processed / elapsed:.2f} games/s, "
+                        f"{len(checkpoint['failed'])} failed, "
+                        f"{len(checkpoint['unmatched'])} unmatched)"
+                    )
+
+    print("✅ Backfill finished")
+
+
+def parse_game_ids(args) -> list:
+    game_ids = list(args.games or [])
+    for r in args.range or []:
+        start, end = (int(x) for x in r.split("-"))
+        game_ids.extend(range(start, end + 1))
+    # de-duplicate, keep order
+    return list(dict.fromkeys(game_ids))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Backfill match results from the ICC feed")
+    parser.add_argument("--games", type=int, nargs="*", help="ICC game ids")
+    parser.add_argument("--range", action="append", help="inclusive id range, e.g. 268100-268155")
+    parser.add_argument("--concurrency", type=int, default=8, help="games fetched at once")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="aggregation processes")
+    parser.add_argument("--batch-size", type=int, default=10, help="games per DB write / scoring batch")
+    parser.add_argument("--checkpoint", default=DEFAULT_CHECKPOINT)
+    parser.add_argument("--retry-unmatched", action="store_true",
+                        help="retry games that had no Match row on an earlier run")
+    args = parser.parse_args()
+
+    game_ids = parse_game_ids(args)
+    if not game_ids:
+        parser.error("pass --games and/or --range")
+
+    asyncio.run(run_backfill(
+        game_ids,
+        concurrency=args.concurrency,
+        workers=args.workers,
+        batch_size=args.batch_size,
+        checkpoint_path=args.checkpoint,
+        retry_unmatched=args.retry_unmatched,
+    ))
+
+
+if __name__ == "__main__":
+    main()
@@ -4,6 +4,7 @@ Supports both PostgreSQL (production/local) and SQLite (testing)
 """
 
 from sqlalchemy import create_engine, event, text
+from sqlalchemy.pool import NullPool, QueuePool
 from sqlalchemy.orm import declarative_base, sessionmaker
 import os
 
@@ -29,22 +30,92 @@ if APP_ENV == "prod" and DB_SCHEMA != "ipl_prod":
 # ENGINE SETUP
 # ============================================================================
 
+IS_SQLITE = DATABASE_URL.startswith("sqlite")
+
+# Pool settings (ignored for SQLite)
+#   DB_POOL_MODE=pooled     SQLAlchemy QueuePool (default)
+#   DB_POOL_MODE=pgbouncer  no client-side pool; for Neon's pooled endpoint /
+#                           PgBouncer in transaction mode, where session state
+#                           like search_path does not survive between
+#                           transactions, so table names are schema-qualified
+#                           instead (schema_translate_map)
+DB_POOL_MODE = os.getenv("DB_POOL_MODE", "pooled")
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+DB_POOL_TIMEOUT = int(os.getenv("DB_POOL_TIMEOUT", "30"))
+# Connections are replaced once older than DB_POOL_RECYCLE, kept below the
+# ~5 min after which Neon drops idle connections (compute suspend), instead
+# of pre-pinging: pre-ping costs a SELECT 1 round trip on every checkout.
+# A connection that dies anyway fails that one request and is discarded.
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "240"))    # seconds
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "0") == "1"
+
+if DB_POOL_MODE not in ("pooled", "pgbouncer"):
+    raise RuntimeError(f"Unknown DB_POOL_MODE: {DB_POOL_MODE}")
+
+
+def engine_options() -> dict:
+    if IS_SQLITE:
+        # SQLite needs this special setting for FastAPI's threading
+        return {"connect_args": {"check_same_thread": False}}
+
+    if DB_POOL_MODE == "pgbouncer":
+        return {
+            "poolclass": NullPool,
+            "execution_options": {"schema_translate_map": {None: DB_SCHEMA}},
+        }
+
+    return {
+        "pool_size": DB_POOL_SIZE,
+        "max_overflow": DB_MAX_OVERFLOW,
+        "pool_timeout": DB_POOL_TIMEOUT,
+        "pool_recycle": DB_POOL_RECYCLE,
+        "pool_pre_ping": DB_POOL_PRE_PING,
+    }
+
+
 # Create the database engine (the "connection" to the database)
 engine = create_engine(
     DATABASE_URL,
-    # SQLite needs this special setting for FastAPI's threading
-    connect_args={"check_same_thread": False} if "sqlite" in DATABASE_URL else {},
     # Echo SQL queries to console (helpful for learning/debugging)
     echo=False,  # Set to False in production
+    **engine_options(),
 )
 
-@event.listens_for(engine,"checkout")
-def set_search_path(dbapi_connection, connection_record, connection_proxy):
-    cursor = dbapi_connection.cursor()
-    try:
-        cursor.execute(f"SET search_path TO {DB_SCHEMA}")
-    finally:
-        cursor.close()
+
+if not IS_SQLITE and DB_POOL_MODE == "pooled":
+    # Once per physical connection, not on every checkout (saves a round
+    # trip per request)
+    @event.listens_for(engine, "connect")
+    def set_search_path(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            cursor.execute(f"SET search_path TO {DB_SCHEMA}")
+        finally:
+            cursor.close()
+        # Not rolled back on return to the pool
+        dbapi_connection.commit()
+
+
+def pool_stats() -> dict:
+    """Current pool usage, for sizing workers against DB connection limits."""
+    pool = engine.pool
+    stats = {"mode": "sqlite" if IS_SQLITE else DB_POOL_MODE, "pool": type(pool).__name__}
+    if isinstance(pool, QueuePool):
+        stats.update({
+            "size": pool.size(),
+            "checked_out": pool.checkedout(),
+            "checked_in": pool.checkedin(),
+            "overflow": pool.overflow(),
+        })
+        if not IS_SQLITE:
+            stats.update({
+                "max_overflow": DB_MAX_OVERFLOW,
+                "timeout": DB_POOL_TIMEOUT,
+                "recycle": DB_POOL_RECYCLE,
+                "pre_ping": DB_POOL_PRE_PING,
+            })
+    return stats
 
 # ============================================================================
 # SESSION SETUP
@@ -80,6 +151,36 @@ def get_db():
 # HELPER FUNCTIONS (OPTIONAL BUT USEFUL)
 # ============================================================================
 
+# Idempotent upgrades for existing databases, applied by init_db()
+SCHEMA_UPGRADES = [
+    "ALTER TABLE {schema}.matches ADD COLUMN IF NOT EXISTS icc_game_id INTEGER",
+    "CREATE INDEX IF NOT EXISTS idx_matches_icc_game_id ON {schema}.matches (icc_game_id)",
+    "ALTER TABLE {schema}.x_factor_definition ADD COLUMN IF NOT EXISTS scope VARCHAR(20)",
+    "ALTER TABLE {schema}.x_factor_definition ADD COLUMN IF NOT EXISTS stat VARCHAR(30)",
+    "ALTER TABLE {schema}.x_factor_definition ADD COLUMN IF NOT EXISTS comparator VARCHAR(2)",
+    "ALTER TABLE {schema}.x_factor_definition ADD COLUMN IF NOT EXISTS threshold FLOAT",
+    "ALTER TABLE {schema}.x_factor_definition ADD COLUMN IF NOT EXISTS min_balls INTEGER DEFAULT 0",
+    "ALTER TABLE {schema}.players ADD COLUMN IF NOT EXISTS icc_player_id VARCHAR(20)",
+    "CREATE INDEX IF NOT EXISTS ix_players_icc_player_id ON {schema}.players (icc_player_id)",
+    "ALTER TABLE {schema}.actual_x_factors ADD COLUMN IF NOT EXISTS player_id INTEGER REFERENCES {schema}.players (id)",
+    "CREATE INDEX IF NOT EXISTS idx_matches_start_time_id ON {schema}.matches (start_time, id)",
+    "CREATE INDEX IF NOT EXISTS idx_matches_status_start_time_id ON {schema}.matches (status, start_time, id)",
+    # /users?prefix= : LIKE 'abc%' on lower(username) (pattern ops: any collation)
+    "CREATE INDEX IF NOT EXISTS idx_users_username_lower ON {schema}.users (lower(username) text_pattern_ops)",
+    "CREATE INDEX IF NOT EXISTS idx_users_username_lower_id ON {schema}.users (lower(username), id)",
+    # squad_cache fingerprint: catches out-of-band squad / player edits
+    "ALTER TABLE {schema}.squads ADD COLUMN IF NOT EXISTS updated_at TIMESTAMP",
+    "ALTER TABLE {schema}.players ADD COLUMN IF NOT EXISTS updated_at TIMESTAMP",
+    # xfactor_catalog fingerprint: catches edits made by other workers
+    "ALTER TABLE {schema}.x_factor_definition ADD COLUMN IF NOT EXISTS updated_at TIMESTAMP",
+    # one row per X-factor id: drop duplicates left by concurrent seeding
+    # (keeping the oldest), then enforce it
+    "DELETE FROM {schema}.x_factor_definition a USING {schema}.x_factor_definition b "
+    "WHERE a.id = b.id AND a.serial > b.serial",
+    "CREATE UNIQUE INDEX IF NOT EXISTS uq_x_factor_definition_id ON {schema}.x_factor_definition (id)",
+]
+
+
 def init_db():
     # 1. Determine which schema to use (default to ipl_staging if not set)
     schema = DB_SCHEMA
@@ -99,6 +200,13 @@ def init_db():
     Base.metadata.create_all(bind=engine)
     print("✅ Tables created successfully!")
 
+    # 5. Columns added to tables that may already exist
+    # (create_all only creates missing tables, it never alters them)
+    with engine.connect() as connection:
+        for statement in SCHEMA_UPGRADES:
+            connection.execute(text(statement.format(schema=schema)))
+        connection.commit()
+
 
 def drop_all_tables():
     """
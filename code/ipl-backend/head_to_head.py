@@ -0,0 +1,132 @@
+"""
+Head-to-head comparison of two users over the matches both have scored
+predictions for.
+
+The comparison is one query: predictions self-joined on match_id (plus the
+match, and correlated counts of correct X-factors per prediction).
+Categories each user got right are re-derived from the stored predictions
+with scoring.category_points. Results are cached per pair until the next
+scoring run in this process (player_performance.performance_version), and
+at most PERFORMANCE_MAX_AGE for scoring done elsewhere.
+"""
+
+import threading
+import time
+from typing import Dict, Optional, Tuple
+
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session, aliased
+
+from models import Match, PredictedXFactor, Prediction
+from player_index import get_player_index
+from player_performance import PERFORMANCE_MAX_AGE, performance_version
+from scoring import category_points
+from user_directory import user_directory
+
+
+HEAD_TO_HEAD_CACHE_SIZE = 4096
+
+_lock = threading.Lock()
+_cache: Dict[Tuple[int, int], Tuple[int, float, dict]] = {}  # (a, b) -> (version, built_at, result)
+
+
+def xfactor_count(prediction, correct_only: bool):
+    query = select(func.count(PredictedXFactor.id)).where(
+        PredictedXFactor.prediction_id == prediction.id
+    )
+    if correct_only:
+        query = query.where(PredictedXFactor.correct.is_(True))
+    return query.correlate(prediction).scalar_subquery()
+
+
+def side_entry(prediction, match: Match, xf_correct: int, xf_total: int, index) -> dict:
+    categories = category_points(prediction, match, index)
+    return {
+        "points": prediction.points_earned,
+        "correct": sorted(categories),
+        "x_factors_correct": xf_correct,
+        "x_factors_total": xf_total,
+    }
+
+
+def build_head_to_head(db: Session, a_id: int, b_id: int) -> dict:
+    pa, pb = aliased(Prediction), aliased(Prediction)
+
+    rows = (
+        db.query(
+            Match, pa, pb,
+            xfactor_count(pa, True), xfactor_count(pa, False),
+            xfactor_count(pb, True), xfactor_count(pb, False),
+        )
+        .join(pa, pa.match_id == Match.id)
+        .join(pb, pb.match_id == Match.id)
+        .filter(
+            pa.user_id == a_id,
+            pb.user_id == b_id,
+            pa.points_earned.isnot(None),
+            pb.points_earned.isnot(None),
+        )
+        .order_by(Match.start_time.asc(), Match.id.asc())
+        .all()
+    )
+
+    index = get_player_index()
+    tally = {"a_wins": 0, "b_wins": 0, "ties": 0}
+    totals = {"a": 0, "b": 0}
+    matches = []
+
+    for match, a, b, a_xf_correct, a_xf_total, b_xf_correct, b_xf_total in rows:
+        if a.points_earned > b.points_earned:
+            winner = "a"
+            tally["a_wins"] += 1
+        elif b.points_earned > a.points_earned:
+            winner = "b"
+            tally["b_wins"] += 1
+        else:
+            winner = None
+            tally["ties"] += 1
+
+        totals["a"] += a.points_earned
+        totals["b"] += b.points_earned
+
+        matches.append({
+            "match_id": match.id,
+            "match_label": f"{match.home_team} vs {match.away_team}",
+            "start_time": match.start_time,
+            "a": side_entry(a, match, a_xf_correct, a_xf_total, index),
+            "b": side_entry(b, match, b_xf_correct, b_xf_total, index),
+            "winner": winner,
+            "tally": dict(tally),  # running head-to-head after this match
+        })
+
+    return {
+        "a": {"user_id": a_id, "username": user_directory.get(a_id), "total_points": totals["a"]},
+        "b": {"user_id": b_id, "username": user_directory.get(b_id), "total_points": totals["b"]},
+        "tally": tally,
+        "matches": matches,
+    }
+
+
+def get_head_to_head(db: Session, a_id: int, b_id: int) -> Optional[dict]:
+    """None if either user does not exist."""
+    version = performance_version()
+    cached = _cache.get((a_id, b_id))
+    if (
+        cached is not None
+        and cached[0] == version
+        and time.monotonic() - cached[1] < PERFORMANCE_MAX_AGE
+    ):
+        return cached[2]
+
+    user_directory.ensure(db, [a_id, b_id])
+    if user_directory.get(a_id) is None or user_directory.get(b_id) is None:
+        return None
+
+    result = build_head_to_head(db, a_id, b_id)
+
+    with _lock:
+        if len(_cache) >= HEAD_TO_HEAD_CACHE_SIZE:
+            _cache.clear()
+        _cache[(a_id, b_id)] = (version, time.monotonic(), result)
+
+    return result
@@ -0,0 +1,186 @@
+"""
+Private mini-leagues.
+
+Each LeagueMember row carries the member's running total_points /
+matches_played. When predictions are scored, scoring computes each user's
+points delta and push_league_deltas adds it to every membership of that
+user with a few bulk UPDATEs (one per distinct delta), so league tables are
+a ranged read over (league_id, total_points) and never touch predictions.
+
+    python leagues.py   # recompute every member's totals from predictions
+"""
+
+import secrets
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from models import League, LeagueMember, Prediction, User
+
+
+INVITE_CODE_BYTES = 6
+MAX_LEAGUES_PER_USER = 20
+
+
+# ============================================================================
+# MEMBERSHIP
+# ============================================================================
+
+def user_totals(db: Session, user_id: int) -> Tuple[int, int]:
+    """(total_points, matches_played) over the user's scored predictions."""
+    points, played = (
+        db.query(func.coalesce(func.sum(Prediction.points_earned), 0), func.count(Prediction.id))
+        .filter(Prediction.user_id == user_id, Prediction.points_earned.isnot(None))
+        .one()
+    )
+    return int(points), played
+
+
+def add_member(db: Session, league: League, user_id: int) -> LeagueMember:
+    """Join with the user's season totals so far (does not commit)."""
+    # Lock the user's predictions before summing them: a scoring that
+    # already updated one has to commit first (and is then in the sums),
+    # any later one waits for this membership and pushes its delta to it
+    db.query(Prediction.id).filter(Prediction.user_id == user_id).order_by(Prediction.id).with_for_update().all()
+    points, played = user_totals(db, user_id)
+    member = LeagueMember(
+        league_id=league.id,
+        user_id=user_id,
+        total_points=points,
+        matches_played=played,
+    )
+    db.add(member)
+    return member
+
+
+def league_count(db: Session, user_id: int) -> int:
+    return db.query(func.count(LeagueMember.id)).filter(LeagueMember.user_id == user_id).scalar()
+
+
+def create_league(db: Session, owner_id: int, name: str) -> League:
+    league = League(
+        name=name,
+        owner_id=owner_id,
+        invite_code=secrets.token_urlsafe(INVITE_CODE_BYTES),
+    )
+    db.add(league)
+    db.flush()
+    add_member(db, league, owner_id)
+    db.commit()
+    db.refresh(league)
+    return league
+
+
+def get_membership(db: Session, league_id: int, user_id: int) -> Optional[LeagueMember]:
+    return (
+        db.query(LeagueMember)
+        .filter(LeagueMember.league_id == league_id, LeagueMember.user_id == user_id)
+        .first()
+    )
+
+
+# ============================================================================
+# INCREMENTAL TOTALS
+# ============================================================================
+
+def points_deltas(
+    predictions: Iterable[Prediction],
+    old_points: Dict[int, Optional[int]],
+) -> Dict[int, Tuple[int, int]]:
+    """
+    user_id -> (points delta, matches_played delta) after re-scoring, given
+    each prediction's points_earned before (by prediction id).
+    """
+    deltas: Dict[int, Tuple[int, int]] = {}
+    for prediction in predictions:
+        old = old_points.get(prediction.id)
+        new = prediction.points_earned
+
+        points = (new or 0) - (old or 0)
+        played = (new is not None) - (old is not None)
+        if points or played:
+            total_points, total_played = deltas.get(prediction.user_id, (0, 0))
+            deltas[prediction.user_id] = (total_points + points, total_played + played)
+
+    return deltas
+
+
+def push_league_deltas(db: Session, deltas: Dict[int, Tuple[int, int]]) -> None:
+    """
+    Add each user's delta to all their memberships (does not commit).
+    Users with the same delta share one UPDATE; after a match most users
+    fall into a handful of point values.
+    """
+    users_by_delta: Dict[Tuple[int, int], List[int]] = {}
+    for user_id, delta in deltas.items():
+        if delta != (0, 0):
+            users_by_delta.setdefault(delta, []).append(user_id)
+
+    for (points, played), user_ids in users_by_delta.items():
+        db.query(LeagueMember).filter(LeagueMember.user_id.in_(user_ids)).update(
+            {
+                LeagueMember.total_points: LeagueMember.total_points + points,
+                LeagueMember.matches_played: LeagueMember.matches_played + played,
+            },
+            synchronize_session=False,
+        )
+
+
+# ============================================================================
+# READS
+# ============================================================================
+
+def league_table(db: Session, league_id: int, offset: int = 0, limit: int = 50) -> List[dict]:
+    """Ranked slice of a league (points desc, then username, as /overall)."""
+    rows = (
+        db.query(LeagueMember.user_id, User.username, LeagueMember.total_points, LeagueMember.matches_played)
+        .join(User, User.id == LeagueMember.user_id)
+        .filter(LeagueMember.league_id == league_id)
+        .order_by(LeagueMember.total_points.desc(), func.lower(User.username))
+        .offset(offset)
+        .limit(limit)
+        .all()
+    )
+    return [
+        {
+            "rank": offset + i + 1,
+            "user_id": user_id,
+            "username": username,
+            "total_points": total_points,
+            "matches_played": matches_played,
+        }
+        for i, (user_id, username, total_points, matches_played) in enumerate(rows)
+    ]
+
+
+# ============================================================================
+# REPAIR: recompute totals from predictions
+# ============================================================================
+
+def rebuild_league_totals(db: Session) -> int:
+    totals = {
+        user_id: (int(points), played)
+        for user_id, points, played in db.query(
+            Prediction.user_id, func.sum(Prediction.points_earned), func.count(Prediction.id)
+        )
+        .filter(Prediction.points_earned.isnot(None))
+        .group_by(Prediction.user_id)
+    }
+
+    members = db.query(LeagueMember).all()
+    for member in members:
+        member.total_points, member.matches_played = totals.get(member.user_id, (0, 0))
+
+    db.commit()
+    return len(members)
+
+
+if __name__ == "__main__":
+    from database import SessionLocal
+
+    db = SessionLocal()
+    try:
+        print(f"✅ Recomputed totals for {rebuild_league_totals(db)} league membership(s)")
+    finally:
+        db.close()
@@ -0,0 +1,204 @@
+"""
+Live-match ingestion worker.
+
+- Moves "upcoming" matches to "live" once their start_time has passed
+  (one bulk UPDATE per tick).
+- Polls the ICC scorecard of every live match that has an icc_game_id, on an
+  adaptive interval: faster near the end of an innings.
+- When ICC reports the game as ended, generates the result, stores it and
+  scores all predictions, with no admin in the loop.
+
+Runs inside the API process when LIVE_WORKER_ENABLED=1 (see main.py), or
+standalone:  python live_worker.py
+"""
+
+import asyncio
+import os
+import time
+from datetime import datetime
+
+import httpx
+
+from database import SessionLocal
+from models import Match
+from match_cache import invalidate_match_cache
+from match_results import write_match_results
+from scoring import apply_scoring_for_matches
+from services.icc_client import fetch_scorecard
+from services.icc_guard import IccUnavailable, fresh_only
+from services.result_engine import generate_match_result
+from services.single_flight import icc_flight
+from xfactor_catalog import xfactor_catalog
+
+
+LIVE_WORKER_ENABLED = os.getenv("LIVE_WORKER_ENABLED", "0") == "1"
+
+STATUS_UPCOMING = "upcoming"
+STATUS_LIVE = "live"
+
+TICK_SECONDS = 10           # how often the loop wakes up
+POLL_IDLE = 120             # early in an innings
+POLL_NORMAL = 45
+POLL_CLOSING = 15           # last few overs of an innings
+CLOSING_OVERS = 3
+
+
+# ============================================================================
+# DB STEPS (sync, run in a thread)
+# ============================================================================
+
+def promote_started_matches(now: datetime) -> int:
+    """upcoming -> live for every match whose start_time has passed (bulk)."""
+    db = SessionLocal()
+    try:
+        count = (
+            db.query(Match)
+            .filter(Match.status == STATUS_UPCOMING, Match.start_time <= now)
+            .update({Match.status: STATUS_LIVE}, synchronize_session=False)
+        )
+        db.commit()
+        if count:
+            invalidate_match_cache()
+        return count
+    finally:
+        db.close()
+
+
+def load_live_games() -> dict:
+    """match_id -> icc_game_id for live matches linked to an ICC game."""
+    db = SessionLocal()
+    try:
+        rows = (
+            db.query(Match.id, Match.icc_game_id)
+            .filter(Match.status == STATUS_LIVE, Match.icc_game_id.isnot(None))
+            .all()
+        )
+        return {match_id: game_id for match_id, game_id in rows}
+    finally:
+        db.close()
+
+
+def finalize_matches(results: dict) -> None:
+    """Store results for match_id -> result dict and score them in one batch."""
+    db = SessionLocal()
+    try:
+        matches = write_match_results(db, results)
+        db.commit()
+        invalidate_match_cache()
+        apply_scoring_for_matches(matches, db)
+    finally:
+        db.close()
+
+
+# ============================================================================
+# ICC STATE
+# ============================================================================
+
+def is_game_complete(scorecard) -> bool:
+    detail = scorecard["Matchdetail"]
+    return (
+        detail.get("Status") == "Match Ended"
+        and not detail["Match"].get("Live")
+        and bool(detail.get("Winningteam"))
+    )
+
+
+def next_poll_delay(scorecard) -> int:
+    """Poll faster when the current innings is close to its last over."""
+    innings = scorecard.get("Innings") or []
+    if not innings:
+        return POLL_IDLE
+
+    current = innings[-1]
+    try:
+        overs_done = float(current.get("Overs") or 0)
+        allotted = float(current.get("AllottedOvers") or 20)
+    except ValueError:
+        return POLL_NORMAL
+
+    if allotted - overs_done <= CLOSING_OVERS:
+        return POLL_CLOSING
+    if overs_done < allotted / 2:
+        return POLL_IDLE
+    return POLL_NORMAL
+
+
+# ============================================================================
+# LOOP
+# ============================================================================
+
+async def tick(client: httpx.AsyncClient, next_poll: dict):
+    promoted = await asyncio.to_thread(promote_started_matches, datetime.now())
+    if promoted:
+        print(f"🟢 {promoted} match(es) now live")
+
+    live = await asyncio.to_thread(load_live_games)
+
+    # Forget matches that are no longer live
+    for match_id in list(next_poll):
+        if match_id not in live:
+            del next_poll[match_id]
+
+    now = time.monotonic()
+    due = {m: g for m, g in live.items() if next_poll.get(m, 0) <= now}
+    if not due:
+        return
+
+    async def poll(match_id, game_id):
+        try:
+            scorecard = await fetch_scorecard(client, game_id)
+        except (httpx.HTTPError, IccUnavailable) as e:
+            print(f"⚠️  ICC poll failed for match {match_id}: {e!r}")
+            next_poll[match_id] = time.monotonic() + POLL_NORMAL
+            return None
+
+        if not is_game_complete(scorecard):
+            next_poll[match_id] = time.monotonic() + next_poll_delay(scorecard)
+            return None
+
+        # Fresh fetch, not icc_flight: a result memoized (or in flight) for
+        # the public endpoint may predate the final ball. Likewise never
+        # score from cached ICC pages; try again later instead.
+        try:
+            with fresh_only():
+                result = await generate_match_result(game_id, xfactor_catalog.get().rules)
+        except (httpx.HTTPError, IccUnavailable) as e:
+            print(f"⚠️  final result fetch failed for match {match_id}: {e!r}")
+            next_poll[match_id] = time.monotonic() + POLL_NORMAL
+            return None
+
+        icc_flight.forget(("result", game_id))
+        return match_id, result
+
+    polled = await asyncio.gather(
+        *(poll(m, g) for m, g in due.items()),
+        return_exceptions=True,
+    )
+
+    results = {}
+    for item in polled:
+        if isinstance(item, Exception):
+            print(f"⚠️  result generation failed: {item!r}")
+        elif item:
+            match_id, result = item
+            results[match_id] = result
+
+    if results:
+        await asyncio.to_thread(finalize_matches, results)
+        print(f"🏁 finalized and scored match(es) {sorted(results)}")
+
+
+async def run_live_worker():
+    print("📡 Live worker started")
+    next_poll = {}
+    async with httpx.AsyncClient(timeout=10) as client:
+        while True:
+            try:
+                await tick(client, next_poll)
+            except Exception as e:  # keep the worker alive
+                print(f"⚠️  live worker tick failed: {e!r}")
+            await asyncio.sleep(TICK_SECONDS)
+
+
+if __name__ == "__main__":
+    asyncio.run(run_live_worker())
@@ -5,15 +5,18 @@ from routers.users import router as users_router
 from routers.matches import router as matches_router
 from routers.predictions import router as predictions_router
 from routers.leaderboard import router as leaderboard_router
-from routers.players import router as players_router
+from routers.players import router as players_router, legacy_router as players_legacy_router
 from fastapi.middleware.cors import CORSMiddleware
 from routers.xfactors import router as xfactors_router
 from routers.meta import router as meta_router
+from routers.home import router as home_router
+from routers.leagues import router as leagues_router
 from pydantic import BaseModel
 from typing import Optional
-from passlib.context import CryptContext
 from sqlalchemy.orm import Session
 from fastapi import Depends, HTTPException
+from fastapi.concurrency import run_in_threadpool
+from auth.passwords import hash_password, shutdown_pool
 from models import User
 from database import get_db
 
@@ -22,6 +25,11 @@ app = FastAPI(title="Indian Prediction League API")
 
 init_db()
 
+from rate_limit import RateLimitMiddleware
+
+# Added before CORS so 429 responses still carry CORS headers
+app.add_middleware(RateLimitMiddleware)
+
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],
@@ -30,9 +38,30 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-from xfactor_master import load_default_xfactors
+from database import SessionLocal
+from xfactor_catalog import xfactor_catalog, seed_defaults
+from user_directory import user_directory
+
+with SessionLocal() as _db:
+    seed_defaults(_db)  # default X-factor definitions, once per process
+    user_directory.load(_db)  # id -> username for leaderboards
+
+xfactor_catalog.get()  # warm the X-factor catalog
+
+import asyncio
+from live_worker import LIVE_WORKER_ENABLED, run_live_worker
+
 
-load_default_xfactors()
+@app.on_event("startup")
+async def start_live_worker():
+    # Only enable on ONE instance, otherwise every worker polls ICC
+    if LIVE_WORKER_ENABLED:
+        app.state.live_worker = asyncio.create_task(run_live_worker())
+
+
+@app.on_event("shutdown")
+def stop_password_pool():
+    shutdown_pool()
 
 
 @app.get("/health")
@@ -53,16 +82,16 @@ class UserRegister(BaseModel):
     fav_player: Optional[str] = None
 
 @app.post("/auth/register")
-def register(user: UserRegister, db: Session = Depends(get_db)):
+async def register(user: UserRegister, db: Session = Depends(get_db)):
     # 1. Check if username exists
-    db_user = db.query(User).filter(User.username == user.username).first()
+    db_user = await run_in_threadpool(
+        lambda: db.query(User).filter(User.username == user.username).first()
+    )
     if db_user:
         raise HTTPException(status_code=400, detail="Username already registered")
     
-    # 2. Hash Password
-    # Ensure you have: from passlib.context import CryptContext
-    pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
-    hashed_pw = pwd_context.hash(user.password)
+    # 2. Hash Password (bcrypt process pool, see auth/passwords.py)
+    hashed_pw = await hash_password(user.password)
     
     # 3. Create User
     new_user = User(
@@ -77,8 +106,12 @@ def register(user: UserRegister, db: Session = Depends(get_db)):
         role="player" # Default role
     )
     db.add(new_user)
-    db.commit()
-    db.refresh(new_user)
+
+    def save():
+        db.commit()
+        user_directory.add(new_user.id, new_user.username)
+
+    await run_in_threadpool(save)
     return {"message": "User created successfully"}
 
 # Attach routers
@@ -88,7 +121,10 @@ app.include_router(matches_router, prefix="/matches")
 app.include_router(predictions_router, prefix="/predictions")
 app.include_router(leaderboard_router, prefix="/leaderboard")
 app.include_router(players_router, prefix="/players")
+app.include_router(players_legacy_router, prefix="/players")
 app.include_router(xfactors_router, prefix="/xfactors")
 app.include_router(meta_router, prefix="/meta")
+app.include_router(home_router, prefix="/home")
+app.include_router(leagues_router, prefix="/leagues")
 
 
@@ -0,0 +1,75 @@
+"""
+Pre-serialized responses for /matches/list and /matches/{id}.
+
+Both are hit on every app open, so the JSON body is built once and reused,
+with an ETag (content hash) and Last-Modified for conditional GETs.
+
+Entries are dropped:
+  - immediately, when this process changes matches (invalidate_match_cache:
+    admin create / result, live worker status changes)
+  - after MATCH_CACHE_MAX_AGE, to pick up writes from other processes
+    (backfill CLI, other API workers). A rebuild with identical content keeps
+    its ETag and Last-Modified, so clients still get 304s.
+"""
+
+import hashlib
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Callable, Dict, Hashable, NamedTuple, Optional
+
+
+MATCH_CACHE_MAX_AGE = 30
+MATCH_CACHE_SIZE = 1024
+
+
+class CachedBody(NamedTuple):
+    body: bytes
+    etag: str
+    last_modified: datetime
+    built_at: float
+
+
+_lock = threading.Lock()
+_state = {"version": 1}
+_entries: Dict[Hashable, CachedBody] = {}
+
+
+def invalidate_match_cache() -> int:
+    """Call after committing any change to matches or their results."""
+    with _lock:
+        _state["version"] += 1
+        _entries.clear()
+        return _state["version"]
+
+
+def get_cached_body(key: Hashable, build: Callable[[], Optional[bytes]]) -> Optional[CachedBody]:
+    """
+    Cached body for `key`, or build() it. build() returning None (e.g. unknown
+    match id) is passed through and not cached.
+    """
+    cached = _entries.get(key)
+    if cached is not None and time.monotonic() - cached.built_at < MATCH_CACHE_MAX_AGE:
+        return cached
+
+    version = _state["version"]
+    body = build()
+    if body is None:
+        return None
+
+    etag = f'"m-{hashlib.sha1(body).hexdigest()[:16]}"'
+    if cached is not None and cached.etag == etag:
+        last_modified = cached.last_modified
+    else:
+        last_modified = datetime.now(timezone.utc).replace(microsecond=0)
+
+    entry = CachedBody(body, etag, last_modified, time.monotonic())
+
+    with _lock:
+        # Don't store a body built from data that was invalidated meanwhile
+        if _state["version"] == version:
+            if len(_entries) >= MATCH_CACHE_SIZE:
+                _entries.clear()
+            _entries[key] = entry
+
+    return entry
@@ -0,0 +1,97 @@
+from typing import Dict, List, Optional
+from sqlalchemy.orm import Session
+from models import Match, ActualXFactor, Player
+from player_index import PlayerIndex, get_player_index, invalidate_player_index
+from xfactor_stats import record_match_xfactors
+
+
+def canonical_names(index: PlayerIndex, names: Optional[str]) -> Optional[str]:
+    """Comma-separated names (ties) rewritten to their canonical Player names."""
+    if not names:
+        return names
+    resolved = []
+    for name in names.split(","):
+        player_id = index.resolve(name)
+        resolved.append(index.names[player_id] if player_id is not None else name.strip())
+    return ", ".join(resolved)
+
+
+def write_match_results(db: Session, results: Dict[int, dict]) -> List[Match]:
+    """
+    Store results for many matches in one go (does not commit).
+    `results` maps match_id -> result dict shaped like generate_match_result's
+    output / MatchResultUpdate. Old X-factor hits are replaced.
+    Returns the updated Match rows.
+    """
+    if not results:
+        return []
+
+    match_ids = list(results)
+
+    matches = db.query(Match).filter(Match.id.in_(match_ids)).all()
+    index = get_player_index()
+
+    for match in matches:
+        data = results[match.id]
+        match.actual_toss_winner = data["toss_winner"]
+        match.actual_match_winner = data["match_winner"]
+        match.actual_top_wicket_taker = canonical_names(index, data["top_wicket_taker"])
+        match.actual_top_run_scorer = canonical_names(index, data["top_run_scorer"])
+        match.actual_highest_run_scored = data["highest_run_scored"]
+        match.actual_powerplay_runs = data["powerplay_runs"]
+        match.actual_total_wickets = data["total_wickets"]
+        match.status = "Completed"
+
+    # Hits being replaced, needed to update hit-rate stats by difference
+    old_hits = {}
+    for player_id, xf_id, match_id in db.query(
+        ActualXFactor.player_id, ActualXFactor.xf_id, ActualXFactor.match_id
+    ).filter(ActualXFactor.match_id.in_(match_ids)):
+        old_hits.setdefault(match_id, []).append((player_id, xf_id))
+
+    # Replace X-factor hits (re-submitting results)
+    db.query(ActualXFactor)\
+        .filter(ActualXFactor.match_id.in_(match_ids))\
+        .delete(synchronize_session=False)
+
+    # Resolve every hit to a canonical Player (ICC id first, then name)
+    rows = []
+    learned_icc_ids = {}
+
+    for match_id, data in results.items():
+        for hit in data["x_factor_hits"]:
+            if not hit["player_name"]:
+                continue  # unresolved ICC ids have no name
+
+            icc_id = hit.get("icc_player_id")
+            player_id = index.resolve_icc(icc_id, hit["player_name"])
+
+            if player_id is not None and icc_id and str(icc_id) not in index.by_icc_id:
+                learned_icc_ids[player_id] = str(icc_id)
+
+            rows.append({
+                "match_id": match_id,
+                "xf_id": hit["xf_id"],
+                "player_id": player_id,
+                "player_name": index.names[player_id] if player_id is not None else hit["player_name"],
+            })
+
+    db.bulk_insert_mappings(ActualXFactor, rows)
+
+    # Remember ICC ids matched by name so next time is a direct id lookup
+    if learned_icc_ids:
+        db.bulk_update_mappings(Player, [
+            {"id": player_id, "icc_player_id": icc_id}
+            for player_id, icc_id in learned_icc_ids.items()
+        ])
+        invalidate_player_index()
+
+    # Incremental hit-rate statistics
+    new_hits = {}
+    for row in rows:
+        new_hits.setdefault(row["match_id"], []).append((row["player_id"], row["xf_id"]))
+
+    for match in matches:
+        record_match_xfactors(db, match, old_hits.get(match.id, []), new_hits.get(match.id, []))
+
+    return matches
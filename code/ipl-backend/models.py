@@ -2,7 +2,7 @@
 SQLAlchemy Models for IPL Prediction App
 """
 
-from sqlalchemy import Column, Integer, String, DateTime, Boolean, ForeignKey, Enum, Index
+from sqlalchemy import Column, Integer, String, DateTime, Boolean, Float, ForeignKey, Enum, Index, UniqueConstraint
 from sqlalchemy.orm import relationship
 from database import Base
 from datetime import datetime
@@ -67,9 +67,26 @@ class Player(Base):
     name = Column(String(100), nullable=False)
     role = Column(Enum(PlayerRole), nullable=False) # BATTER, BOWLER, etc.
     image_url = Column(String(255), nullable=True) # URL from S3
+    icc_player_id = Column(String(20), nullable=True, index=True) # ICC feed player id
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=True)
 
     # Relationships
     squad_entries = relationship("Squad", back_populates="player")
+    aliases = relationship("PlayerAlias", back_populates="player", cascade="all, delete-orphan")
+
+
+class PlayerAlias(Base):
+    """
+    Alternative spellings of a player's name, e.g. "Faf du Plessis" ->
+    "F du Plessis". Used by player_index for name resolution.
+    """
+    __tablename__ = "player_aliases"
+
+    id = Column(Integer, primary_key=True, index=True, autoincrement=True)
+    player_id = Column(Integer, ForeignKey("players.id"), nullable=False, index=True)
+    alias = Column(String(100), nullable=False)
+
+    player = relationship("Player", back_populates="aliases")
 
 
 class Squad(Base):
@@ -87,6 +104,7 @@ class Squad(Base):
     
     is_captain = Column(Boolean, default=False)
     price = Column(String(20), nullable=True) # Optional: Auction price for IPL context
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=True)
 
     # Relationships
     tournament = relationship("Tournament", back_populates="squads")
@@ -134,6 +152,9 @@ class Match(Base):
     venue = Column(String(100), nullable=False)
     start_time = Column(DateTime, nullable=False)
     status = Column(String(20), nullable=False, default="upcoming")
+
+    # ICC feed game id (links the fixture to its scorecard / commentary)
+    icc_game_id = Column(Integer, nullable=True)
     
     # Results
     actual_toss_winner = Column(String(50), nullable=True)
@@ -156,6 +177,10 @@ class Match(Base):
         Index("idx_matches_status", "status"),
         Index("idx_matches_home_team_id", "home_team_id"),
         Index("idx_matches_away_team_id", "away_team_id"),
+        Index("idx_matches_icc_game_id", "icc_game_id"),
+        # Keyset pagination of /matches/list
+        Index("idx_matches_start_time_id", "start_time", "id"),
+        Index("idx_matches_status_start_time_id", "status", "start_time", "id"),
     )
 
 
@@ -217,6 +242,7 @@ class ActualXFactor(Base):
     
     xf_id = Column(String(50), nullable=False)
     player_name = Column(String(100), nullable=False)
+    player_id = Column(Integer, ForeignKey("players.id"), nullable=True)  # resolved Player
     
     match = relationship("Match", back_populates="actual_x_factors")
 
@@ -226,7 +252,7 @@ class ActualXFactor(Base):
 
 
 # ============================================================================
-# MODEL 6: XFactorDefinition (Unchanged)
+# MODEL 6: XFactorDefinition
 # ============================================================================
 class XFactorDef(Base):
     __tablename__ = "x_factor_definition"
@@ -237,4 +263,112 @@ class XFactorDef(Base):
     category = Column(String(50), nullable=False)
     description = Column(String(100), nullable=False)
     status = Column(Boolean, nullable=False, default=True)
-    result_description = Column(String(100), nullable=True)
\ No newline at end of file
+    result_description = Column(String(100), nullable=True)
+
+    # Machine-readable rule, e.g. batter.strike_rate >= 180 (min 10 balls)
+    scope = Column(String(20), nullable=True)        # batter / bowler / fielder / commentary
+    stat = Column(String(30), nullable=True)         # runs, strike_rate, dots, economy...
+    comparator = Column(String(2), nullable=True)    # >=, <=, >, <, ==
+    threshold = Column(Float, nullable=True)
+    min_balls = Column(Integer, nullable=True, default=0)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=True)
+
+    __table_args__ = (
+        # seed_defaults inserts ON CONFLICT (id) DO NOTHING from every worker
+        Index("uq_x_factor_definition_id", "id", unique=True),
+    )
+
+
+# ============================================================================
+# MODEL 7: X-factor hit-rate statistics (precomputed, updated per match)
+# ============================================================================
+class XFactorPlayerStat(Base):
+    """
+    Running per-(player, xf_id) counts: hits = matches where the X-factor
+    happened for the player, opportunities = completed matches the player
+    was in the squad for. Maintained incrementally by xfactor_stats.
+    """
+    __tablename__ = "xfactor_player_stats"
+
+    id = Column(Integer, primary_key=True, index=True, autoincrement=True)
+    player_id = Column(Integer, ForeignKey("players.id"), nullable=False)
+    xf_id = Column(String(50), nullable=False)
+    hits = Column(Integer, nullable=False, default=0)
+    opportunities = Column(Integer, nullable=False, default=0)
+
+    __table_args__ = (
+        UniqueConstraint("player_id", "xf_id", name="uq_xfactor_player_stats_player_xf"),
+        Index("idx_xfactor_player_stats_xf_id", "xf_id"),
+    )
+
+
+class XFactorStatMatch(Base):
+    """Matches already counted into XFactorPlayerStat (opportunities added once)."""
+    __tablename__ = "xfactor_stat_matches"
+
+    match_id = Column(Integer, ForeignKey("matches.id"), primary_key=True)
+
+
+# ============================================================================
+# MODEL 8: Private mini-leagues (rankings maintained incrementally)
+# ============================================================================
+class League(Base):
+    """An office / family league, joined with its invite code."""
+    __tablename__ = "leagues"
+
+    id = Column(Integer, primary_key=True, index=True, autoincrement=True)
+    name = Column(String(100), nullable=False)
+    invite_code = Column(String(16), unique=True, nullable=False, index=True)
+    owner_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    created_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+
+    members = relationship("LeagueMember", back_populates="league", cascade="all, delete-orphan")
+
+
+class LeagueMember(Base):
+    """
+    Membership + the member's running totals. Scoring pushes each user's
+    points delta to all their memberships (see leagues.push_league_deltas),
+    so a league table is an ordered read of this table.
+    """
+    __tablename__ = "league_members"
+
+    id = Column(Integer, primary_key=True, index=True, autoincrement=True)
+    league_id = Column(Integer, ForeignKey("leagues.id"), nullable=False)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    total_points = Column(Integer, nullable=False, default=0)
+    matches_played = Column(Integer, nullable=False, default=0)
+    joined_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+
+    league = relationship("League", back_populates="members")
+    user = relationship("User")
+
+    __table_args__ = (
+        UniqueConstraint("league_id", "user_id", name="uq_league_members_league_user"),
+        Index("idx_league_members_ranking", "league_id", "total_points"),
+        Index("idx_league_members_user_id", "user_id"),
+    )
+
+
+# ============================================================================
+# MODEL 9: Refresh tokens (stored as SHA-256, rotated on every use)
+# ============================================================================
+class RefreshToken(Base):
+    """
+    One row per issued refresh token. `family_id` links a login's chain of
+    rotated tokens; presenting an already-rotated token revokes the family.
+    """
+    __tablename__ = "refresh_tokens"
+
+    id = Column(Integer, primary_key=True, index=True, autoincrement=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    token_hash = Column(String(64), unique=True, nullable=False, index=True)
+    family_id = Column(String(32), nullable=False)
+    created_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+    expires_at = Column(DateTime, nullable=False)
+    revoked_at = Column(DateTime, nullable=True)
+
+    __table_args__ = (
+        Index("idx_refresh_tokens_family_id", "family_id"),
+        Index("idx_refresh_tokens_revoked_at", "revoked_at"),
+    )
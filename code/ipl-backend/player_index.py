@@ -0,0 +1,119 @@
+"""
+Player identity index.
+
+Maps ICC player ids, player names and aliases to the canonical Player.id so
+result generation and scoring compare ids instead of raw strings.
+"Faf Du Plessis", "faf du plessis" and "Fàf du-Plessis" all resolve to the
+same player. Built once from Player / PlayerAlias and cached in memory.
+"""
+
+import re
+import threading
+import time
+import unicodedata
+from typing import Dict, Optional, Set, Tuple
+
+from database import SessionLocal
+from models import Player, PlayerAlias
+
+
+INDEX_MAX_AGE_SECONDS = 600
+
+_PUNCTUATION = re.compile(r"[.\-'’`]")
+_SPACES = re.compile(r"\s+")
+
+
+def normalize_name(name: str) -> str:
+    """Case-, accent- and punctuation-insensitive form of a name."""
+    if not name:
+        return ""
+    decomposed = unicodedata.normalize("NFKD", name)
+    stripped = "".join(c for c in decomposed if not unicodedata.combining(c))
+    stripped = _PUNCTUATION.sub(" ", stripped)
+    return _SPACES.sub(" ", stripped).strip().casefold()
+
+
+class PlayerIndex:
+
+    def __init__(self, players, aliases):
+        """
+        players: iterable of (id, name, icc_player_id)
+        aliases: iterable of (player_id, alias)
+        """
+        self.names: Dict[int, str] = {}
+        self.by_icc_id: Dict[str, int] = {}
+        self._by_norm: Dict[str, Set[int]] = {}
+
+        for player_id, name, icc_id in players:
+            self.names[player_id] = name
+            if icc_id:
+                self.by_icc_id[str(icc_id)] = player_id
+            self._add(name, player_id)
+
+        for player_id, alias in aliases:
+            self._add(alias, player_id)
+
+        self.built_at = time.monotonic()
+
+    def _add(self, name: str, player_id: int):
+        key = normalize_name(name)
+        if key:
+            self._by_norm.setdefault(key, set()).add(player_id)
+
+    def resolve(self, name: str) -> Optional[int]:
+        """Player.id for a name / alias, or None if unknown or ambiguous."""
+        ids = self._by_norm.get(normalize_name(name))
+        if ids and len(ids) == 1:
+            return next(iter(ids))
+        return None
+
+    def resolve_icc(self, icc_player_id, name: str = None) -> Optional[int]:
+        """Player.id for an ICC player, falling back to the ICC name."""
+        if icc_player_id is not None:
+            player_id = self.by_icc_id.get(str(icc_player_id))
+            if player_id is not None:
+                return player_id
+        return self.resolve(name) if name else None
+
+    def identity(self, name: str) -> Tuple[str, object]:
+        """
+        Hashable identity for comparing names: the Player.id when the name
+        resolves, otherwise the normalized name.
+        """
+        player_id = self.resolve(name)
+        if player_id is not None:
+            return ("id", player_id)
+        return ("name", normalize_name(name))
+
+
+_lock = threading.Lock()
+_index: Optional[PlayerIndex] = None
+
+
+def build_player_index(db) -> PlayerIndex:
+    players = db.query(Player.id, Player.name, Player.icc_player_id).all()
+    aliases = db.query(PlayerAlias.player_id, PlayerAlias.alias).all()
+    return PlayerIndex(players, aliases)
+
+
+def get_player_index() -> PlayerIndex:
+    global _index
+    index = _index
+    if index is not None and time.monotonic() - index.built_at < INDEX_MAX_AGE_SECONDS:
+        return index
+
+    with _lock:
+        if _index is None or time.monotonic() - _index.built_at >= INDEX_MAX_AGE_SECONDS:
+            db = SessionLocal()
+            try:
+                _index = build_player_index(db)
+            finally:
+                db.close()
+        return _index
+
+
+def invalidate_player_index() -> None:
+    """Call after Player / PlayerAlias / icc_player_id changes."""
+    global _index
+    with _lock:
+        _index = None
@@ -0,0 +1,120 @@
+"""
+Per-user performance (points per scored match) for profile / compare screens.
+
+Built for any number of users with one joined, grouped prediction/match
+query (usernames come from user_directory) and cached per user. Scoring and prediction edits
+call invalidate_performance for the users they touch; entries also expire
+after PERFORMANCE_MAX_AGE to pick up scoring done by other processes.
+"""
+
+import threading
+import time
+from typing import Dict, Iterable, List
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from models import Match, Prediction
+from user_directory import user_directory
+
+
+PERFORMANCE_MAX_AGE = 300
+PERFORMANCE_CACHE_SIZE = 4096
+
+_lock = threading.Lock()
+_state = {"version": 1}
+_cache: Dict[int, tuple] = {}  # user_id -> (built_at, performance dict)
+
+
+def invalidate_performance(user_ids: Iterable[int] = None) -> None:
+    """Drop cached performance for these users (all users if None)."""
+    with _lock:
+        _state["version"] += 1
+        if user_ids is None:
+            _cache.clear()
+            return
+        for user_id in user_ids:
+            _cache.pop(user_id, None)
+
+
+def performance_version() -> int:
+    """Bumped on every invalidation, i.e. every scoring run / prediction edit."""
+    return _state["version"]
+
+
+def build_performances(db: Session, user_ids: List[int]) -> Dict[int, dict]:
+    user_directory.ensure(db, user_ids)
+    users = [(user_id, user_directory.get(user_id)) for user_id in user_ids]
+    users = [(user_id, username) for user_id, username in users if username is not None]
+    if not users:
+        return {}
+
+    result = {
+        user_id: {
+            "user_id": user_id,
+            "username": username,
+            "total_points": 0,
+            "matches_played": 0,
+            "matches": [],
+        }
+        for user_id, username in users
+    }
+
+    rows = (
+        db.query(
+            Prediction.user_id,
+            Prediction.match_id,
+            Match.home_team,
+            Match.away_team,
+            func.sum(Prediction.points_earned).label("points"),
+            func.count(Prediction.id).label("predictions"),
+        )
+        .outerjoin(Match, Match.id == Prediction.match_id)
+        .filter(
+            Prediction.user_id.in_(list(result)),
+            Prediction.points_earned.isnot(None),
+        )
+        .group_by(Prediction.user_id, Prediction.match_id, Match.home_team, Match.away_team)
+        .order_by(Prediction.user_id, Prediction.match_id)
+        .all()
+    )
+
+    for user_id, match_id, home_team, away_team, points, predictions in rows:
+        entry = result[user_id]
+        entry["total_points"] += points
+        entry["matches_played"] += predictions
+        entry["matches"].append({
+            "match_id": match_id,
+            "match_label": f"{home_team} vs {away_team}" if home_team else f"Match {match_id}",
+            "points": points,
+        })
+
+    return result
+
+
+def get_performances(db: Session, user_ids: List[int]) -> Dict[int, dict]:
+    """user_id -> performance dict; unknown users are left out."""
+    now = time.monotonic()
+    found = {}
+    missing = []
+
+    for user_id in user_ids:
+        cached = _cache.get(user_id)
+        if cached is not None and now - cached[0] < PERFORMANCE_MAX_AGE:
+            found[user_id] = cached[1]
+        else:
+            missing.append(user_id)
+
+    if missing:
+        version = _state["version"]
+        built = build_performances(db, missing)
+        with _lock:
+            # Skip storing if scoring invalidated anything meanwhile
+            if _state["version"] == version:
+                if len(_cache) + len(built) > PERFORMANCE_CACHE_SIZE:
+                    _cache.clear()
+                for user_id, performance in built.items():
+                    _cache[user_id] = (now, performance)
+        found.update(built)
+
+    return found
@@ -0,0 +1,236 @@
+"""
+In-memory player autocomplete.
+
+Prefix index (every prefix of every name token) for as-you-type matching,
+plus a per-token trigram index that shortlists candidates for fuzzy
+matching of misspellings ("kholi" -> "Kohli"). Names are
+normalized with player_index.normalize_name, so matching is case- and
+accent-insensitive. Squad membership (tournament_id, team_id) is kept per
+player for filtering.
+
+Built from Player + Squad once. Squad / player changes committed in this
+process are applied to the index incrementally (squad_cache.on_squad_change
+reports them); changes only seen through squad_cache's fingerprint (other
+processes) trigger a rebuild, and a full rebuild every FULL_REBUILD_SECONDS
+is kept as a safety net.
+"""
+
+import threading
+import time
+from difflib import SequenceMatcher
+from typing import Dict, List, Optional, Set, Tuple
+
+from sqlalchemy.orm import Session
+
+from models import Player, Squad
+from player_index import normalize_name
+from squad_cache import on_squad_change
+
+
+MAX_PREFIX_LENGTH = 12
+FUZZY_MIN_SHARED_TRIGRAMS = 2
+FUZZY_MIN_SIMILARITY = 0.7
+FULL_REBUILD_SECONDS = 6 * 3600
+
+
+def trigrams(text: str) -> Set[str]:
+    padded = f"  {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class PlayerSearchIndex:
+
+    def __init__(self):
+        self.players: Dict[int, dict] = {}
+        self.norm_names: Dict[int, str] = {}
+        self.memberships: Dict[int, Set[Tuple[int, int]]] = {}
+        self._prefixes: Dict[str, Set[int]] = {}
+        self._trigrams: Dict[str, Set[int]] = {}
+        self.built_at = 0.0
+        # Incremental changes arrive from committing threads while others search
+        self._lock = threading.Lock()
+
+    # ---------- build ----------
+
+    def add_player(self, player_id: int, name: str, role, image_url: Optional[str]):
+        norm = normalize_name(name)
+        self.players[player_id] = {
+            "id": player_id,
+            "name": name,
+            "role": str(role.value if hasattr(role, "value") else role),
+            "image_url": image_url,
+        }
+        self.norm_names[player_id] = norm
+
+        for token in norm.split():
+            for i in range(1, min(len(token), MAX_PREFIX_LENGTH) + 1):
+                self._prefixes.setdefault(token[:i], set()).add(player_id)
+
+        for token in norm.split():
+            for gram in trigrams(token):
+                self._trigrams.setdefault(gram, set()).add(player_id)
+
+    def remove_player(self, player_id: int):
+        norm = self.norm_names.pop(player_id, None)
+        self.players.pop(player_id, None)
+        if norm is None:
+            return
+
+        for token in norm.split():
+            for i in range(1, min(len(token), MAX_PREFIX_LENGTH) + 1):
+                self._discard(self._prefixes, token[:i], player_id)
+            for gram in trigrams(token):
+                self._discard(self._trigrams, gram, player_id)
+
+    @staticmethod
+    def _discard(index: Dict[str, Set[int]], key: str, player_id: int):
+        ids = index.get(key)
+        if ids is not None:
+            ids.discard(player_id)
+            if not ids:
+                del index[key]
+
+    def update_membership(self, player_id: int, membership: Tuple[int, int], delta: int = 1):
+        # Set semantics, so a change already seen by a rebuild is a no-op
+        if delta > 0:
+            self.memberships.setdefault(player_id, set()).add(membership)
+            return
+        memberships = self.memberships.get(player_id)
+        if memberships is not None:
+            memberships.discard(membership)
+            if not memberships:
+                del self.memberships[player_id]
+
+    def load(self, db: Session):
+        for row in db.query(Player.id, Player.name, Player.role, Player.image_url):
+            self.add_player(row.id, row.name, row.role, row.image_url)
+        for player_id, tournament_id, team_id in db.query(
+            Squad.player_id, Squad.tournament_id, Squad.team_id
+        ):
+            self.update_membership(player_id, (tournament_id, team_id))
+
+    def apply_changes(self, changes: dict):
+        """Apply the changes reported by squad_cache for one commit."""
+        with self._lock:
+            for player_id, values in changes["players"].items():
+                self.remove_player(player_id)
+                if values is not None:
+                    self.add_player(player_id, *values)
+            for player_id, membership, delta in changes["memberships"]:
+                self.update_membership(player_id, membership, delta)
+
+    # ---------- query ----------
+
+    def _prefix_matches(self, tokens: List[str]) -> Set[int]:
+        result = None
+        for token in tokens:
+            ids = self._prefixes.get(token[:MAX_PREFIX_LENGTH], set())
+            if len(token) > MAX_PREFIX_LENGTH:
+                ids = {p for p in ids if any(t.startswith(token) for t in self.norm_names[p].split())}
+            result = ids if result is None else result & ids
+            if not result:
+                return set()
+        return result or set()
+
+    def _fuzzy_matches(self, norm: str) -> Dict[int, float]:
+        """player_id -> similarity; every query token must match some name token."""
+        scores: Dict[int, float] = {}
+
+        for n, q_token in enumerate(norm.split()):
+            # Shortlist players sharing a few trigrams with this token
+            counts: Dict[int, int] = {}
+            for gram in trigrams(q_token):
+                for player_id in tuple(self._trigrams.get(gram, ())):
+                    counts[player_id] = counts.get(player_id, 0) + 1
+
+            token_scores = {}
+            for player_id, shared in counts.items():
+                if shared < FUZZY_MIN_SHARED_TRIGRAMS or (n and player_id not in scores):
+                    continue
+                best = max(
+                    SequenceMatcher(None, q_token, name_token[:len(q_token) + 1]).ratio()
+                    for name_token in self.norm_names[player_id].split()
+                )
+                if best >= FUZZY_MIN_SIMILARITY:
+                    token_scores[player_id] = best if not n else min(scores[player_id], best)
+
+            scores = token_scores
+            if not scores:
+                break
+
+        return scores
+
+    def search(self, q: str, tournament_id: int = None, team_id: int = None, limit: int = 10) -> List[dict]:
+        norm = normalize_name(q)
+        if not norm:
+            return []
+
+        with self._lock:
+            return self._search(norm, tournament_id, team_id, limit)
+
+    def _search(self, norm: str, tournament_id: Optional[int], team_id: Optional[int], limit: int) -> List[dict]:
+
+        def allowed(player_id):
+            if tournament_id is None and team_id is None:
+                return True
+            return any(
+                (tournament_id is None or t == tournament_id)
+                and (team_id is None or tm == team_id)
+                for t, tm in self.memberships.get(player_id, ())
+            )
+
+        # Rank: whole-name prefix, then token prefixes, then fuzzy similarity
+        ranked: Dict[int, Tuple[int, float]] = {}
+        for player_id in self._prefix_matches(norm.split()):
+            if allowed(player_id):
+                whole = self.norm_names[player_id].startswith(norm)
+                ranked[player_id] = (0 if whole else 1, 0.0)
+
+        if len(ranked) < limit:
+            for player_id, similarity in self._fuzzy_matches(norm).items():
+                if player_id not in ranked and allowed(player_id):
+                    ranked[player_id] = (2, -similarity)
+
+        best = sorted(ranked, key=lambda p: (*ranked[p], self.norm_names[p]))[:limit]
+
+        return [
+            {
+                **self.players[p],
+                "teams": sorted({tm for t, tm in self.memberships.get(p, ()) if tournament_id is None or t == tournament_id}),
+            }
+            for p in best
+        ]
+
+
+_lock = threading.Lock()
+_state = {"index": None, "stale": False}
+
+
+def _squads_changed(version: int, changes: Optional[dict]):
+    with _lock:
+        index = _state["index"]
+        if index is None:
+            return
+        if changes is None:
+            _state["stale"] = True  # changed elsewhere, details unknown
+        else:
+            index.apply_changes(changes)
+
+
+on_squad_change(_squads_changed)
+
+
+def get_search_index(db: Session) -> PlayerSearchIndex:
+    index = _state["index"]
+    if index is not None and not _state["stale"] and time.monotonic() - index.built_at < FULL_REBUILD_SECONDS:
+        return index
+
+    with _lock:
+        index = _state["index"]
+        if index is None or _state["stale"] or time.monotonic() - index.built_at >= FULL_REBUILD_SECONDS:
+            index = PlayerSearchIndex()
+            index.load(db)
+            index.built_at = time.monotonic()
+            _state["index"] = index
+            _state["stale"] = False
+        return index
@@ -0,0 +1,138 @@
+"""
+Per-client token-bucket rate limiting (load shedding) for the API.
+
+Each client gets a bucket keyed by authenticated user id, falling back to
+client IP. Requests take `cost` tokens by route: ICC-backed and leaderboard
+routes cost more than plain reads. An empty bucket means 429 + Retry-After.
+
+Buckets live in-process and are only touched from the event loop, so no
+locks are needed. Idle buckets are evicted LRU; an evicted bucket would be
+full again anyway.
+"""
+
+import math
+import os
+import re
+import time
+from collections import OrderedDict
+
+from fastapi import HTTPException
+from fastapi.responses import JSONResponse
+from starlette.middleware.base import BaseHTTPMiddleware
+
+from auth.jwt import verify_access_token
+
+
+RATE_LIMIT_ENABLED = os.getenv("RATE_LIMIT_ENABLED", "1") == "1"
+RATE_LIMIT_PER_SEC = float(os.getenv("RATE_LIMIT_PER_SEC", "5"))
+RATE_LIMIT_BURST = int(os.getenv("RATE_LIMIT_BURST", "40"))
+# Behind a proxy client.host is the proxy; trust the first X-Forwarded-For hop
+RATE_LIMIT_TRUST_PROXY = os.getenv("RATE_LIMIT_TRUST_PROXY", "0") == "1"
+
+MAX_BUCKETS = 100_000
+
+EXEMPT_PATHS = {"/health"}
+
+# (route class, pattern, cost) - first match wins, everything else costs 1
+ROUTE_COSTS = [
+    ("icc", re.compile(r"^/matches/\d+/(result|debug)$"), 10),
+    ("auth", re.compile(r"^/auth/(login|register)$"), 5),
+    ("leaderboard", re.compile(r"^/leaderboard/"), 3),
+    ("home", re.compile(r"^/home$"), 2),
+    ("compare", re.compile(r"^/players/(compare|performance)$"), 2),
+]
+
+
+def route_cost(path: str):
+    for route_class, pattern, cost in ROUTE_COSTS:
+        if pattern.match(path):
+            return route_class, cost
+    return "default", 1
+
+
+class RateLimiter:
+
+    def __init__(self, rate: float, capacity: int, max_buckets: int = MAX_BUCKETS):
+        self.rate = rate
+        self.capacity = capacity
+        self.max_buckets = max_buckets
+        self.buckets: "OrderedDict[str, list]" = OrderedDict()  # key -> [tokens, updated]
+        self.allowed = {}
+        self.limited = {}
+
+    def take(self, key: str, cost: float, route_class: str) -> float:
+        """0 if allowed, otherwise seconds until `cost` tokens are available."""
+        now = time.monotonic()
+        bucket = self.buckets.get(key)
+        if bucket is None:
+            bucket = self.buckets[key] = [float(self.capacity), now]
+            if len(self.buckets) > self.max_buckets:
+                self.buckets.popitem(last=False)
+        else:
+            self.buckets.move_to_end(key)
+            bucket[0] = min(self.capacity, bucket[0] + (now - bucket[1]) * self.rate)
+            bucket[1] = now
+
+        if bucket[0] >= cost:
+            bucket[0] -= cost
+            self.allowed[route_class] = self.allowed.get(route_class, 0) + 1
+            return 0.0
+
+        self.limited[route_class] = self.limited.get(route_class, 0) + 1
+        return (cost - bucket[0]) / self.rate
+
+    def stats(self) -> dict:
+        return {
+            "enabled": RATE_LIMIT_ENABLED,
+            "rate_per_sec": self.rate,
+            "burst": self.capacity,
+            "active_buckets": len(self.buckets),
+            "allowed": dict(self.allowed),
+            "limited": dict(self.limited),
+        }
+
+
+limiter = RateLimiter(RATE_LIMIT_PER_SEC, RATE_LIMIT_BURST)
+
+
+def client_key(request) -> str:
+    auth = request.headers.get("authorization", "")
+    if auth[:7].lower() == "bearer ":
+        try:
+            # Cached after the first verification (see auth/jwt.py)
+            return f"user:{verify_access_token(auth[7:].strip())}"
+        except HTTPException:
+            pass  # bad token: the route will 401; limit by IP meanwhile
+
+    if RATE_LIMIT_TRUST_PROXY:
+        forwarded = request.headers.get("x-forwarded-for")
+        if forwarded:
+            return f"ip:{forwarded.split(',')[0].strip()}"
+
+    return f"ip:{request.client.host if request.client else 'unknown'}"
+
+
+class RateLimitMiddleware(BaseHTTPMiddleware):
+
+    async def dispatch(self, request, call_next):
+        if (
+            not RATE_LIMIT_ENABLED
+            or request.method == "OPTIONS"
+            or request.url.path in EXEMPT_PATHS
+        ):
+            return await call_next(request)
+
+        route_class, cost = route_cost(request.url.path)
+        wait = limiter.take(client_key(request), cost, route_class)
+        if wait:
+            return JSONResponse(
+                status_code=429,
+                content={"detail": "Too many requests, slow down"},
+                headers={"Retry-After": str(max(1, math.ceil(wait)))},
+            )
+
+        return await call_next(request)
+
+
+def limiter_stats() -> dict:
+    return limiter.stats()
@@ -1,15 +1,16 @@
 from fastapi import APIRouter, HTTPException, Depends
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
 from pydantic import BaseModel
 from database import get_db
 from models import User
 from auth.jwt import create_access_token, get_current_user_id
-from passlib.context import CryptContext
+from auth.passwords import verify_password
+from auth.user_cache import get_cached_user
+from auth.refresh_tokens import issue_refresh_token, revoke_refresh_token, rotate_refresh_token
 
 router = APIRouter()
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
-
 class LoginRequest(BaseModel):
     username: str
     password: str
@@ -17,22 +18,64 @@ class LoginRequest(BaseModel):
 
 class LoginResponse(BaseModel):
     access_token: str
+    refresh_token: str
     token_type: str = "bearer"
 
 
+class RefreshRequest(BaseModel):
+    refresh_token: str
+
+
 @router.post("/login", response_model=LoginResponse)
-def login(data: LoginRequest, db: Session = Depends(get_db)):
-    # 1. Get the user by username
-    user = db.query(User).filter(User.username == data.username).first()
-    
-    # 2. Verify the password (Hash vs Plain text)
-    # pwd_context.verify(plain_text, hashed_text)
-    if not user or not pwd_context.verify(data.password, user.password):
+async def login(data: LoginRequest, db: Session = Depends(get_db)):
+    # 1. Get the user by username (DB calls stay off the event loop)
+    user = await run_in_threadpool(
+        lambda: db.query(User).filter(User.username == data.username).first()
+    )
+    if not user:
         raise HTTPException(status_code=401, detail="Invalid username or password")
-    
+
+    # 2. Verify the password on the bcrypt process pool (503 when saturated)
+    ok, new_hash = await verify_password(data.password, user.password)
+    if not ok:
+        raise HTTPException(status_code=401, detail="Invalid username or password")
+
+    # Hash made with an old bcrypt cost: store the upgraded one
+    if new_hash:
+        user.password = new_hash
+
+    # Read before the commit: afterwards user.id is expired and would be
+    # reloaded with a blocking SELECT on the event loop
+    user_id = user.id
+
+    # New session: the app refreshes with this instead of logging in again
+    refresh_token = issue_refresh_token(db, user_id)
+    await run_in_threadpool(db.commit)
+
     # 3. Generate Token
-    access_token = create_access_token(user.id)
-    return LoginResponse(access_token=access_token)
+    access_token = create_access_token(user_id)
+    return LoginResponse(access_token=access_token, refresh_token=refresh_token)
+
+
+@router.post("/refresh", response_model=LoginResponse)
+def refresh(data: RefreshRequest, db: Session = Depends(get_db)):
+    # No bcrypt here: the refresh token is checked by its SHA-256 and rotated
+    rotated = rotate_refresh_token(db, data.refresh_token)
+    if rotated is None:
+        raise HTTPException(status_code=401, detail="Invalid or expired refresh token")
+
+    user_id, refresh_token = rotated
+    return LoginResponse(
+        access_token=create_access_token(user_id),
+        refresh_token=refresh_token,
+    )
+
+
+@router.post("/logout")
+def logout(data: RefreshRequest, db: Session = Depends(get_db)):
+    # Ends this login's session (every token rotated from it)
+    revoke_refresh_token(db, data.refresh_token)
+    return {"message": "Logged out"}
 
 
 @router.get("/ping")
@@ -45,9 +88,10 @@ def get_current_user(
     db: Session = Depends(get_db)
 ):
     """
-    Uses the ID from the token to find the actual User in the database.
+    Uses the ID from the token to find the actual User (cached, see
+    auth/user_cache.py).
     """
-    user = db.query(User).filter(User.id == user_id).first()
+    user = get_cached_user(db, user_id)
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
     return user
\ No newline at end of file
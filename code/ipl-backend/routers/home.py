@@ -0,0 +1,74 @@
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.orm import Session, joinedload, selectinload
+from typing import List, Optional
+from pydantic import BaseModel
+
+from database import get_db
+from models import Match, Prediction, User
+from routers.auth import get_current_user
+from routers.leaderboard import get_user_standing
+from routers.matches import MatchResponse, match_to_dict
+from routers.predictions import PredictionResponse
+from routers.users import UserPublic
+
+router = APIRouter(
+    tags=["home"],
+)
+
+HOME_STATUSES = ("live", "upcoming")
+
+
+class UserStanding(BaseModel):
+    rank: Optional[int] = None
+    total_points: int
+    matches_played: int
+
+
+class HomeResponse(BaseModel):
+    profile: UserPublic
+    standing: UserStanding
+    matches: List[MatchResponse]
+    predictions: List[PredictionResponse]  # the caller's, for `matches` only
+
+
+@router.get("", response_model=HomeResponse)
+def get_home(
+    limit: int = Query(10, ge=1, le=50),
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db),
+):
+    """
+    Everything the app needs on launch in one round trip, with a fixed
+    number of queries: user, matches, predictions (+ X-factors), standing.
+    """
+    matches = (
+        db.query(Match)
+        .options(
+            joinedload(Match.home_team_ref),
+            joinedload(Match.away_team_ref),
+        )
+        .filter(Match.status.in_(HOME_STATUSES))
+        .order_by(Match.start_time.asc(), Match.id.asc())
+        .limit(limit)
+        .all()
+    )
+
+    predictions = []
+    if matches:
+        predictions = (
+            db.query(Prediction)
+            .options(selectinload(Prediction.x_factors))
+            .filter(
+                Prediction.user_id == current_user.id,
+                Prediction.match_id.in_([m.id for m in matches]),
+            )
+            .all()
+        )
+
+    return {
+        "profile": current_user,
+        "standing": get_user_standing(db, current_user),
+        # Results (and X-factor hits) only exist once a match is Completed
+        "matches": [match_to_dict(m, []) for m in matches],
+        "predictions": predictions,
+    }
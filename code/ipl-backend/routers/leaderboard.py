@@ -1,9 +1,13 @@
-from fastapi import APIRouter, HTTPException, Depends
+from fastapi import APIRouter, HTTPException, Depends, Query
+from sqlalchemy import func
 from sqlalchemy.orm import Session
 from typing import List, Dict
 
 from models import User, Prediction, Match
 from database import get_db
+from auth.jwt import get_current_user_id
+from leagues import get_membership, league_table
+from user_directory import user_directory
 from pydantic import BaseModel
 
 router = APIRouter(
@@ -34,18 +38,68 @@ class MatchLeaderboardEntry(BaseModel):
         from_attributes = True
 
 
-def build_user_index(db: Session) -> Dict[int, str]:
-    """Helper: map user_id -> username."""
-    users = db.query(User).all()
-    return {u.id: u.username for u in users}
+def username_for(user_id: int) -> str:
+    """Helper: username from the in-memory directory (call ensure first)."""
+    return user_directory.get(user_id) or f"user_{user_id}"
+
+
+def get_user_standing(db: Session, user: User) -> dict:
+    """
+    One user's overall rank / points without building the whole leaderboard.
+    rank is None until the user has a scored prediction.
+
+    Ties are broken in Python with the same key as /overall (points desc,
+    then username.lower()), not in SQL, so the database collation can't
+    make the two disagree.
+    """
+    totals = (
+        db.query(
+            Prediction.user_id.label("user_id"),
+            func.sum(Prediction.points_earned).label("total_points"),
+            func.count(Prediction.id).label("matches_played"),
+        )
+        .filter(Prediction.points_earned.isnot(None))
+        .group_by(Prediction.user_id)
+        .subquery()
+    )
+
+    mine = (
+        db.query(totals.c.total_points, totals.c.matches_played)
+        .filter(totals.c.user_id == user.id)
+        .first()
+    )
+    if mine is None:
+        return {"rank": None, "total_points": 0, "matches_played": 0}
+
+    ahead = (
+        db.query(func.count())
+        .select_from(totals)
+        .filter(totals.c.total_points > mine.total_points)
+        .scalar()
+    )
+
+    tied = [
+        user_id
+        for (user_id,) in db.query(totals.c.user_id).filter(
+            totals.c.total_points == mine.total_points,
+            totals.c.user_id != user.id,
+        )
+    ]
+    user_directory.ensure(db, [user.id, *tied])
+    my_key = username_for(user.id).lower()
+    ahead += sum(1 for user_id in tied if username_for(user_id).lower() < my_key)
+
+    return {
+        "rank": ahead + 1,
+        "total_points": mine.total_points,
+        "matches_played": mine.matches_played,
+    }
 
 
 # ---------- Overall leaderboard ----------
 
 @router.get("/overall", response_model=List[LeaderboardEntry])
 def get_overall_leaderboard(db: Session = Depends(get_db)):
-    user_index = build_user_index(db)
-
     # Get all predictions that have been scored
     predictions = db.query(Prediction).filter(
         Prediction.points_earned.isnot(None)
@@ -59,6 +113,8 @@ def get_overall_leaderboard(db: Session = Depends(get_db)):
         points_per_user[p.user_id] = points_per_user.get(p.user_id, 0) + p.points_earned
         matches_played[p.user_id] = matches_played.get(p.user_id, 0) + 1
 
+    user_directory.ensure(db, points_per_user)
+
     # Convert to list of entries
     entries: List[LeaderboardEntry] = []
     for user_id, total_points in points_per_user.items():
@@ -66,7 +122,7 @@ def get_overall_leaderboard(db: Session = Depends(get_db)):
             LeaderboardEntry(
                 rank=0,  # temporary, set later
                 user_id=user_id,
-                username=user_index.get(user_id, f"user_{user_id}"),
+                username=username_for(user_id),
                 total_points=total_points,
                 matches_played=matches_played.get(user_id, 0),
             )
@@ -88,8 +144,6 @@ def get_overall_leaderboard(db: Session = Depends(get_db)):
 
 @router.get("/match/{match_id}", response_model=List[MatchLeaderboardEntry])
 def get_match_leaderboard(match_id: int, db: Session = Depends(get_db)):
-    user_index = build_user_index(db)
-
     # Check match exists
     match = db.query(Match).filter(Match.id == match_id).first()
     if not match:
@@ -101,13 +155,15 @@ def get_match_leaderboard(match_id: int, db: Session = Depends(get_db)):
         Prediction.points_earned.isnot(None)
     ).all()
 
+    user_directory.ensure(db, [p.user_id for p in relevant])
+
     entries: List[MatchLeaderboardEntry] = []
     for p in relevant:
         entries.append(
             MatchLeaderboardEntry(
                 rank=0,  # set later
                 user_id=p.user_id,
-                username=user_index.get(p.user_id, f"user_{p.user_id}"),
+                username=username_for(p.user_id),
                 match_id=match_id,
                 points_in_match=p.points_earned,
             )
@@ -122,4 +178,22 @@ def get_match_leaderboard(match_id: int, db: Session = Depends(get_db)):
         e.rank = current_rank
         current_rank += 1
 
-    return entries
\ No newline at end of file
+    return entries
+
+
+# ---------- League leaderboard ----------
+
+@router.get("/league/{league_id}", response_model=List[LeaderboardEntry])
+def get_league_leaderboard(
+    league_id: int,
+    offset: int = Query(0, ge=0),
+    limit: int = Query(50, ge=1, le=200),
+    user_id: int = Depends(get_current_user_id),
+    db: Session = Depends(get_db),
+):
+    # Private: members only
+    if not get_membership(db, league_id, user_id):
+        raise HTTPException(status_code=404, detail="League not found")
+
+    # Totals are maintained at scoring time; this is a ranged, indexed read
+    return league_table(db, league_id, offset=offset, limit=limit)
@@ -0,0 +1,97 @@
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy.orm import Session
+from typing import List
+from pydantic import BaseModel, Field
+from datetime import datetime
+
+from auth.jwt import get_current_user_id
+from database import get_db
+from leagues import (
+    MAX_LEAGUES_PER_USER, add_member, create_league, get_membership, league_count,
+)
+from models import League, LeagueMember
+
+router = APIRouter(
+    tags=["leagues"],
+)
+
+
+class LeagueCreate(BaseModel):
+    name: str = Field(..., min_length=1, max_length=100)
+
+
+class LeagueJoin(BaseModel):
+    invite_code: str
+
+
+class LeagueResponse(BaseModel):
+    id: int
+    name: str
+    invite_code: str
+    owner_id: int
+    created_at: datetime
+
+    class Config:
+        from_attributes = True
+
+
+@router.post("", response_model=LeagueResponse)
+def create(
+    data: LeagueCreate,
+    user_id: int = Depends(get_current_user_id),
+    db: Session = Depends(get_db),
+):
+    if league_count(db, user_id) >= MAX_LEAGUES_PER_USER:
+        raise HTTPException(status_code=400, detail=f"You can be in at most {MAX_LEAGUES_PER_USER} leagues")
+
+    return create_league(db, user_id, data.name)
+
+
+@router.post("/join", response_model=LeagueResponse)
+def join(
+    data: LeagueJoin,
+    user_id: int = Depends(get_current_user_id),
+    db: Session = Depends(get_db),
+):
+    league = db.query(League).filter(League.invite_code == data.invite_code).first()
+    if not league:
+        raise HTTPException(status_code=404, detail="League not found")
+
+    if get_membership(db, league.id, user_id):
+        raise HTTPException(status_code=400, detail="Already a member of this league")
+
+    if league_count(db, user_id) >= MAX_LEAGUES_PER_USER:
+        raise HTTPException(status_code=400, detail=f"You can be in at most {MAX_LEAGUES_PER_USER} leagues")
+
+    add_member(db, league, user_id)
+    db.commit()
+    return league
+
+
+@router.get("/mine", response_model=List[LeagueResponse])
+def my_leagues(
+    user_id: int = Depends(get_current_user_id),
+    db: Session = Depends(get_db),
+):
+    return (
+        db.query(League)
+        .join(LeagueMember, LeagueMember.league_id == League.id)
+        .filter(LeagueMember.user_id == user_id)
+        .order_by(League.name)
+        .all()
+    )
+
+
+@router.delete("/{league_id}/members/me")
+def leave(
+    league_id: int,
+    user_id: int = Depends(get_current_user_id),
+    db: Session = Depends(get_db),
+):
+    member = get_membership(db, league_id, user_id)
+    if not member:
+        raise HTTPException(status_code=404, detail="Not a member of this league")
+
+    db.delete(member)
+    db.commit()
+    return {"message": "Left league"}
@@ -1,16 +1,27 @@
-from fastapi import APIRouter, HTTPException, Depends
-from sqlalchemy.orm import Session, joinedload
+from fastapi import APIRouter, HTTPException, Depends, Query, Request, Response
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy import tuple_
+from sqlalchemy.orm import Session, aliased, joinedload
 from typing import List, Optional
 from pydantic import BaseModel, Field
 from datetime import datetime
+import base64
+import json
+from email.utils import format_datetime, parsedate_to_datetime
 from services.result_engine import generate_match_result
-from services.icc_client import fetch_full_match, fetch_match_data
+from services.icc_client import fetch_match_data
 from services.scorecard_aggregator import aggregate_scorecard
 from services.xf_engine import generate_xfs
+from services.single_flight import icc_flight
+from services.icc_guard import IccUnavailable
 from models import Match, Prediction, ActualXFactor, Team
 from database import get_db
 from scoring import apply_scoring_for_match
-from data_loader import get_match_players_grouped
+from squad_cache import get_match_players_payload
+from match_cache import CachedBody, get_cached_body, invalidate_match_cache
+from match_results import write_match_results
+from xfactor_catalog import xfactor_catalog
+from xfactor_stats import get_match_player_stats
 
 router = APIRouter(
     tags=["matches"],
@@ -23,11 +34,13 @@ class MatchCreate(BaseModel):
     away_team: str
     venue: str
     start_time: datetime
+    icc_game_id: Optional[int] = None
 
 
 class XFactorHit(BaseModel):
     xf_id: str
     player_name: str
+    icc_player_id: Optional[str] = None
 
 
 class ActualXFactorResponse(BaseModel):
@@ -57,6 +70,7 @@ class MatchResponse(BaseModel):
     venue: str
     start_time: datetime
     status: str
+    icc_game_id: Optional[int] = None
     actual_toss_winner: Optional[str] = None
     actual_match_winner: Optional[str] = None
     actual_top_wicket_taker: Optional[str] = None
@@ -98,12 +112,14 @@ def admin_create_match(data: MatchCreate, db: Session = Depends(get_db)):
         venue=data.venue,
         start_time=data.start_time,
         status="upcoming",
+        icc_game_id=data.icc_game_id,
     )
 
     db.add(new_match)
     db.commit()
     db.refresh(new_match)  # Get the auto-generated ID
-    
+    invalidate_match_cache()
+
     return new_match
 
 
@@ -118,37 +134,15 @@ def admin_set_match_result(
     if not match:
         raise HTTPException(status_code=404, detail="Match not found")
 
-    # 2. Update result fields
-    match.actual_toss_winner = data.toss_winner
-    match.actual_match_winner = data.match_winner
-    match.actual_top_wicket_taker = data.top_wicket_taker
-    match.actual_top_run_scorer = data.top_run_scorer
-    match.actual_highest_run_scored = data.highest_run_scored
-    match.actual_powerplay_runs = data.powerplay_runs
-    match.actual_total_wickets = data.total_wickets
-
-    # 3. Delete old X-factors (if re-submitting results)
-    db.query(ActualXFactor)\
-        .filter(ActualXFactor.match_id == match_id)\
-        .delete(synchronize_session=False)
-
-    # 4. Store all actual X-factor hits
-    for xf_hit in data.x_factor_hits:
-        actual_xf = ActualXFactor(
-            match_id=match_id,
-            xf_id=xf_hit.xf_id,
-            player_name=xf_hit.player_name
-        )
-        db.add(actual_xf)
-
-    # 5. Mark match as completed
-    match.status = "Completed"
+    # 2. Update result fields, replace X-factor hits, mark as completed
+    write_match_results(db, {match_id: data.model_dump()})
 
-    # 6. Commit all changes to database
+    # 3. Commit all changes to database
     db.commit()
     db.refresh(match)  # Reload match with updated data
+    invalidate_match_cache()
 
-    # 7. Score all predictions for this match
+    # 4. Score all predictions for this match
     predictions_for_match = db.query(Prediction).filter(
         Prediction.match_id == match_id
     ).all()
@@ -158,136 +152,280 @@ def admin_set_match_result(
     return match
 
 
-# -------- User endpoints --------
+def match_to_dict(m: Match, actual_x_factors) -> dict:
+    return {
+        "id": m.id,
+        "home_team": m.home_team,
+        "away_team": m.away_team,
+        "venue": m.venue,
+        "start_time": m.start_time,
+        "status": m.status,
+        "icc_game_id": m.icc_game_id,
+
+        "home_team_short_name": m.home_team_ref.short_name if m.home_team_ref else None,
+        "home_team_logo_url": m.home_team_ref.logo_url if m.home_team_ref else None,
+        "away_team_short_name": m.away_team_ref.short_name if m.away_team_ref else None,
+        "away_team_logo_url": m.away_team_ref.logo_url if m.away_team_ref else None,
+
+        "actual_toss_winner": m.actual_toss_winner,
+        "actual_match_winner": m.actual_match_winner,
+        "actual_top_wicket_taker": m.actual_top_wicket_taker,
+        "actual_top_run_scorer": m.actual_top_run_scorer,
+        "actual_highest_run_scored": m.actual_highest_run_scored,
+        "actual_powerplay_runs": m.actual_powerplay_runs,
+        "actual_total_wickets": m.actual_total_wickets,
+        "actual_x_factors": actual_x_factors,
+    }
+
+
+def serialize_match(data: dict) -> bytes:
+    return MatchResponse.model_validate(data).model_dump_json().encode()
 
-@router.get("/list", response_model=List[MatchResponse])
-def list_matches(status: Optional[str] = None, db: Session = Depends(get_db)):
-    query = db.query(Match).options(
-        joinedload(Match.home_team_ref),
-        joinedload(Match.away_team_ref),
-    )
+
+def cached_response(request: Request, cached: CachedBody) -> Response:
+    """200 with the cached body, or 304 if the client's copy is current."""
+    headers = {
+        "ETag": cached.etag,
+        "Last-Modified": format_datetime(cached.last_modified, usegmt=True),
+        "Cache-Control": "no-cache",
+    }
+
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        # ETag wins over If-Modified-Since when both are sent
+        if cached.etag in [tag.strip() for tag in if_none_match.split(",")]:
+            return Response(status_code=304, headers=headers)
+    elif request.headers.get("if-modified-since"):
+        try:
+            since = parsedate_to_datetime(request.headers["if-modified-since"])
+        except (TypeError, ValueError):
+            since = None
+        if since is not None and since.tzinfo is not None and cached.last_modified <= since:
+            return Response(status_code=304, headers=headers)
+
+    return Response(content=cached.body, media_type="application/json", headers=headers)
+
+
+# -------- Match list: keyset pagination + field projection --------
+
+LIST_DEFAULT_LIMIT = 20
+LIST_MAX_LIMIT = 100
+
+# Serialization order of every field a list item can have
+LIST_FIELDS = tuple(MatchResponse.model_fields)
+
+TEAM_FIELDS = {
+    "home_team_short_name": ("home", "short_name"),
+    "home_team_logo_url": ("home", "logo_url"),
+    "away_team_short_name": ("away", "short_name"),
+    "away_team_logo_url": ("away", "logo_url"),
+}
+
+
+def parse_fields(fields: Optional[str]) -> tuple:
+    """fields=a,b,c -> validated tuple in serialization order (id always included)."""
+    if not fields:
+        return LIST_FIELDS
+
+    requested = {f.strip() for f in fields.split(",") if f.strip()}
+    unknown = requested - set(LIST_FIELDS)
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(sorted(unknown))}")
+
+    requested.add("id")
+    return tuple(f for f in LIST_FIELDS if f in requested)
+
+
+def encode_cursor(start_time: datetime, match_id: int) -> str:
+    raw = f"{start_time.isoformat()}|{match_id}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        start_time, match_id = raw.split("|")
+        return datetime.fromisoformat(start_time), int(match_id)
+    except (ValueError, UnicodeDecodeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def build_match_list(
+    db: Session,
+    status: Optional[str],
+    fields: tuple,
+    after: Optional[tuple],
+    limit: Optional[int],
+) -> bytes:
+    """
+    Selects only the columns behind `fields`; teams are joined and X-factor
+    hits loaded only when one of their fields is asked for.
+    With a limit the payload is {"items": [...], "next_cursor": ...},
+    otherwise the plain list.
+    """
+    home, away = aliased(Team), aliased(Team)
+    teams = {"home": home, "away": away}
+
+    columns = [Match.id, Match.start_time]
+    for field in fields:
+        if field in TEAM_FIELDS:
+            side, attr = TEAM_FIELDS[field]
+            columns.append(getattr(teams[side], attr).label(field))
+        elif field not in ("id", "start_time", "actual_x_factors"):
+            columns.append(getattr(Match, field))
+
+    query = db.query(*columns)
+    if any(TEAM_FIELDS[f][0] == "home" for f in fields if f in TEAM_FIELDS):
+        query = query.outerjoin(home, home.id == Match.home_team_id)
+    if any(TEAM_FIELDS[f][0] == "away" for f in fields if f in TEAM_FIELDS):
+        query = query.outerjoin(away, away.id == Match.away_team_id)
 
     if status:
         query = query.filter(Match.status == status)
 
-        if status == "Completed":
-            query = query.order_by(Match.start_time.desc())
-        else:
-            # upcoming / live
-            query = query.order_by(Match.start_time.asc())
+    # Completed: latest first; upcoming / live / no filter: soonest first
+    descending = status == "Completed"
+    key = tuple_(Match.start_time, Match.id)
 
-    else:
-        # Default behavior when no status filter provided
-        query = query.order_by(Match.start_time.asc())
+    if after is not None:
+        query = query.filter(key < after if descending else key > after)
 
-    matches = query.all()
+    if descending:
+        query = query.order_by(Match.start_time.desc(), Match.id.desc())
+    else:
+        query = query.order_by(Match.start_time.asc(), Match.id.asc())
 
-    if not matches:
-        return []
+    if limit is not None:
+        query = query.limit(limit + 1)
 
-    match_ids = [m.id for m in matches]
+    rows = query.all()
 
-    actual_xfs = (
-        db.query(ActualXFactor)
-        .filter(ActualXFactor.match_id.in_(match_ids))
-        .all()
-    )
+    next_cursor = None
+    if limit is not None and len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1].start_time, rows[-1].id)
 
     xfs_by_match = {}
+    if "actual_x_factors" in fields and rows:
+        for match_id, xf_id, player_name in (
+            db.query(ActualXFactor.match_id, ActualXFactor.xf_id, ActualXFactor.player_name)
+            .filter(ActualXFactor.match_id.in_([row.id for row in rows]))
+        ):
+            xfs_by_match.setdefault(match_id, []).append({"xf_id": xf_id, "player_name": player_name})
 
-    for xf in actual_xfs:
-        xfs_by_match.setdefault(xf.match_id, []).append(xf)
+    items = []
+    for row in rows:
+        values = row._mapping
+        items.append({
+            field: xfs_by_match.get(row.id, []) if field == "actual_x_factors" else values[field]
+            for field in fields
+        })
 
-    return [
-        {
-            "id": m.id,
-            "home_team": m.home_team,
-            "away_team": m.away_team,
-            "venue": m.venue,
-            "start_time": m.start_time,
-            "status": m.status,
+    payload = items if limit is None else {"items": items, "next_cursor": next_cursor}
+    return json.dumps(jsonable_encoder(payload), separators=(",", ":")).encode()
 
-            "home_team_short_name": m.home_team_ref.short_name if m.home_team_ref else None,
-            "home_team_logo_url": m.home_team_ref.logo_url if m.home_team_ref else None,
-            "away_team_short_name": m.away_team_ref.short_name if m.away_team_ref else None,
-            "away_team_logo_url": m.away_team_ref.logo_url if m.away_team_ref else None,
-
-            "actual_toss_winner": m.actual_toss_winner,
-            "actual_match_winner": m.actual_match_winner,
-            "actual_top_wicket_taker": m.actual_top_wicket_taker,
-            "actual_top_run_scorer": m.actual_top_run_scorer,
-            "actual_highest_run_scored": m.actual_highest_run_scored,
-            "actual_powerplay_runs": m.actual_powerplay_runs,
-            "actual_total_wickets": m.actual_total_wickets,
-            "actual_x_factors": xfs_by_match.get(m.id, []),
-        }
-        for m in matches
-    ]
 
+# -------- User endpoints --------
 
+@router.get("/list")
+def list_matches(
+    request: Request,
+    status: Optional[str] = None,
+    fields: Optional[str] = None,
+    cursor: Optional[str] = None,
+    limit: Optional[int] = Query(None, ge=1, le=LIST_MAX_LIMIT),
+    db: Session = Depends(get_db),
+):
+    """
+    fields=home_team,away_team,... narrows the payload (and the SELECT).
+    limit / cursor page through matches by start_time; pass the returned
+    next_cursor to get the following page.
+    """
+    projected = parse_fields(fields)
+    after = decode_cursor(cursor) if cursor else None
+    if after is not None and limit is None:
+        limit = LIST_DEFAULT_LIMIT
+
+    cached = get_cached_body(
+        ("list", status, projected, cursor, limit),
+        lambda: build_match_list(db, status, projected, after, limit),
+    )
+    return cached_response(request, cached)
 
 
 @router.get("/{match_id}", response_model=MatchResponse)
-def get_match(match_id: int, db: Session = Depends(get_db)):
-    match = db.query(Match).options(
-        joinedload(Match.home_team_ref),
-        joinedload(Match.away_team_ref),
-        joinedload(Match.actual_x_factors),
-    ).filter(Match.id == match_id).first()
-    if not match:
+def get_match(match_id: int, request: Request, db: Session = Depends(get_db)):
+    def build():
+        match = db.query(Match).options(
+            joinedload(Match.home_team_ref),
+            joinedload(Match.away_team_ref),
+            joinedload(Match.actual_x_factors),
+        ).filter(Match.id == match_id).first()
+        if not match:
+            return None
+        return serialize_match(match_to_dict(match, match.actual_x_factors))
+
+    cached = get_cached_body(("detail", match_id), build)
+    if cached is None:
         raise HTTPException(status_code=404, detail="Match not found")
 
-    return {
-        "id": match.id,
-        "home_team": match.home_team,
-        "away_team": match.away_team,
-        "venue": match.venue,
-        "start_time": match.start_time,
-        "status": match.status,
-
-        "home_team_short_name": match.home_team_ref.short_name if match.home_team_ref else None,
-        "home_team_logo_url": match.home_team_ref.logo_url if match.home_team_ref else None,
-        "away_team_short_name": match.away_team_ref.short_name if match.away_team_ref else None,
-        "away_team_logo_url": match.away_team_ref.logo_url if match.away_team_ref else None,
-
-        "actual_toss_winner": match.actual_toss_winner,
-        "actual_match_winner": match.actual_match_winner,
-        "actual_top_wicket_taker": match.actual_top_wicket_taker,
-        "actual_top_run_scorer": match.actual_top_run_scorer,
-        "actual_highest_run_scored": match.actual_highest_run_scored,
-        "actual_powerplay_runs": match.actual_powerplay_runs,
-        "actual_total_wickets": match.actual_total_wickets,
-        "actual_x_factors": match.actual_x_factors,
-    }
+    return cached_response(request, cached)
 
 
 @router.get("/{match_id}/players", response_model=List[dict]) 
-def get_match_players(match_id: int, db: Session = Depends(get_db)):
-    # We pass the DB session directly to the loader now
-    players_sections = get_match_players_grouped(db, match_id)
-    
-    if not players_sections:
-        # Fallback for old V1 matches or errors (return empty list)
-        return []
-        
-    return players_sections
+def get_match_players(match_id: int, request: Request, db: Session = Depends(get_db)):
+    # Pre-serialized sections, cached per squad version (old V1 matches -> [])
+    body, etag = get_match_players_payload(db, match_id)
+
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers=headers)
+
+    return Response(content=body, media_type="application/json", headers=headers)
+
+
+@router.get("/{match_id}/players/xfactor-stats")
+def get_match_players_xfactor_stats(match_id: int, db: Session = Depends(get_db)):
+    """Historical X-factor hit rates for every player in the match squads."""
+    match = db.query(Match).filter(Match.id == match_id).first()
+    if not match:
+        raise HTTPException(status_code=404, detail="Match not found")
+
+    return get_match_player_stats(db, match)
 
 
 @router.get("/{game_id}/result")
 async def get_result(game_id: int):
-    return await generate_match_result(game_id)
+    # Concurrent callers share one upstream ICC fetch
+    try:
+        return await icc_flight.do(
+            ("result", game_id),
+            lambda: generate_match_result(game_id, xfactor_catalog.get().rules),
+        )
+    except IccUnavailable as e:
+        raise HTTPException(status_code=503, detail=str(e))
 
 
-@router.get("/{game_id}/debug")
-async def debug_match(game_id: int):
+async def build_debug_payload(game_id: int):
     scorecard = await fetch_match_data(game_id)
 
     stats = aggregate_scorecard(scorecard)
 
-    scorecard_xfs = generate_xfs(stats)
+    scorecard_xfs = generate_xfs(stats, xfactor_catalog.get().rules)
 
     return {
         "scorecard": scorecard, 
         "aggregate": stats,
         "scorecard_xfs": scorecard_xfs
-    }
\ No newline at end of file
+    }
+
+
+@router.get("/{game_id}/debug")
+async def debug_match(game_id: int):
+    try:
+        return await icc_flight.do(
+            ("debug", game_id),
+            lambda: build_debug_payload(game_id),
+        )
+    except IccUnavailable as e:
+        raise HTTPException(status_code=503, detail=str(e))
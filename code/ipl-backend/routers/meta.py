@@ -1,8 +1,42 @@
 from fastapi import APIRouter
 from scoring import SCORING_META
+from services.icc_guard import icc_stats
+from auth.passwords import hasher_stats
+from rate_limit import limiter_stats
+from user_directory import user_directory
+from database import pool_stats
 
 router = APIRouter()
 
 @router.get("/scoring")
 def get_scoring_meta():
     return SCORING_META
+
+
+@router.get("/icc")
+def get_icc_status():
+    # Upstream protection state (breaker, concurrency, counters) for monitoring
+    return icc_stats()
+
+
+@router.get("/auth")
+def get_auth_status():
+    # bcrypt pool load (pending vs. the shedding limit)
+    return hasher_stats()
+
+
+@router.get("/rate-limit")
+def get_rate_limit_status():
+    # Per-route-class allowed / limited counters
+    return limiter_stats()
+
+
+@router.get("/users")
+def get_user_directory_status():
+    return user_directory.stats()
+
+
+@router.get("/db")
+def get_db_pool_status():
+    # Connection pool usage (size / checked out / overflow)
+    return pool_stats()
@@ -1,16 +1,27 @@
-from fastapi import APIRouter, HTTPException, Depends
+from fastapi import APIRouter, HTTPException, Depends, Query
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional
 from pydantic import BaseModel
+from datetime import datetime
 
-from models import User, Prediction, Match
 from database import get_db
+from head_to_head import get_head_to_head
+from player_performance import get_performances
+from player_search import get_search_index
 
+# Mounted at /players: /players/search, /players/compare, /players/performance
 router = APIRouter(
+    tags=["players"],
+)
+
+# Older per-user route, kept at its original /players/players/... path
+legacy_router = APIRouter(
     prefix="/players",
     tags=["players"],
 )
 
+MAX_PERFORMANCE_USERS = 20
+
 
 # Pydantic models for responses
 class PlayerMatchPerformance(BaseModel):
@@ -22,6 +33,50 @@ class PlayerMatchPerformance(BaseModel):
         from_attributes = True
 
 
+class PlayerSearchResult(BaseModel):
+    id: int
+    name: str
+    role: str
+    image_url: Optional[str] = None
+    teams: List[int]
+
+
+class HeadToHeadSide(BaseModel):
+    points: int
+    correct: List[str]  # categories that scored, e.g. "match_winner"
+    x_factors_correct: int
+    x_factors_total: int
+
+
+class HeadToHeadTally(BaseModel):
+    a_wins: int
+    b_wins: int
+    ties: int
+
+
+class HeadToHeadMatch(BaseModel):
+    match_id: int
+    match_label: str
+    start_time: datetime
+    a: HeadToHeadSide
+    b: HeadToHeadSide
+    winner: Optional[str] = None  # "a", "b" or None for a tie
+    tally: HeadToHeadTally        # running, after this match
+
+
+class HeadToHeadUser(BaseModel):
+    user_id: int
+    username: str
+    total_points: int
+
+
+class HeadToHead(BaseModel):
+    a: HeadToHeadUser
+    b: HeadToHeadUser
+    tally: HeadToHeadTally
+    matches: List[HeadToHeadMatch]
+
+
 class PlayerPerformance(BaseModel):
     user_id: int
     username: str
@@ -33,53 +88,54 @@ class PlayerPerformance(BaseModel):
         from_attributes = True
 
 
-def build_match_label(match_id: int, db: Session) -> str:
-    """Helper to build match label from database."""
-    match = db.query(Match).filter(Match.id == match_id).first()
-    if not match:
-        return f"Match {match_id}"
-    return f"{match.home_team} vs {match.away_team}"
+@router.get("/search", response_model=List[PlayerSearchResult])
+def search_players(
+    q: str = Query(..., min_length=1),
+    tournament_id: Optional[int] = None,
+    team_id: Optional[int] = None,
+    limit: int = Query(10, ge=1, le=50),
+    db: Session = Depends(get_db),
+):
+    """Squad-aware autocomplete over cricket players (in-memory index)."""
+    index = get_search_index(db)
+    return index.search(q, tournament_id=tournament_id, team_id=team_id, limit=limit)
+
+
+@router.get("/compare", response_model=HeadToHead)
+def compare_players(a: int, b: int, db: Session = Depends(get_db)):
+    """Head-to-head over the matches both users have scored predictions for."""
+    if a == b:
+        raise HTTPException(status_code=400, detail="Pick two different users")
+
+    result = get_head_to_head(db, a, b)
+    if result is None:
+        raise HTTPException(status_code=404, detail="User not found")
+
+    return result
+
+
+@router.get("/performance", response_model=List[PlayerPerformance])
+def get_players_performance(
+    user_ids: str = Query(..., description="Comma-separated user ids"),
+    db: Session = Depends(get_db),
+):
+    """Batch variant for the compare screen; unknown users are left out."""
+    try:
+        ids = list(dict.fromkeys(int(i) for i in user_ids.split(",") if i.strip()))
+    except ValueError:
+        raise HTTPException(status_code=400, detail="user_ids must be comma-separated integers")
+
+    if not ids or len(ids) > MAX_PERFORMANCE_USERS:
+        raise HTTPException(status_code=400, detail=f"Pass 1 to {MAX_PERFORMANCE_USERS} user ids")
+
+    performances = get_performances(db, ids)
+    return [performances[i] for i in ids if i in performances]
 
 
-@router.get("/{user_id}/performance", response_model=PlayerPerformance)
+@legacy_router.get("/{user_id}/performance", response_model=PlayerPerformance)
 def get_player_performance(user_id: int, db: Session = Depends(get_db)):
-    # Find user
-    user = db.query(User).filter(User.id == user_id).first()
-    if not user:
+    performance = get_performances(db, [user_id]).get(user_id)
+    if not performance:
         raise HTTPException(status_code=404, detail="User not found")
 
-    # All predictions for this user that have been scored
-    user_predictions = db.query(Prediction).filter(
-        Prediction.user_id == user_id,
-        Prediction.points_earned.isnot(None)
-    ).all()
-
-    total_points = sum(p.points_earned for p in user_predictions)
-    matches_played = len(user_predictions)
-
-    # Build per-match breakdown
-    from collections import defaultdict
-    match_points = defaultdict(int)
-    for p in user_predictions:
-        match_points[p.match_id] += p.points_earned
-
-    matches_performance: List[PlayerMatchPerformance] = []
-    for match_id, pts in match_points.items():
-        matches_performance.append(
-            PlayerMatchPerformance(
-                match_id=match_id,
-                match_label=build_match_label(match_id, db),
-                points=pts,
-            )
-        )
-
-    # Sort by match_id
-    matches_performance.sort(key=lambda m: m.match_id)
-
-    return PlayerPerformance(
-        user_id=user.id,
-        username=user.username,
-        total_points=total_points,
-        matches_played=matches_played,
-        matches=matches_performance,
-    )
\ No newline at end of file
+    return performance
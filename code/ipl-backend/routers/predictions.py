@@ -7,6 +7,8 @@ from auth.jwt import get_current_user_id
 
 from models import Prediction, PredictedXFactor, Match
 from database import get_db
+from player_performance import invalidate_performance
+from leagues import push_league_deltas
 
 router = APIRouter(
     tags=["predictions"],
@@ -195,6 +197,8 @@ def update_prediction(
     prediction.total_wickets = data.total_wickets
 
     # Reset points (will be recalculated later)
+    if prediction.points_earned is not None:
+        push_league_deltas(db, {user_id_local: (-prediction.points_earned, -1)})
     prediction.points_earned = None
 
     # 5. Delete old X-Factor predictions
@@ -215,5 +219,6 @@ def update_prediction(
     # 7. Commit changes
     db.commit()
     db.refresh(prediction)
+    invalidate_performance([user_id_local])
 
     return prediction
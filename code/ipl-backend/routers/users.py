@@ -1,10 +1,13 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy import func, tuple_
 from sqlalchemy.orm import Session
 from typing import List, Optional
 from pydantic import BaseModel
+import base64
 from routers.auth import get_current_user
 from models import User
 from database import get_db
+from user_directory import user_directory
 
 router = APIRouter(
     tags=["users"],
@@ -33,10 +36,74 @@ class UserPublic(BaseModel):
         from_attributes = True
 
 
-@router.get("", response_model=List[UserPublic])
-def list_users(db: Session = Depends(get_db)):
-    users = db.query(User).all()
-    return users
+USERS_DEFAULT_LIMIT = 20
+USERS_MAX_LIMIT = 100
+
+
+class UserPage(BaseModel):
+    items: List[UserPublic]
+    next_cursor: Optional[str] = None
+
+
+def encode_user_cursor(username_lower: str, user_id: int) -> str:
+    raw = f"{user_id}|{username_lower}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_user_cursor(cursor: str) -> tuple:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        user_id, username_lower = raw.split("|", 1)
+        return username_lower, int(user_id)
+    except (ValueError, UnicodeDecodeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def escape_like(text: str) -> str:
+    return text.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+@router.get("", response_model=List[UserPublic] | UserPage)
+def list_users(
+    prefix: Optional[str] = Query(None, min_length=1, max_length=50),
+    cursor: Optional[str] = None,
+    limit: Optional[int] = Query(None, ge=1, le=USERS_MAX_LIMIT),
+    db: Session = Depends(get_db),
+):
+    """
+    prefix= is a case-insensitive username search (idx_users_username_lower).
+    With prefix / cursor / limit the result is a page ordered by username:
+    {"items": [...], "next_cursor": ...}; pass next_cursor for the next one.
+    Without any of them, the plain full list as before.
+    """
+    # Only the UserPublic columns
+    query = db.query(User.id, User.username, User.role)
+
+    if prefix is None and cursor is None and limit is None:
+        return [row._asdict() for row in query.order_by(User.id).all()]
+
+    limit = limit or USERS_DEFAULT_LIMIT
+    username_lower = func.lower(User.username)
+    query = query.add_columns(username_lower.label("username_lower"))
+
+    if prefix:
+        query = query.filter(username_lower.like(escape_like(prefix.lower()) + "%", escape="\\"))
+
+    if cursor:
+        query = query.filter(tuple_(username_lower, User.id) > decode_user_cursor(cursor))
+
+    rows = query.order_by(username_lower, User.id).limit(limit + 1).all()
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        # Cursor from the DB's lower(), so it compares like the index
+        next_cursor = encode_user_cursor(rows[-1].username_lower, rows[-1].id)
+
+    return {
+        "items": [{"id": row.id, "username": row.username, "role": row.role} for row in rows],
+        "next_cursor": next_cursor,
+    }
 
 
 @router.post("", response_model=UserPublic)
@@ -61,7 +128,8 @@ def create_user(user: UserCreate, db: Session = Depends(get_db)):
     db.add(new_user)
     db.commit()
     db.refresh(new_user)  # Get the auto-generated ID
-    
+    user_directory.add(new_user.id, new_user.username)
+
     return new_user
 
 @router.get("/me", response_model=UserPublic)
@@ -1,34 +1,128 @@
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
 from sqlalchemy.orm import Session
+from typing import Optional
+from pydantic import BaseModel
 from database import get_db
 from models import XFactorDef
+from xfactor_catalog import xfactor_catalog, RISK_LEVELS
+from xfactor_stats import get_player_stats
+from player_index import get_player_index
+from services.xf_engine import SCOPE_STATS, COMMENTARY_STATS, COMPARATORS
 
 router = APIRouter()
 
-@router.get("/xfactors")
-def get_xfactors(db: Session = Depends(get_db)):
-    rows = (
-        db.query(XFactorDef)
-        .filter(XFactorDef.status == True)
-        .all()
-    )
+# Short max-age: edits reach every worker within CATALOG_CHECK_SECONDS, and
+# revalidating with the ETag is a cheap 304
+CATALOG_CACHE_CONTROL = "public, max-age=60, must-revalidate"
+
+
+class XFactorDefUpdate(BaseModel):
+    risk: str
+    category: str
+    description: str
+    status: bool = True
+    result_description: Optional[str] = None
+    scope: Optional[str] = None
+    stat: Optional[str] = None
+    comparator: Optional[str] = None
+    threshold: Optional[float] = None
+    min_balls: Optional[int] = 0
+
+
+def definition_error(data: XFactorDefUpdate) -> Optional[str]:
+    """Why the definition can't be stored, or None if it's valid."""
+    if data.risk not in RISK_LEVELS:
+        return f"risk must be one of {', '.join(RISK_LEVELS)}"
+
+    if data.scope is None:
+        if data.stat is not None or data.comparator is not None or data.threshold is not None:
+            return "stat, comparator and threshold need a scope"
+        return None
 
-    result = {"LOW": [], "MEDIUM": [], "HIGH": []}
+    if data.scope == "commentary":
+        stats, comparators = COMMENTARY_STATS, (">=",)
+    elif data.scope in SCOPE_STATS:
+        stats, comparators = SCOPE_STATS[data.scope], tuple(COMPARATORS)
+    else:
+        return f"scope must be one of {', '.join([*SCOPE_STATS, 'commentary'])}"
 
-    for r in rows:
-        result[r.risk].append({
-            "id": r.id,
-            "category": r.category,
-            "description": r.description,
-        })
+    if data.stat not in stats:
+        return f"stat for scope {data.scope} must be one of {', '.join(sorted(stats))}"
+    if data.comparator not in comparators:
+        return f"comparator for scope {data.scope} must be one of {', '.join(comparators)}"
+    if data.threshold is None:
+        return "threshold is required with a scope"
+    if data.min_balls is not None and data.min_balls < 0:
+        return "min_balls can't be negative"
+    return None
 
-    return result
+
+def catalog_response(request: Request, body: bytes, snapshot) -> Response:
+    etag = snapshot.etag
+    headers = {
+        "ETag": etag,
+        "Cache-Control": CATALOG_CACHE_CONTROL,
+        # Content hash, the same on every worker
+        "X-Catalog-Version": snapshot.content_version,
+    }
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
+
+
+@router.get("/xfactors")
+def get_xfactors(request: Request):
+    snapshot = xfactor_catalog.get()
+    return catalog_response(request, snapshot.xfactors_json, snapshot)
 
 
 @router.get("/")
-def list_xfactors(db: Session = Depends(get_db)):
-    return (
-        db.query(XFactorDef)
-        .filter(XFactorDef.status == True)
-        .all()
-    )
\ No newline at end of file
+def list_xfactors(request: Request):
+    snapshot = xfactor_catalog.get()
+    return catalog_response(request, snapshot.list_json, snapshot)
+
+
+@router.get("/stats")
+def get_xfactor_stats(
+    player: Optional[str] = None,
+    xf_id: Optional[str] = None,
+    db: Session = Depends(get_db),
+):
+    """Historical hit rates; `player` is a Player id or name."""
+    if not player and not xf_id:
+        raise HTTPException(status_code=400, detail="Pass player and/or xf_id")
+
+    player_id = None
+    if player:
+        player_id = int(player) if player.isdigit() else get_player_index().resolve(player)
+        if player_id is None:
+            raise HTTPException(status_code=404, detail="Player not found")
+
+    return get_player_stats(db, player_id=player_id, xf_id=xf_id)
+
+
+@router.get("/version")
+def get_catalog_version():
+    return {"version": xfactor_catalog.get().content_version}
+
+
+# -------- Admin endpoints --------
+
+@router.put("/admin/{xf_id}")
+def admin_upsert_xfactor(xf_id: str, data: XFactorDefUpdate, db: Session = Depends(get_db)):
+    error = definition_error(data)
+    if error:
+        raise HTTPException(status_code=422, detail=error)
+
+    row = db.query(XFactorDef).filter(XFactorDef.id == xf_id).first()
+    if not row:
+        row = XFactorDef(id=xf_id)
+        db.add(row)
+
+    for field, value in data.model_dump().items():
+        setattr(row, field, value)
+
+    db.commit()
+
+    xfactor_catalog.invalidate()
+    return {"id": xf_id, "version": xfactor_catalog.get().content_version}
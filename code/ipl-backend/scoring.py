@@ -1,7 +1,10 @@
-from typing import List
-from sqlalchemy.orm import Session
+from typing import Dict, List, Optional, Set, Tuple
+from sqlalchemy.orm import Session, selectinload
 from models import Match, Prediction, ActualXFactor
-from xfactor_master import XFACTOR_DEFS
+from xfactor_catalog import xfactor_catalog
+from player_index import PlayerIndex, get_player_index
+from player_performance import invalidate_performance
+from leagues import points_deltas, push_league_deltas
 
 
 # ---- Scoring constants (fill/adjust to match your PRD) ----
@@ -36,56 +39,66 @@ SCORING_META = {
 }
 
 
+def actual_xfactor_keys(
+    actual_xfactors: List[ActualXFactor],
+    index: PlayerIndex
+) -> Set[Tuple[str, tuple]]:
+    """
+    (xf_id, player identity) for every X-factor that happened, so each
+    predicted X-factor is checked with one set lookup.
+    """
+    return {
+        (
+            xf.xf_id,
+            ("id", xf.player_id) if xf.player_id is not None else index.identity(xf.player_name),
+        )
+        for xf in actual_xfactors
+    }
+
+
 def did_xfactor_happen(
     xf_id: str, 
     player_name: str, 
-    actual_xfactors: List[ActualXFactor]
+    actual_keys: Set[Tuple[str, tuple]],
+    index: PlayerIndex
 ) -> bool:
     """
     Check if a specific X-factor happened in the match.
-    Now uses ActualXFactor objects from database instead of MatchXFactorHit.
+    Names are compared by player identity (case/accents/aliases ignored).
     """
-    for actual_xf in actual_xfactors:
-        if actual_xf.xf_id == xf_id and actual_xf.player_name == player_name:
-            return True
-    return False
+    return (xf_id, index.identity(player_name)) in actual_keys
 
 
-def score_prediction_for_match(
-    prediction: Prediction, 
-    match: Match,
-    actual_xfactors: List[ActualXFactor]
-) -> int:
+def category_points(prediction, match: Match, index: PlayerIndex) -> Dict[str, int]:
     """
-    Calculate points for a single prediction based on match results.
-    Handles ties: If multiple players are top scorers/wicket-takers,
-    user gets points if they predicted ANY of them.
+    Points per non-X-factor category that scored (missing = 0 points).
+    `prediction` only needs the predicted value attributes.
     """
-    points = 0
+    points = {}
 
     # ---- Basic categorical predictions ----
 
     # Toss winner (single value, no ties)
     if match.actual_toss_winner and prediction.toss_winner == match.actual_toss_winner:
-        points += POINTS_TOSS_WINNER_CORRECT
+        points["toss_winner"] = POINTS_TOSS_WINNER_CORRECT
 
     # Match winner (single value, no ties)
     if match.actual_match_winner and prediction.match_winner == match.actual_match_winner:
-        points += POINTS_MATCH_WINNER_CORRECT
+        points["match_winner"] = POINTS_MATCH_WINNER_CORRECT
 
     # Top wicket taker (handles ties - comma-separated list)
     # Example: "Josh Hazlewood, Mohammed Siraj" means both took same wickets
-    if match.actual_top_wicket_taker:
-        actual_wicket_takers = [name.strip() for name in match.actual_top_wicket_taker.split(',')]
-        if prediction.top_wicket_taker in actual_wicket_takers:
-            points += POINTS_TOP_WICKET_TAKER_CORRECT
+    if match.actual_top_wicket_taker and prediction.top_wicket_taker:
+        actual_wicket_takers = {index.identity(name) for name in match.actual_top_wicket_taker.split(',')}
+        if index.identity(prediction.top_wicket_taker) in actual_wicket_takers:
+            points["top_wicket_taker"] = POINTS_TOP_WICKET_TAKER_CORRECT
 
     # Top run scorer (handles ties - comma-separated list)
     # Example: "Virat Kohli, Faf du Plessis" means both scored same runs
-    if match.actual_top_run_scorer:
-        actual_run_scorers = [name.strip() for name in match.actual_top_run_scorer.split(',')]
-        if prediction.top_run_scorer in actual_run_scorers:
-            points += POINTS_TOP_RUN_SCORER_CORRECT
+    if match.actual_top_run_scorer and prediction.top_run_scorer:
+        actual_run_scorers = {index.identity(name) for name in match.actual_top_run_scorer.split(',')}
+        if index.identity(prediction.top_run_scorer) in actual_run_scorers:
+            points["top_run_scorer"] = POINTS_TOP_RUN_SCORER_CORRECT
 
     # ---- Numeric predictions with range-based scoring ----
 
@@ -96,11 +109,11 @@ def score_prediction_for_match(
     ):
         diff = abs(match.actual_highest_run_scored - prediction.highest_run_scored)
         if diff <= 5:
-            points += 5
+            points["highest_run_scored"] = 5
         elif diff <= 10:
-            points += 3
+            points["highest_run_scored"] = 3
         elif diff <= 15:
-            points += 1
+            points["highest_run_scored"] = 1
         # else: +0
 
     # Powerplay runs
@@ -110,11 +123,11 @@ def score_prediction_for_match(
     ):
         diff = abs(match.actual_powerplay_runs - prediction.powerplay_runs)
         if diff <= 1:
-            points += 3
+            points["powerplay_runs"] = 3
         elif diff <= 2:
-            points += 2
+            points["powerplay_runs"] = 2
         elif diff <= 4:
-            points += 1
+            points["powerplay_runs"] = 1
         # else: +0
 
     # Total wickets
@@ -124,17 +137,41 @@ def score_prediction_for_match(
     ):
         diff = abs(match.actual_total_wickets - prediction.total_wickets)
         if diff == 0:
-            points += 3
+            points["total_wickets"] = 3
         elif diff <= 1:
-            points += 2
+            points["total_wickets"] = 2
         elif diff <= 2:
-            points += 1
+            points["total_wickets"] = 1
         # else: +0
 
+    return points
+
+
+def score_prediction_for_match(
+    prediction: Prediction, 
+    match: Match,
+    actual_xfactors: List[ActualXFactor],
+    index: PlayerIndex = None,
+    actual_keys: Set[Tuple[str, tuple]] = None
+) -> int:
+    """
+    Calculate points for a single prediction based on match results.
+    Handles ties: If multiple players are top scorers/wicket-takers,
+    user gets points if they predicted ANY of them.
+    """
+    if index is None:
+        index = get_player_index()
+    if actual_keys is None:
+        actual_keys = actual_xfactor_keys(actual_xfactors, index)
+
+    points = sum(category_points(prediction, match, index).values())
+
     # ---- X-factor predictions ----
 
+    xfactor_defs = xfactor_catalog.get().by_id
+
     for xf_pred in prediction.x_factors:
-        xf_def = XFACTOR_DEFS.get(xf_pred.xf_id)
+        xf_def = xfactor_defs.get(xf_pred.xf_id)
         if not xf_def:
             # Unknown X-factor ID; skip scoring for safety
             xf_pred.correct = None
@@ -145,7 +182,7 @@ def score_prediction_for_match(
         correct_pts, wrong_pts = XFACTOR_RISK_POINTS.get(risk, (0, 0))
 
         # Check if this X-factor actually happened
-        if did_xfactor_happen(xf_pred.xf_id, xf_pred.player_name, actual_xfactors):
+        if did_xfactor_happen(xf_pred.xf_id, xf_pred.player_name, actual_keys, index):
             xf_pred.correct = True
             points += correct_pts
         else:
@@ -155,6 +192,32 @@ def score_prediction_for_match(
     return points
 
 
+def lock_matches_for_scoring(db: Session, match_ids: List[int]) -> None:
+    """
+    Serialize scoring per match: row-lock the Match rows until commit, so a
+    live-worker run and an admin re-score of the same match can't both push
+    league deltas computed from the same old points. The matches are
+    reloaded once locked; callers reload their predictions the same way
+    (populate_existing), since whoever held the lock before may have
+    scored them.
+    """
+    (
+        db.query(Match)
+        .filter(Match.id.in_(match_ids))
+        .order_by(Match.id)
+        .with_for_update()
+        .populate_existing()
+        .all()
+    )
+
+
+def flush_and_push_league_deltas(db: Session, predictions: List[Prediction], old_points: Dict[int, Optional[int]]) -> None:
+    # Prediction UPDATEs first: their row locks make a concurrent add_member
+    # wait for this commit, or this wait for it (see leagues.add_member)
+    db.flush()
+    push_league_deltas(db, points_deltas(predictions, old_points))
+
+
 def apply_scoring_for_match(
     match: Match, 
     predictions_for_match: List[Prediction],
@@ -165,18 +228,80 @@ def apply_scoring_for_match(
     Updates each prediction's points_earned and x_factors[i].correct.
     Commits changes to database.
     """
+    lock_matches_for_scoring(db, [match.id])
+    db.query(Prediction).filter(Prediction.match_id == match.id).populate_existing().all()
+
     # Get all actual X-factors that occurred in this match
     actual_xfactors = db.query(ActualXFactor).filter(
         ActualXFactor.match_id == match.id
     ).all()
+
+    index = get_player_index()
+    actual_keys = actual_xfactor_keys(actual_xfactors, index)
     
+    old_points = {p.id: p.points_earned for p in predictions_for_match}
+
     # Score each prediction
     for prediction in predictions_for_match:
         prediction.points_earned = score_prediction_for_match(
             prediction, 
             match, 
-            actual_xfactors
+            actual_xfactors,
+            index,
+            actual_keys
         )
     
+    # League tables get each user's points delta, in the same transaction
+    flush_and_push_league_deltas(db, predictions_for_match, old_points)
+
     # Commit all changes to database
-    db.commit()
\ No newline at end of file
+    db.commit()
+    invalidate_performance({p.user_id for p in predictions_for_match})
+
+
+def apply_scoring_for_matches(matches: List[Match], db: Session) -> None:
+    """
+    Batch variant of apply_scoring_for_match for many matches at once
+    (e.g. season backfill). Loads actual X-factors and predictions with one
+    IN query each and commits once.
+    """
+    if not matches:
+        return
+
+    matches_by_id = {m.id: m for m in matches}
+    match_ids = list(matches_by_id)
+
+    lock_matches_for_scoring(db, match_ids)
+
+    actual_by_match = {}
+    for xf in db.query(ActualXFactor).filter(ActualXFactor.match_id.in_(match_ids)):
+        actual_by_match.setdefault(xf.match_id, []).append(xf)
+
+    predictions = (
+        db.query(Prediction)
+        .options(selectinload(Prediction.x_factors))
+        .filter(Prediction.match_id.in_(match_ids))
+        .populate_existing()
+        .all()
+    )
+
+    index = get_player_index()
+    keys_by_match = {
+        match_id: actual_xfactor_keys(actual_by_match.get(match_id, []), index)
+        for match_id in match_ids
+    }
+
+    old_points = {p.id: p.points_earned for p in predictions}
+
+    for prediction in predictions:
+        prediction.points_earned = score_prediction_for_match(
+            prediction,
+            matches_by_id[prediction.match_id],
+            actual_by_match.get(prediction.match_id, []),
+            index,
+            keys_by_match[prediction.match_id],
+        )
+
+    flush_and_push_league_deltas(db, predictions, old_points)
+    db.commit()
+    invalidate_performance({p.user_id for p in predictions})
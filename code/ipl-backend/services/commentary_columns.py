@@ -0,0 +1,261 @@
+# app/services/commentary_columns.py
+#
+# Columnar alternative to commentary_aggregator.aggregate and
+# xf_engine.extract_15_over_batters.
+#
+# Commentary pages are flattened once into compact NumPy arrays (one row per
+# ball) and every aggregate is computed with grouped reductions (bincount)
+# instead of walking dicts ball by ball. Used for season backfills where the
+# dict-based path dominates CPU time. Output matches the dict-based functions.
+
+import numpy as np
+
+
+EXTRA_DETAILS = ("wd", "nb")
+CATCH_DISMISSALS = ("ct", "cbb")
+NON_BOWLER_DISMISSALS = ("ro",)
+
+
+def _to_int(value):
+    return int(value or 0)
+
+
+class _Interner:
+    """Maps arbitrary keys (names / ids / dismissal codes) to dense int codes."""
+
+    def __init__(self):
+        self.codes = {}
+        self.values = []
+
+    def code(self, value):
+        code = self.codes.get(value)
+        if code is None:
+            code = len(self.values)
+            self.codes[value] = code
+            self.values.append(value)
+        return code
+
+
+def to_columns(commentary):
+    """
+    Flatten commentary entries into columnar arrays.
+
+    Only ball entries (Isball) become rows. Players and dismissal codes are
+    interned into dense int codes; the lookup tables are returned alongside
+    the arrays so results can be mapped back to names/ids.
+    """
+
+    players = _Interner()
+    dismissals = _Interner()
+    dismissals.code("")  # code 0 == not a dismissal
+
+    uid = []
+    batter_name = []
+    batter_id = []
+    bowler_name = []
+    over = []
+    runs = []
+    conceded = []
+    extra = []
+    wicket = []
+    dismissal = []
+
+    catch_row = []
+    catch_fielder = []
+
+    end_over = []
+    end_over_runs = []
+
+    for ball in commentary:
+
+        if ball.get("End_Over"):
+            summary = ball.get("Summary")
+            if summary:
+                end_over.append(_to_int(summary["Over"]))
+                end_over_runs.append(_to_int(summary.get("Runs")))
+
+        if not ball.get("Isball"):
+            continue
+
+        row = len(uid)
+
+        uid.append(ball.get("UID"))
+        batter_name.append(players.code(ball.get("Batsman_Name")))
+        batter_id.append(players.code(ball.get("Batsman") or None))
+        bowler_name.append(players.code(ball.get("Bowler_Name")))
+        over.append(_to_int(ball.get("Over_No")))
+        runs.append(_to_int(ball.get("Batsman_Runs")))
+        conceded.append(_to_int(ball.get("Bowler_Conceded_Runs")))
+        extra.append((ball.get("Detail") or "").lower() in EXTRA_DETAILS)
+        wicket.append(bool(ball.get("Iswicket")))
+
+        dismissal_id = (ball.get("Dismissal_Id") or "").lower()
+        dismissal.append(dismissals.code(dismissal_id))
+
+        if dismissal_id in CATCH_DISMISSALS:
+            for f in ball.get("Fielders") or []:
+                name = f.get("Player_Name")
+                if name:
+                    catch_row.append(row)
+                    catch_fielder.append(players.code(name))
+
+    return {
+        "uid": uid,
+        "batter_name": np.array(batter_name, dtype=np.int32),
+        "batter_id": np.array(batter_id, dtype=np.int32),
+        "bowler_name": np.array(bowler_name, dtype=np.int32),
+        "over": np.array(over, dtype=np.int16),
+        "runs": np.array(runs, dtype=np.int16),
+        "conceded": np.array(conceded, dtype=np.int16),
+        "extra": np.array(extra, dtype=bool),
+        "wicket": np.array(wicket, dtype=bool),
+        "dismissal": np.array(dismissal, dtype=np.int8),
+        "catch_row": np.array(catch_row, dtype=np.int32),
+        "catch_fielder": np.array(catch_fielder, dtype=np.int32),
+        "end_over": np.array(end_over, dtype=np.int16),
+        "end_over_runs": np.array(end_over_runs, dtype=np.int16),
+        "players": players.values,
+        "dismissals": dismissals.values,
+    }
+
+
+def _first_occurrence_mask(uid):
+    """Boolean mask keeping the first row for each UID (duplicate page rows)."""
+
+    mask = np.zeros(len(uid), dtype=bool)
+    seen = set()
+    for i, u in enumerate(uid):
+        if u not in seen:
+            seen.add(u)
+            mask[i] = True
+    return mask
+
+
+def _dismissal_mask(cols, wanted):
+    codes = [i for i, d in enumerate(cols["dismissals"]) if d in wanted]
+    return np.isin(cols["dismissal"], codes)
+
+
+def aggregate_columns(cols):
+    """Same result as commentary_aggregator.aggregate, from columnar input."""
+
+    players = cols["players"]
+    n_players = len(players)
+
+    keep = _first_occurrence_mask(cols["uid"])
+
+    batter = cols["batter_name"][keep]
+    bowler = cols["bowler_name"][keep]
+    over = cols["over"][keep].astype(np.int64)
+    runs = cols["runs"][keep].astype(np.int64)
+    conceded = cols["conceded"][keep].astype(np.int64)
+    valid = ~cols["extra"][keep]
+    wicket = cols["wicket"][keep] & valid
+    non_bowler = _dismissal_mask(cols, NON_BOWLER_DISMISSALS)[keep]
+
+    # -------------------------
+    # BOWLERS (every delivery counts towards conceded)
+    # -------------------------
+    bowl_deliveries = np.bincount(bowler, minlength=n_players)
+    bowl_runs = np.bincount(bowler, weights=conceded, minlength=n_players)
+    bowl_balls = np.bincount(bowler[valid], minlength=n_players)
+    bowl_dots = np.bincount(bowler[valid & (conceded == 0)], minlength=n_players)
+    bowl_wkts = np.bincount(bowler[wicket & ~non_bowler], minlength=n_players)
+
+    bowlers = {
+        players[p]: {
+            "runs": int(bowl_runs[p]),
+            "balls": int(bowl_balls[p]),
+            "wickets": int(bowl_wkts[p]),
+            "dots": int(bowl_dots[p]),
+        }
+        for p in np.flatnonzero(bowl_deliveries)
+    }
+
+    # -------------------------
+    # BATTERS (valid balls only)
+    # -------------------------
+    v_batter = batter[valid]
+    v_runs = runs[valid]
+    v_over = over[valid]
+
+    bat_balls = np.bincount(v_batter, minlength=n_players)
+    bat_runs = np.bincount(v_batter, weights=v_runs, minlength=n_players)
+    bat_fours = np.bincount(v_batter[v_runs == 4], minlength=n_players)
+    bat_sixes = np.bincount(v_batter[v_runs == 6], minlength=n_players)
+
+    # (batter, over) grouped into a single flat key
+    n_overs = int(v_over.max()) + 1 if len(v_over) else 1
+    key = v_batter.astype(np.int64) * n_overs + v_over
+    key_balls = np.bincount(key, minlength=n_players * n_overs)
+    key_runs = np.bincount(key, weights=v_runs, minlength=n_players * n_overs)
+
+    over_runs = {}
+    for k in np.flatnonzero(key_balls):
+        p, o = divmod(int(k), n_overs)
+        over_runs.setdefault(p, {})[o] = int(key_runs[k])
+
+    batters = {
+        players[p]: {
+            "runs": int(bat_runs[p]),
+            "balls": int(bat_balls[p]),
+            "fours": int(bat_fours[p]),
+            "sixes": int(bat_sixes[p]),
+            "over_runs": over_runs.get(p, {}),
+        }
+        for p in np.flatnonzero(bat_balls)
+    }
+
+    # -------------------------
+    # FIELDERS (catches on counted wickets)
+    # -------------------------
+    counted_rows = np.flatnonzero(keep)[wicket]
+    catch_ok = np.isin(cols["catch_row"], counted_rows)
+    catches = np.bincount(cols["catch_fielder"][catch_ok], minlength=n_players)
+
+    fielders = {
+        players[p]: {"catches": int(catches[p])}
+        for p in np.flatnonzero(catches)
+    }
+
+    return {
+        "batters": batters,
+        "bowlers": bowlers,
+        "fielders": fielders,
+        "total_runs": int(conceded.sum()),
+        "total_wickets": int(wicket.sum()),
+        "powerplay_runs": int(conceded[over <= 6].sum()),
+    }
+
+
+def extract_15_over_batters_columns(cols, threshold=15):
+    """Same result as xf_engine.extract_15_over_batters, from columnar input."""
+
+    candidate_overs = np.unique(cols["end_over"][cols["end_over_runs"] >= threshold])
+    if not len(candidate_overs):
+        return set()
+
+    players = cols["players"]
+    batter = cols["batter_id"]
+    over = cols["over"].astype(np.int64)
+    runs = cols["runs"].astype(np.int64)
+
+    in_candidate = np.isin(over, candidate_overs)
+    has_batter = np.array([players[b] is not None for b in range(len(players))], dtype=bool)[batter]
+    mask = in_candidate & has_batter
+    if not mask.any():
+        return set()  # no balls (or no named batters) in the big overs
+
+    n_overs = int(over[mask].max()) + 1
+    key = batter[mask].astype(np.int64) * n_overs + over[mask]
+    totals = np.bincount(key, weights=runs[mask])
+
+    return {players[int(k) // n_overs] for k in np.flatnonzero(totals >= threshold)}
+
+
+def aggregate(commentary):
+    return aggregate_columns(to_columns(commentary))
+
+
+def extract_15_over_batters(commentary, threshold=15):
+    return extract_15_over_batters_columns(to_columns(commentary), threshold)
@@ -1,8 +1,11 @@
 # app/services/icc_client.py
 
+import asyncio
 import math
 import httpx
 
+from services.icc_guard import icc_get
+
 ICC_CLIENT_ID = "tPZJbRgIub3Vua93/DWtyQ=="
 ICC_BASE_URL = "https://assets-icc.sportz.io/cricket/v1/game/commentary"
 
@@ -19,9 +22,7 @@ async def fetch_inning(client: httpx.AsyncClient, game_id: int, inning: int):
         "page_size": 20
     }
 
-    first = await client.get(ICC_BASE_URL, params=params)
-    first.raise_for_status()
-    first_json = first.json()
+    first_json = await icc_get(client, ICC_BASE_URL, params)
 
     total_count = first_json["meta"]["count"]
     page_size = 20
@@ -29,11 +30,17 @@ async def fetch_inning(client: httpx.AsyncClient, game_id: int, inning: int):
 
     commentary = first_json["data"]["Commentary"]
 
-    for page in range(2, total_pages + 1):
-        params["page_number"] = page
-        res = await client.get(ICC_BASE_URL, params=params)
-        res.raise_for_status()
-        commentary.extend(res.json()["data"]["Commentary"])
+    # Remaining pages are independent, fetch them together (order preserved)
+    async def fetch_page(page):
+        res = await icc_get(client, ICC_BASE_URL, {**params, "page_number": page})
+        return res["data"]["Commentary"]
+
+    pages = await asyncio.gather(
+        *(fetch_page(page) for page in range(2, total_pages + 1))
+    )
+
+    for page in pages:
+        commentary.extend(page)
 
     return commentary
 
@@ -41,8 +48,10 @@ async def fetch_inning(client: httpx.AsyncClient, game_id: int, inning: int):
 async def fetch_full_match(game_id: int):
 
     async with httpx.AsyncClient(timeout=10) as client:
-        inning1 = await fetch_inning(client, game_id, 1)
-        inning2 = await fetch_inning(client, game_id, 2)
+        inning1, inning2 = await asyncio.gather(
+            fetch_inning(client, game_id, 1),
+            fetch_inning(client, game_id, 2),
+        )
 
     return inning1, inning2
 
@@ -57,9 +66,8 @@ async def fetch_scorecard(client: httpx.AsyncClient, game_id: int):
         "lang": "en"
     }
 
-    res = await client.get(ICC_SCORECARD_URL, params=params)
-    res.raise_for_status()
-    return res.json()["data"]
+    res = await icc_get(client, ICC_SCORECARD_URL, params)
+    return res["data"]
 
 async def fetch_match_data(game_id: int):
 
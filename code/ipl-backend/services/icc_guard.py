@@ -0,0 +1,311 @@
+# app/services/icc_guard.py
+#
+# Upstream protection for ICC feed calls:
+#   - token bucket on outgoing requests (stay under ICC rate limits)
+#   - retries with jittered exponential backoff (GETs are idempotent)
+#   - adaptive concurrency limit driven by observed latency (AIMD)
+#   - circuit breaker that fails fast / serves the last good response
+#
+# All ICC GETs go through `icc_get`. `icc_stats()` exposes state + counters.
+# Inside `fresh_only()` nothing stale is served: callers get IccUnavailable.
+
+import asyncio
+import os
+import random
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+import httpx
+
+
+ICC_RATE_PER_SEC = float(os.getenv("ICC_RATE_PER_SEC", "20"))
+ICC_BURST = int(os.getenv("ICC_BURST", "40"))
+
+ICC_MAX_RETRIES = 3
+ICC_CALL_DEADLINE = float(os.getenv("ICC_CALL_DEADLINE", "15"))  # seconds, all attempts
+ICC_BACKOFF_BASE = 0.2      # seconds
+ICC_BACKOFF_CAP = 3.0       # seconds
+
+ICC_MIN_CONCURRENCY = 2
+ICC_MAX_CONCURRENCY = 32
+ICC_TARGET_LATENCY = 1.5    # seconds; slower responses shrink the limit
+
+ICC_BREAKER_FAILURES = 5    # consecutive failures before opening
+ICC_BREAKER_RESET = 30.0    # seconds open before a half-open probe
+
+ICC_CACHE_SIZE = 512        # last good responses kept for degraded mode
+
+RETRYABLE_STATUS = {429, 500, 502, 503, 504}
+
+
+class IccUnavailable(Exception):
+    """ICC is degraded (breaker open / retries exhausted) and nothing is cached."""
+
+
+# ============================================================================
+# TOKEN BUCKET
+# ============================================================================
+
+class TokenBucket:
+
+    def __init__(self, rate: float, capacity: int):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = float(capacity)
+        self.updated = time.monotonic()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    async def acquire(self) -> float:
+        """Take one token, sleeping until one is available. Returns time waited."""
+        waited = 0.0
+        while True:
+            self._refill()
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return waited
+            delay = (1 - self.tokens) / self.rate
+            waited += delay
+            await asyncio.sleep(delay)
+
+
+# ============================================================================
+# ADAPTIVE CONCURRENCY (additive increase / multiplicative decrease)
+# ============================================================================
+
+class AdaptiveLimiter:
+
+    def __init__(self, min_limit: int, max_limit: int, target_latency: float):
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.target_latency = target_latency
+        self.limit = float(min_limit)
+        self.in_flight = 0
+        self._cond = asyncio.Condition()
+
+    async def acquire(self):
+        async with self._cond:
+            while self.in_flight >= int(self.limit):
+                await self._cond.wait()
+            self.in_flight += 1
+
+    async def release(self, latency: float, ok: bool):
+        async with self._cond:
+            self.in_flight -= 1
+            if ok and latency <= self.target_latency:
+                self.limit = min(self.max_limit, self.limit + 1 / max(self.limit, 1))
+            else:
+                self.limit = max(self.min_limit, self.limit / 2)
+            self._cond.notify_all()
+
+
+# ============================================================================
+# CIRCUIT BREAKER
+# ============================================================================
+
+class CircuitBreaker:
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold: int, reset_timeout: float):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self.probing = False
+
+    def allow(self) -> bool:
+        if self.state == self.CLOSED:
+            return True
+        if self.state == self.OPEN:
+            if time.monotonic() - self.opened_at < self.reset_timeout:
+                return False
+            self.state = self.HALF_OPEN
+            self.probing = False
+        # HALF_OPEN: let a single probe through
+        if self.probing:
+            return False
+        self.probing = True
+        return True
+
+    def record_success(self):
+        self.state = self.CLOSED
+        self.failures = 0
+        self.probing = False
+
+    def record_failure(self):
+        self.failures += 1
+        self.probing = False
+        if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+            self.state = self.OPEN
+            self.opened_at = time.monotonic()
+
+
+# ============================================================================
+# GUARDED GET
+# ============================================================================
+
+bucket = TokenBucket(ICC_RATE_PER_SEC, ICC_BURST)
+limiter = AdaptiveLimiter(ICC_MIN_CONCURRENCY, ICC_MAX_CONCURRENCY, ICC_TARGET_LATENCY)
+breaker = CircuitBreaker(ICC_BREAKER_FAILURES, ICC_BREAKER_RESET)
+
+_last_good: "OrderedDict[tuple, dict]" = OrderedDict()
+
+counters = {
+    "requests": 0,
+    "upstream_calls": 0,
+    "successes": 0,
+    "failures": 0,
+    "retries": 0,
+    "short_circuited": 0,
+    "served_stale": 0,
+    "timeouts": 0,
+    "throttled_seconds": 0.0,
+}
+
+
+def _cache_key(url: str, params: dict) -> tuple:
+    return (url, tuple(sorted((k, str(v)) for k, v in params.items())))
+
+
+def _remember(key: tuple, data: dict):
+    _last_good[key] = data
+    _last_good.move_to_end(key)
+    while len(_last_good) > ICC_CACHE_SIZE:
+        _last_good.popitem(last=False)
+
+
+# False inside fresh_only(); inherited by tasks created there
+_allow_stale: ContextVar[bool] = ContextVar("icc_allow_stale", default=True)
+
+
+@contextmanager
+def fresh_only():
+    """Never fall back to last good responses, e.g. when finalizing a result."""
+    token = _allow_stale.set(False)
+    try:
+        yield
+    finally:
+        _allow_stale.reset(token)
+
+
+def _stale_or_raise(key: tuple, reason: str):
+    if _allow_stale.get() and key in _last_good:
+        counters["served_stale"] += 1
+        return _last_good[key]
+    raise IccUnavailable(reason)
+
+
+def _backoff(attempt: int) -> float:
+    # "full jitter": uniform in [0, min(cap, base * 2^attempt)]
+    return random.uniform(0, min(ICC_BACKOFF_CAP, ICC_BACKOFF_BASE * 2 ** attempt))
+
+
+async def _attempt(client: httpx.AsyncClient, url: str, params: dict):
+    """One throttled upstream call; None on a transport error."""
+    counters["throttled_seconds"] += await bucket.acquire()
+    await limiter.acquire()
+
+    counters["upstream_calls"] += 1
+    started = time.monotonic()
+    ok = False
+    try:
+        res = await client.get(url, params=params)
+        ok = res.status_code not in RETRYABLE_STATUS
+        return res
+    except httpx.ReadTimeout:
+        raise  # not retried, see icc_get
+    except httpx.TransportError:
+        return None
+    finally:
+        await limiter.release(time.monotonic() - started, ok)
+
+
+async def icc_get(client: httpx.AsyncClient, url: str, params: dict) -> dict:
+    """
+    GET an ICC feed URL and return the decoded JSON body.
+    Non-retryable 4xx responses raise httpx.HTTPStatusError as before.
+
+    Connect errors and 429/5xx are retried; read timeouts are not (a slow
+    ICC stays slow), and the whole call is capped at ICC_CALL_DEADLINE.
+    """
+    counters["requests"] += 1
+    key = _cache_key(url, params)
+
+    try:
+        async with asyncio.timeout(ICC_CALL_DEADLINE):
+            return await _get_with_retries(client, url, params, key)
+    except (TimeoutError, httpx.ReadTimeout):
+        counters["timeouts"] += 1
+        counters["failures"] += 1
+        if breaker.state != CircuitBreaker.OPEN:  # a timed-out probe already reopened it
+            breaker.record_failure()
+        return _stale_or_raise(key, "ICC request timed out")
+
+
+async def _get_with_retries(client: httpx.AsyncClient, url: str, params: dict, key: tuple) -> dict:
+    for attempt in range(ICC_MAX_RETRIES + 1):
+
+        if not breaker.allow():
+            counters["short_circuited"] += 1
+            return _stale_or_raise(key, "ICC circuit open")
+
+        probe = breaker.state == CircuitBreaker.HALF_OPEN
+        try:
+            res = await _attempt(client, url, params)
+        except asyncio.CancelledError:
+            # A cancelled caller says nothing about ICC's health, but a
+            # cancelled half-open probe must still give up the probe slot
+            if probe:
+                breaker.record_failure()
+            raise
+        except httpx.ReadTimeout:
+            raise  # counted once by icc_get
+        except Exception:
+            breaker.record_failure()
+            raise
+
+        ok = res is not None and res.status_code not in RETRYABLE_STATUS
+        if ok:
+            breaker.record_success()
+            res.raise_for_status()
+            data = res.json()
+            counters["successes"] += 1
+            _remember(key, data)
+            return data
+
+        counters["failures"] += 1
+        breaker.record_failure()
+
+        if attempt < ICC_MAX_RETRIES:
+            counters["retries"] += 1
+            await asyncio.sleep(_backoff(attempt))
+
+    return _stale_or_raise(key, "ICC request failed after retries")
+
+
+def icc_stats() -> dict:
+    return {
+        "breaker": {
+            "state": breaker.state,
+            "consecutive_failures": breaker.failures,
+        },
+        "concurrency": {
+            "limit": int(limiter.limit),
+            "in_flight": limiter.in_flight,
+        },
+        "rate_limit": {
+            "rate_per_sec": bucket.rate,
+            "tokens": round(bucket.tokens, 2),
+        },
+        "cached_responses": len(_last_good),
+        "counters": dict(counters),
+    }
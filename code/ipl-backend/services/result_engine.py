@@ -1,51 +1,114 @@
-from services.icc_client import fetch_match_data, fetch_inning
-from services.scorecard_aggregator import aggregate_scorecard
-from services.xf_engine import generate_xfs, extract_15_over_batters
+from services.icc_client import fetch_scorecard, fetch_inning
+from services.scorecard_aggregator import aggregate_scorecard, player_name_lookup
+from services.xf_engine import CompiledRules, generate_xfs, extract_15_over_batters
+import asyncio
 import httpx
 
 
-async def generate_match_result(game_id: int):
+def inning_may_have_15_over(scorecard, inning_no: int, threshold=15) -> bool:
+    """
+    Use the scorecard to rule out a `threshold`+ runs over in an innings, so
+    its commentary doesn't have to be fetched at all: a batter can only hit
+    that many in an over if both they and the over's bowler reached it
+    across the innings.
+    """
+    innings = scorecard["Innings"]
+    if inning_no > len(innings):
+        return False
 
-    # 1️⃣ Scorecard
-    scorecard = await fetch_match_data(game_id)
-    stats = aggregate_scorecard(scorecard)
+    inning = innings[inning_no - 1]
 
-    # 2️⃣ Commentary for 15+ over XF
-    async with httpx.AsyncClient(timeout=10) as client:
-        inning1 = await fetch_inning(client, game_id, 1)
-        inning2 = await fetch_inning(client, game_id, 2)
+    def runs(value):
+        try:
+            return int(value or 0)
+        except ValueError:
+            return 0
 
-    xf_15_ids = (
-        extract_15_over_batters(inning1) |
-        extract_15_over_batters(inning2)
+    batter_can = any(
+        runs(b.get("Runs")) >= threshold for b in inning["Batsmen"]
+    )
+    bowler_can = any(
+        runs(b.get("Runs")) >= threshold for b in inning["Bowlers"]
     )
 
-    # 3️⃣ Build XF list
-    xfs = []
+    return batter_can and bowler_can
+
+
+def commentary_xfs(commentary, rules: CompiledRules):
+    """{xf_id: set of ICC batter ids} for the commentary-scope rules."""
+    return {
+        xf_id: extract_15_over_batters(commentary, threshold)
+        for xf_id, threshold in rules.commentary
+    }
+
+
+def _merge_hits(total, hits):
+    for xf_id, ids in hits.items():
+        total.setdefault(xf_id, set()).update(ids)
+
+
+async def _inning_commentary_xfs(client: httpx.AsyncClient, game_id: int, inning_no: int, rules: CompiledRules):
+    # Aggregate as soon as this innings' commentary lands
+    commentary = await fetch_inning(client, game_id, inning_no)
+    return commentary_xfs(commentary, rules)
+
+
+async def _cancel(tasks):
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+
+
+async def fetch_match_inputs(client: httpx.AsyncClient, game_id: int, rules: CompiledRules):
+    """
+    Fetch the scorecard plus the raw commentary of every innings that could
+    hit a commentary rule. Returns (scorecard, {inning_no: commentary}).
+    Used where aggregation runs elsewhere (e.g. a process pool in backfill).
+    """
+    threshold = rules.commentary_threshold
+
+    scorecard_task = asyncio.create_task(fetch_scorecard(client, game_id))
+    inning_tasks = {
+        inning_no: asyncio.create_task(fetch_inning(client, game_id, inning_no))
+        for inning_no in ((1, 2) if threshold is not None else ())
+    }
+
+    try:
+        scorecard = await scorecard_task
+        innings = {}
+        for inning_no, task in inning_tasks.items():
+            if not inning_may_have_15_over(scorecard, inning_no, threshold):
+                await _cancel([task])
+                continue
+            innings[inning_no] = await task
+    finally:
+        await _cancel([scorecard_task, *inning_tasks.values()])
+
+    return scorecard, innings
 
-    # Generate all scorecard-based XFs (no 15+ here)
-    scorecard_xfs = generate_xfs(stats)
 
-    # Resolve names for 15+ XF
-    teams = scorecard["Teams"]
+def build_match_result(scorecard, stats, scorecard_xfs, commentary_hits):
 
-    def resolve_name(pid):
-        for team in teams.values():
-            if pid in team["Players"]:
-                return team["Players"][pid]["Name_Full"]
-        return None
+    # 3️⃣ Build XF list
+    xfs = []
+
+    # ICC player id -> name, built once (ids are kept for id-based resolution)
+    player_names = player_name_lookup(scorecard)
 
     for xf in scorecard_xfs:
         xfs.append({
             "xf_id": xf["xf_id"],
-            "player_name": resolve_name(xf["player_id"])
+            "player_name": player_names.get(xf["player_id"]),
+            "icc_player_id": xf["player_id"],
         })
 
-    for pid in xf_15_ids:
-        xfs.append({
-            "xf_id": "XF_BAT_15_RUNS_OVER",
-            "player_name": resolve_name(pid)
-        })
+    for xf_id, pids in commentary_hits.items():
+        for pid in pids:
+            xfs.append({
+                "xf_id": xf_id,
+                "player_name": player_names.get(pid),
+                "icc_player_id": pid,
+            })
 
     # 4️⃣ Final response
     return {
@@ -57,4 +120,54 @@ async def generate_match_result(game_id: int):
         "powerplay_runs": stats["powerplay_runs"],
         "total_wickets": stats["total_wickets"],
         "x_factor_hits": xfs
-    }
\ No newline at end of file
+    }
+
+
+def compute_match_result(scorecard, innings, rules: CompiledRules):
+    """
+    CPU-only half of result generation (no I/O), picklable for process pools.
+    `innings` is the {inning_no: commentary} dict from fetch_match_inputs.
+    """
+    stats = aggregate_scorecard(scorecard)
+    scorecard_xfs = generate_xfs(stats, rules)
+
+    commentary_hits = {}
+    for commentary in innings.values():
+        _merge_hits(commentary_hits, commentary_xfs(commentary, rules))
+
+    return build_match_result(scorecard, stats, scorecard_xfs, commentary_hits)
+
+
+async def generate_match_result(game_id: int, rules: CompiledRules):
+
+    async with httpx.AsyncClient(timeout=10) as client:
+
+        # 1️⃣ Scorecard + both innings of commentary, all in flight together
+        # (no commentary at all if no commentary rule is active)
+        threshold = rules.commentary_threshold
+        scorecard_task = asyncio.create_task(fetch_scorecard(client, game_id))
+        inning_tasks = {
+            inning_no: asyncio.create_task(
+                _inning_commentary_xfs(client, game_id, inning_no, rules)
+            )
+            for inning_no in ((1, 2) if threshold is not None else ())
+        }
+
+        try:
+            scorecard = await scorecard_task
+            stats = aggregate_scorecard(scorecard)
+
+            # Generate all scorecard-based XFs (no 15+ here)
+            scorecard_xfs = generate_xfs(stats, rules)
+
+            # 2️⃣ Commentary XFs, e.g. 15+ over (skip innings the scorecard rules out)
+            commentary_hits = {}
+            for inning_no, task in inning_tasks.items():
+                if not inning_may_have_15_over(scorecard, inning_no, threshold):
+                    await _cancel([task])
+                    continue
+                _merge_hits(commentary_hits, await task)
+        finally:
+            await _cancel([scorecard_task, *inning_tasks.values()])
+
+    return build_match_result(scorecard, stats, scorecard_xfs, commentary_hits)
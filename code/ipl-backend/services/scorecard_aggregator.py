@@ -1,3 +1,12 @@
+def player_name_lookup(scorecard):
+    """ICC player id -> Name_Full across both teams."""
+    return {
+        pid: player["Name_Full"]
+        for team in scorecard["Teams"].values()
+        for pid, player in team["Players"].items()
+    }
+
+
 def aggregate_scorecard(scorecard):
 
     def safe_float(value, default=0.0):
@@ -120,17 +129,13 @@ def aggregate_scorecard(scorecard):
     # -------------------------
     # Resolve Names
     # -------------------------
-    def resolve_name(pid):
-        for team in teams.values():
-            if pid in team["Players"]:
-                return team["Players"][pid]["Name_Full"]
-        return None
+    player_names = player_name_lookup(scorecard)
 
     return {
         "toss_winner": toss_winner,
         "match_winner": match_winner,
-        "top_run_scorer": resolve_name(top_run_scorer_id),
-        "top_wicket_taker": resolve_name(top_wicket_taker_id),
+        "top_run_scorer": player_names.get(top_run_scorer_id),
+        "top_wicket_taker": player_names.get(top_wicket_taker_id),
         "highest_run_scored": highest_total,
         "powerplay_runs": max_powerplay,
         "total_wickets": total_wickets,
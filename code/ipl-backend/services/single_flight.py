@@ -0,0 +1,73 @@
+# app/services/single_flight.py
+#
+# Request coalescing for ICC-backed endpoints.
+#
+# When a match ends many callers hit the same result endpoint at once. All
+# concurrent callers for a key await ONE upstream fetch and share its result,
+# and a short memo window after completion absorbs late arrivals.
+
+import asyncio
+import time
+
+
+RESULT_MEMO_SECONDS = 15.0
+
+
+class SingleFlight:
+
+    def __init__(self, memo_seconds: float = RESULT_MEMO_SECONDS):
+        self.memo_seconds = memo_seconds
+        self._inflight = {}   # key -> asyncio.Task
+        self._memo = {}       # key -> (expires_at, result)
+        self._generation = {} # key -> bumped by forget()
+
+    async def do(self, key, fn):
+        """
+        Run `fn()` (a coroutine function) once per key.
+        Results are shared with every caller, so don't mutate them.
+        """
+        memo = self._memo.get(key)
+        if memo and memo[0] > time.monotonic():
+            return memo[1]
+
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(fn())
+            self._inflight[key] = task
+            generation = self._generation.get(key, 0)
+            task.add_done_callback(lambda t: self._finish(key, t, generation))
+
+        # shield: one caller disconnecting must not cancel the shared fetch
+        return await asyncio.shield(task)
+
+    def _finish(self, key, task, generation):
+        if self._inflight.get(key) is task:
+            self._inflight.pop(key)
+
+        # Started before a forget(): its result is outdated, don't keep it
+        if self._generation.get(key, 0) != generation:
+            return
+
+        # Errors are not memoized; the next caller retries upstream
+        if task.cancelled() or task.exception() is not None:
+            return
+
+        now = time.monotonic()
+        for k in [k for k, (expires, _) in self._memo.items() if expires <= now]:
+            del self._memo[k]
+
+        if self.memo_seconds > 0:
+            self._memo[key] = (now + self.memo_seconds, task.result())
+
+    def forget(self, key):
+        """
+        Drop the memo, and detach any in-flight fetch: its current waiters
+        still get its result, but it is not memoized and later callers
+        start a fresh fetch.
+        """
+        self._memo.pop(key, None)
+        self._inflight.pop(key, None)
+        self._generation[key] = self._generation.get(key, 0) + 1
+
+
+icc_flight = SingleFlight()
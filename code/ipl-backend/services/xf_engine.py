@@ -1,73 +1,123 @@
 # app/services/xf_engine.py
 
 
-def generate_xfs(stats):
+import numpy as np
+
+
+# Stats available per scope, in column order of the stats arrays
+SCOPE_STATS = {
+    "batter": ["runs", "balls", "fours", "sixes", "boundaries", "strike_rate", "dots"],
+    "bowler": ["wickets", "balls", "runs", "dots", "economy"],
+    "fielder": ["catches"],
+}
+
+# Ball-by-ball stats, evaluated on commentary rather than the scorecard
+COMMENTARY_STATS = {"max_over_runs"}
+
+COMPARATORS = {
+    ">=": np.greater_equal,
+    "<=": np.less_equal,
+    ">": np.greater,
+    "<": np.less,
+    "==": np.equal,
+}
+
+
+class CompiledRules:
+    """
+    X-factor predicates compiled into per-scope arrays, so every player is
+    checked against every rule of a scope with a handful of array ops.
+    """
+
+    def __init__(self, defs):
+        self.by_scope = {}
+
+        # Commentary rules: (xf_id, threshold) for batter max-runs-in-an-over >=
+        self.commentary = tuple(
+            (d.id, d.threshold)
+            for d in defs
+            if d.status and d.scope == "commentary" and d.stat in COMMENTARY_STATS
+            and d.comparator == ">=" and d.threshold is not None
+        )
+
+        grouped = {}
+        for d in defs:
+            if not d.status or d.scope not in SCOPE_STATS:
+                continue  # inactive, or not a scorecard rule (e.g. commentary)
+            if d.stat not in SCOPE_STATS[d.scope] or d.comparator not in COMPARATORS:
+                continue
+            grouped.setdefault(d.scope, []).append(d)
+
+        for scope, rules in grouped.items():
+            columns = SCOPE_STATS[scope]
+            self.by_scope[scope] = {
+                "xf_ids": np.array([r.id for r in rules], dtype=object),
+                "stat_col": np.array([columns.index(r.stat) for r in rules], dtype=np.intp),
+                "threshold": np.array([r.threshold for r in rules], dtype=np.float64),
+                "min_balls": np.array([r.min_balls or 0 for r in rules], dtype=np.float64),
+                # rule indexes per comparator, evaluated one group at a time
+                "groups": [
+                    (COMPARATORS[op], np.array([i for i, r in enumerate(rules) if r.comparator == op], dtype=np.intp))
+                    for op in COMPARATORS
+                    if any(r.comparator == op for r in rules)
+                ],
+            }
+
+
+    @property
+    def commentary_threshold(self):
+        """Lowest over-runs threshold of any commentary rule (None: no rules)."""
+        return min((t for _, t in self.commentary), default=None)
+
+
+def stats_arrays(stats, scope):
+    """(player_ids, matrix) for a scope; matrix rows follow SCOPE_STATS order."""
+    players = stats[scope + "s"]
+    columns = SCOPE_STATS[scope]
+
+    ids = list(players)
+    matrix = np.zeros((len(ids), len(columns)), dtype=np.float64)
+
+    for row, pid in enumerate(ids):
+        data = players[pid]
+        for col, name in enumerate(columns):
+            if name == "boundaries":
+                matrix[row, col] = data["fours"] + data["sixes"]
+            else:
+                matrix[row, col] = data.get(name, 0)
+
+    return ids, matrix
+
+
+def generate_xfs(stats, rules: CompiledRules):
 
     xfs = []
 
-    # -------------------------
-    # BATTER XFs
-    # -------------------------
-    for pid, data in stats["batters"].items():
-
-        runs = data["runs"]
-        balls = data["balls"]
-        sr = data["strike_rate"]
-
-        if runs >= 40:
-            xfs.append({"xf_id": "XF_BAT_40_RUNS", "player_id": pid})
-
-        if runs >= 50:
-            xfs.append({"xf_id": "XF_BAT_50_RUNS", "player_id": pid})
-
-        if runs >= 60:
-            xfs.append({"xf_id": "XF_BAT_60_RUNS", "player_id": pid})
-
-        if balls >= 10:
-            if sr >= 160:
-                xfs.append({"xf_id": "XF_BAT_SR_160_10B", "player_id": pid})
-            if sr >= 180:
-                xfs.append({"xf_id": "XF_BAT_SR_180_10B", "player_id": pid})
-            if sr >= 200:
-                xfs.append({"xf_id": "XF_BAT_SR_200_10B", "player_id": pid})
-
-        if data["fours"] + data["sixes"] >= 8:
-            xfs.append({"xf_id": "XF_BAT_8_BOUNDARIES", "player_id": pid})
-
-    # -------------------------
-    # BOWLER XFs
-    # -------------------------
-    for pid, data in stats["bowlers"].items():
-
-        wickets = data["wickets"]
-        dots = data["dots"]
-        economy = data["economy"]
-
-        if wickets >= 3:
-            xfs.append({"xf_id": "XF_BOWL_3_WICKETS", "player_id": pid})
-
-        if dots >= 7:
-            xfs.append({"xf_id": "XF_BOWL_7_DOTS", "player_id": pid})
-        if dots >= 9:
-            xfs.append({"xf_id": "XF_BOWL_9_DOTS", "player_id": pid})
-        if dots >= 12:
-            xfs.append({"xf_id": "XF_BOWL_12_DOTS", "player_id": pid})
-
-        if economy <= 6:
-            xfs.append({"xf_id": "XF_BOWL_6_ECONOMY", "player_id": pid})
-        if economy <= 7:
-            xfs.append({"xf_id": "XF_BOWL_7_ECONOMY", "player_id": pid})
-        if economy <= 8:
-            xfs.append({"xf_id": "XF_BOWL_8_ECONOMY", "player_id": pid})
-
-    for pid, data in stats["fielders"].items():
-        if data["catches"] >= 1:
-            xfs.append({"xf_id": "XF_FIELD_CATCH", "player_id": pid})
+    for scope, compiled in rules.by_scope.items():
+
+        ids, matrix = stats_arrays(stats, scope)
+        if not ids:
+            continue
+
+        # players x rules
+        values = matrix[:, compiled["stat_col"]]
+        hit = np.zeros(values.shape, dtype=bool)
+
+        for compare, idx in compiled["groups"]:
+            hit[:, idx] = compare(values[:, idx], compiled["threshold"][idx])
+
+        # minimum-balls qualifier (only scopes that track balls)
+        if "balls" in SCOPE_STATS[scope]:
+            balls = matrix[:, SCOPE_STATS[scope].index("balls")]
+            hit &= balls[:, None] >= compiled["min_balls"][None, :]
+
+        for row, col in zip(*np.nonzero(hit)):
+            xfs.append({"xf_id": compiled["xf_ids"][col], "player_id": ids[row]})
 
     return xfs
 
 
-def extract_15_over_batters(commentary):
+def extract_15_over_batters(commentary, threshold=15):
 
     from collections import defaultdict
 
@@ -94,14 +144,14 @@ def extract_15_over_batters(commentary):
 
                 team_over_runs[over] = total
 
-                if total >= 15:
+                if total >= threshold:
                     candidate_overs.add(over)
 
     result = set()
 
     for over in candidate_overs:
         for batter, runs in batter_over_runs.get(over, {}).items():
-            if runs >= 15:
+            if runs >= threshold:
                 result.add(batter)
 
     return result
\ No newline at end of file
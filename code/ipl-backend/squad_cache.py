@@ -0,0 +1,230 @@
+"""
+Squad version + cached match-player sections.
+
+Squads rarely change within a tournament, so the grouped player sections
+for the prediction form are built once per (tournament_id, home_team_id,
+away_team_id) and served as pre-serialized JSON with an ETag.
+
+The cache is keyed by a squad version that bumps when Squad rows, or
+Players (added, removed, or name/role/image changed), change:
+  - on commit, for ORM writes in this process (changes are noted at flush
+    and dropped if the transaction rolls back)
+  - within SQUAD_CHECK_SECONDS, for edits by other processes (a cheap
+    count / max(id) / max(updated_at) fingerprint of squads and players;
+    the only DB touch on a warm cache)
+"""
+
+import hashlib
+import json
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+from sqlalchemy import event, func, inspect, select
+from sqlalchemy.orm import Session, object_session
+
+from data_loader import get_match_players_grouped
+from models import Match, Player, Squad
+
+
+SQUAD_CHECK_SECONDS = 60
+PLAYER_FIELDS = ("name", "role", "image_url")  # shown in sections / search
+MATCH_KEY_CACHE_SIZE = 2048
+
+_lock = threading.Lock()
+
+_state = {
+    "version": 1,
+    "fingerprint": None,
+    "checked_at": 0.0,
+    "rebaseline": False,  # local commit changed the fingerprint, already applied
+}
+
+_listeners: List[Callable[[int, Optional[dict]], None]] = []
+
+_match_keys: Dict[int, Tuple[int, int, int]] = {}     # match_id -> section key
+_sections: Dict[Tuple[int, int, int], Tuple[bytes, str]] = {}  # key -> (body, etag)
+
+
+# ============================================================================
+# SQUAD VERSION
+# ============================================================================
+
+def on_squad_change(callback: Callable[[int, Optional[dict]], None]) -> None:
+    """
+    Register callback(new_version, changes), e.g. to update a search index.
+
+    changes is {"memberships": [(player_id, (tournament_id, team_id), +1/-1)],
+    "players": {player_id: (name, role, image_url) or None if deleted}} for
+    commits in this process, or None when the change was only detected by
+    the fingerprint (details unknown).
+    """
+    _listeners.append(callback)
+
+
+def bump_squad_version(changes: Optional[dict] = None) -> int:
+    with _lock:
+        _state["version"] += 1
+        version = _state["version"]
+        _sections.clear()
+        _match_keys.clear()
+
+    for callback in _listeners:
+        callback(version, changes)
+    return version
+
+
+def squad_version(db: Session = None) -> int:
+    """Current version; re-checks the squads fingerprint at most once a minute."""
+    if db is not None and time.monotonic() - _state["checked_at"] >= SQUAD_CHECK_SECONDS:
+        fingerprint = tuple(db.query(
+            func.count(Squad.id),
+            func.max(Squad.id),
+            func.max(Squad.updated_at),
+            select(func.max(Player.updated_at)).scalar_subquery(),
+        ).one())
+        _state["checked_at"] = time.monotonic()
+
+        if _state["fingerprint"] is None or _state["rebaseline"]:
+            # Our own commits already bumped (with their changes): adopt the
+            # new fingerprint instead of treating it as an unknown change
+            _state["fingerprint"] = fingerprint
+            _state["rebaseline"] = False
+        elif fingerprint != _state["fingerprint"]:
+            _state["fingerprint"] = fingerprint
+            bump_squad_version()
+
+    return _state["version"]
+
+
+def _changes(target) -> Optional[dict]:
+    """Changes noted on the target's session, applied on commit."""
+    session = object_session(target)
+    if session is None:
+        return None
+    return session.info.setdefault("squad_changes", {"memberships": [], "players": {}})
+
+
+def _membership(target, old: bool = False) -> Tuple[int, Tuple[int, int]]:
+    """(player_id, (tournament_id, team_id)) of a Squad row, before or after the flush."""
+    state = inspect(target)
+    values = []
+    for key in ("player_id", "tournament_id", "team_id"):
+        history = state.attrs[key].history
+        values.append(history.deleted[0] if old and history.deleted else getattr(target, key))
+    return values[0], (values[1], values[2])
+
+
+@event.listens_for(Squad, "after_insert")
+def _squad_inserted(mapper, connection, target):
+    changes = _changes(target)
+    if changes is not None:
+        changes["memberships"].append((*_membership(target), 1))
+
+
+@event.listens_for(Squad, "after_update")
+def _squad_updated(mapper, connection, target):
+    changes = _changes(target)
+    if changes is not None:
+        changes["memberships"].append((*_membership(target, old=True), -1))
+        changes["memberships"].append((*_membership(target), 1))
+
+
+@event.listens_for(Squad, "after_delete")
+def _squad_deleted(mapper, connection, target):
+    changes = _changes(target)
+    if changes is not None:
+        changes["memberships"].append((*_membership(target), -1))
+
+
+def _note_player(target):
+    changes = _changes(target)
+    if changes is not None:
+        changes["players"][target.id] = tuple(getattr(target, f) for f in PLAYER_FIELDS)
+
+
+@event.listens_for(Player, "after_insert")
+def _player_inserted(mapper, connection, target):
+    _note_player(target)
+
+
+@event.listens_for(Player, "after_update")
+def _player_updated(mapper, connection, target):
+    state = inspect(target)
+    # e.g. only icc_player_id changed: nothing shown in sections / search
+    if any(state.attrs[f].history.has_changes() for f in PLAYER_FIELDS):
+        _note_player(target)
+
+
+@event.listens_for(Player, "after_delete")
+def _player_deleted(mapper, connection, target):
+    changes = _changes(target)
+    if changes is not None:
+        changes["players"][target.id] = None
+
+
+@event.listens_for(Session, "after_commit")
+def _bump_on_commit(session):
+    # Only now can other requests read the new squads
+    changes = session.info.pop("squad_changes", None)
+    if changes:
+        bump_squad_version(changes)
+        # Re-baseline the fingerprint on the next squad_version(db)
+        _state["rebaseline"] = True
+        _state["checked_at"] = 0.0
+
+
+@event.listens_for(Session, "after_rollback")
+def _forget_on_rollback(session):
+    session.info.pop("squad_changes", None)
+
+
+# ============================================================================
+# MATCH PLAYER SECTIONS
+# ============================================================================
+
+def _section_key(db: Session, match_id: int) -> Optional[Tuple[int, int, int]]:
+    key = _match_keys.get(match_id)
+    if key is not None:
+        return key
+
+    row = (
+        db.query(Match.tournament_id, Match.home_team_id, Match.away_team_id)
+        .filter(Match.id == match_id)
+        .first()
+    )
+    if not row or not row.tournament_id:
+        return None
+
+    key = (row.tournament_id, row.home_team_id, row.away_team_id)
+    with _lock:
+        if len(_match_keys) >= MATCH_KEY_CACHE_SIZE:
+            _match_keys.clear()
+        _match_keys[match_id] = key
+    return key
+
+
+def get_match_players_payload(db: Session, match_id: int) -> Tuple[bytes, str]:
+    """(JSON body, ETag) of the grouped player sections for a match."""
+    version = squad_version(db)
+
+    key = _section_key(db, match_id)
+    if key is None:
+        # Old V1 matches / unknown ids: empty list, not cached
+        return b"[]", '"sq-empty"'
+
+    cached = _sections.get(key)
+    if cached is not None:
+        return cached
+
+    sections = get_match_players_grouped(db, match_id)
+    body = json.dumps(sections, separators=(",", ":")).encode()
+    # Content-based, so every worker agrees on it
+    etag = f'"sq-{hashlib.sha1(body).hexdigest()[:16]}"'
+
+    with _lock:
+        # Don't store a payload built under a version that was since bumped
+        if _state["version"] == version:
+            _sections[key] = (body, etag)
+
+    return body, etag
@@ -0,0 +1,9 @@
+import os
+import sys
+import tempfile
+
+# Modules import each other as top-level packages (services, auth, ...)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# database.py reads DATABASE_URL at import; tests use a throwaway SQLite file
+os.environ.setdefault("DATABASE_URL", "sqlite:///" + os.path.join(tempfile.mkdtemp(), "test.db"))
@@ -0,0 +1,119 @@
+import json
+import os
+
+import pytest
+
+from services import commentary_aggregator, commentary_columns, xf_engine
+
+
+SAMPLE = os.path.join(os.path.dirname(__file__), "..", "services", "commentary_sample_JSON.json")
+
+
+def ball(uid, over, batter_id, runs, detail="", bowler="Bowler A", conceded=None, **extra):
+    """One ICC commentary ball, with string fields like the live feed."""
+    entry = {
+        "UID": uid,
+        "Isball": True,
+        "Over_No": str(over),
+        "Batsman": str(batter_id),
+        "Batsman_Name": f"Batter {batter_id}",
+        "Bowler_Name": bowler,
+        "Batsman_Runs": str(runs),
+        "Bowler_Conceded_Runs": str(runs if conceded is None else conceded),
+        "Detail": detail,
+    }
+    entry.update(extra)
+    return entry
+
+
+def end_over(uid, over, runs):
+    return {"UID": uid, "Isball": False, "End_Over": True, "Summary": {"Over": str(over), "Runs": str(runs)}}
+
+
+def plain(value):
+    """defaultdicts (dict path) and dicts (columnar path) compared as plain dicts."""
+    if isinstance(value, dict):
+        return {k: plain(v) for k, v in value.items()}
+    return value
+
+
+def big_over_innings():
+    # Over 3: batter 1 hits 16 (plus a wide), batter 2 hits 1 -> team 18
+    commentary = [
+        ball(1, 3, 1, 6),
+        ball(2, 3, 1, 4),
+        ball(3, 3, 1, 0, detail="wd", conceded=1),
+        ball(4, 3, 1, 6),
+        ball(5, 3, 2, 1),
+        end_over(6, 3, 18),
+        # Over 4: 15-run over shared between batters, nobody reaches 15
+        ball(7, 4, 2, 6, bowler="Bowler B"),
+        ball(8, 4, 1, 4, bowler="Bowler B"),
+        ball(9, 4, 2, 4, bowler="Bowler B", conceded=5),
+        ball(10, 4, 1, 0, bowler="Bowler B", Iswicket=True, Dismissal_Id="ct",
+             Fielders=[{"Player_Name": "Fielder X"}]),
+        end_over(11, 4, 15),
+        ball(12, 7, 3, 2, bowler="Bowler B"),
+        ball(12, 7, 3, 2, bowler="Bowler B"),  # duplicated across pages
+        ball(13, 7, 3, 1, bowler="Bowler A", Iswicket=True, Dismissal_Id="ro"),
+        end_over(14, 7, 3),
+    ]
+    return commentary
+
+
+CASES = {
+    "empty": [],
+    "no_balls_only_summaries": [end_over(1, 5, 20)],
+    "no_candidate_over": [ball(1, 1, 1, 6), ball(2, 1, 1, 6), end_over(3, 1, 12)],
+    "candidate_over_without_batter": [
+        {**ball(1, 2, "", 6), "Batsman": ""},
+        {**ball(2, 2, "", 6), "Batsman": ""},
+        {**ball(3, 2, "", 6), "Batsman": ""},
+        end_over(4, 2, 18),
+    ],
+    "big_overs": big_over_innings(),
+}
+
+
+@pytest.fixture(scope="module")
+def sample_commentary():
+    with open(SAMPLE) as f:
+        return json.load(f)["data"]["Commentary"]
+
+
+@pytest.mark.parametrize("name", sorted(CASES))
+def test_aggregate_matches_dict_path(name):
+    commentary = CASES[name]
+    assert plain(commentary_columns.aggregate(commentary)) == plain(commentary_aggregator.aggregate(commentary))
+
+
+@pytest.mark.parametrize("name", sorted(CASES))
+def test_15_over_batters_match_dict_path(name):
+    commentary = CASES[name]
+    assert commentary_columns.extract_15_over_batters(commentary) == xf_engine.extract_15_over_batters(commentary)
+
+
+def test_15_over_batters_found():
+    assert commentary_columns.extract_15_over_batters(big_over_innings()) == {"1"}
+
+
+def test_empty_innings():
+    assert commentary_columns.extract_15_over_batters([]) == set()
+    assert commentary_columns.aggregate([])["total_runs"] == 0
+
+
+def test_sample_feed_matches_dict_path(sample_commentary):
+    assert plain(commentary_columns.aggregate(sample_commentary)) == plain(
+        commentary_aggregator.aggregate(sample_commentary)
+    )
+    assert commentary_columns.extract_15_over_batters(sample_commentary) == xf_engine.extract_15_over_batters(
+        sample_commentary
+    )
+
+
+@pytest.mark.parametrize("threshold", [10, 15, 16, 17])
+def test_15_over_batters_threshold_matches_dict_path(threshold):
+    commentary = big_over_innings()
+    assert commentary_columns.extract_15_over_batters(commentary, threshold) == xf_engine.extract_15_over_batters(
+        commentary, threshold
+    )
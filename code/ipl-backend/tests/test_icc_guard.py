@@ -0,0 +1,137 @@
+import asyncio
+
+import httpx
+import pytest
+
+from services import icc_guard
+from services.icc_guard import AdaptiveLimiter, CircuitBreaker, TokenBucket
+
+
+class HangingClient:
+    """Fake client whose GET never completes, so the caller can cancel it."""
+
+    def __init__(self):
+        self.started = asyncio.Event()
+
+    async def get(self, url, params=None):
+        self.started.set()
+        await asyncio.sleep(3600)
+
+
+class OkClient:
+
+    async def get(self, url, params=None):
+        return httpx.Response(200, json={"ok": True}, request=httpx.Request("GET", url))
+
+
+@pytest.fixture
+def guard(monkeypatch):
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0.0)
+    monkeypatch.setattr(icc_guard, "breaker", breaker)
+    monkeypatch.setattr(icc_guard, "bucket", TokenBucket(1000, 1000))
+    monkeypatch.setattr(icc_guard, "limiter", AdaptiveLimiter(2, 4, 10.0))
+    monkeypatch.setattr(icc_guard, "_last_good", icc_guard.OrderedDict())
+    return breaker
+
+
+def test_cancelled_half_open_probe_releases_probe_slot(guard):
+    guard.record_failure()  # threshold 1: open, reset_timeout 0 -> next call probes
+
+    async def run():
+        client = HangingClient()
+        task = asyncio.create_task(icc_guard.icc_get(client, "https://icc.test/feed", {}))
+        await client.started.wait()
+        assert guard.state == CircuitBreaker.HALF_OPEN and guard.probing
+
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+        assert not guard.probing
+        assert icc_guard.limiter.in_flight == 0
+
+        # The next call gets to probe and closes the breaker
+        return await icc_guard.icc_get(OkClient(), "https://icc.test/feed", {})
+
+    assert asyncio.run(run()) == {"ok": True}
+    assert guard.state == CircuitBreaker.CLOSED
+
+
+def test_cancelled_call_while_closed_is_not_a_failure(guard):
+
+    async def run():
+        client = HangingClient()
+        task = asyncio.create_task(icc_guard.icc_get(client, "https://icc.test/feed", {}))
+        await client.started.wait()
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    asyncio.run(run())
+    assert guard.state == CircuitBreaker.CLOSED
+    assert guard.failures == 0
+
+
+def test_unexpected_error_in_probe_reopens_breaker(guard):
+    guard.record_failure()
+
+    class BrokenClient:
+        async def get(self, url, params=None):
+            raise RuntimeError("boom")
+
+    with pytest.raises(RuntimeError):
+        asyncio.run(icc_guard.icc_get(BrokenClient(), "https://icc.test/feed", {}))
+
+    assert guard.state == CircuitBreaker.OPEN
+    assert not guard.probing
+
+
+def test_fresh_only_does_not_serve_last_good(guard):
+    url = "https://icc.test/feed"
+
+    class DownClient:
+        async def get(self, url, params=None):
+            raise httpx.ConnectError("down")
+
+    async def run():
+        await icc_guard.icc_get(OkClient(), url, {})  # remembered as last good
+        guard.record_failure()                         # open
+        guard.opened_at = float("inf")                 # ...and keep it open
+
+        assert await icc_guard.icc_get(DownClient(), url, {}) == {"ok": True}
+        with icc_guard.fresh_only():
+            with pytest.raises(icc_guard.IccUnavailable):
+                await icc_guard.icc_get(DownClient(), url, {})
+
+    asyncio.run(run())
+
+
+def test_read_timeout_is_not_retried(guard):
+
+    class SlowClient:
+        calls = 0
+
+        async def get(self, url, params=None):
+            SlowClient.calls += 1
+            raise httpx.ReadTimeout("slow")
+
+    with pytest.raises(icc_guard.IccUnavailable):
+        asyncio.run(icc_guard.icc_get(SlowClient(), "https://icc.test/feed", {}))
+
+    assert SlowClient.calls == 1
+    assert guard.state == CircuitBreaker.OPEN  # threshold 1
+
+
+def test_call_deadline_caps_all_attempts(guard, monkeypatch):
+    monkeypatch.setattr(icc_guard, "ICC_CALL_DEADLINE", 0.05)
+
+    async def run():
+        client = HangingClient()
+        started = asyncio.get_running_loop().time()
+        with pytest.raises(icc_guard.IccUnavailable):
+            await icc_guard.icc_get(client, "https://icc.test/feed", {})
+        return asyncio.get_running_loop().time() - started
+
+    assert asyncio.run(run()) < 1
+    assert guard.failures == 1
+    assert icc_guard.limiter.in_flight == 0
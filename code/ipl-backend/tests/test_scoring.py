@@ -0,0 +1,48 @@
+from datetime import datetime
+
+import pytest
+
+from database import Base, SessionLocal, engine
+from leagues import create_league
+from models import LeagueMember, Match, Prediction, User
+from scoring import apply_scoring_for_match
+
+
+@pytest.fixture
+def db():
+    Base.metadata.drop_all(engine)
+    Base.metadata.create_all(engine)
+
+    session = SessionLocal()
+    session.add(User(username="alice", password="x"))
+    session.add(Match(
+        home_team="India", away_team="Zimbabwe", venue="Harare",
+        start_time=datetime(2031, 7, 6, 14), status="completed",
+        actual_toss_winner="India", actual_match_winner="India",
+    ))
+    session.commit()
+    session.add(Prediction(match_id=1, user_id=1, toss_winner="India", match_winner="India"))
+    create_league(session, owner_id=1, name="Office")
+    yield session
+    session.close()
+
+
+def member_points(session) -> int:
+    return session.query(LeagueMember.total_points).scalar()
+
+
+def test_scoring_a_match_twice_concurrently_adds_the_delta_once(db):
+    # Two scorers (live worker + admin) load the match before either commits
+    other = SessionLocal()
+    stale_match = other.get(Match, 1)
+    stale_predictions = other.query(Prediction).all()
+
+    apply_scoring_for_match(db.get(Match, 1), db.query(Prediction).all(), db)
+    assert member_points(db) == 7
+
+    apply_scoring_for_match(stale_match, stale_predictions, other)
+    other.close()
+
+    db.expire_all()
+    assert member_points(db) == 7
+
@@ -0,0 +1,55 @@
+import pytest
+from sqlalchemy import text
+
+import player_search
+import squad_cache
+from database import Base, SessionLocal, engine
+from models import Player, Squad, Team, Tournament
+
+
+@pytest.fixture
+def db(monkeypatch):
+    Base.metadata.drop_all(engine)
+    Base.metadata.create_all(engine)
+    monkeypatch.setattr(squad_cache, "_state", {"version": 1, "fingerprint": None, "checked_at": 0.0, "rebaseline": False})
+    monkeypatch.setattr(player_search, "_state", {"index": None, "stale": False})
+
+    session = SessionLocal()
+    tournament = Tournament(name="T")
+    session.add_all([tournament, Team(name="India", short_name="IND"), Team(name="Zimbabwe", short_name="ZIM")])
+    session.add_all([Player(name="Virat Kohli", role="BATTER"), Player(name="Brian Bennett", role="BATTER")])
+    session.commit()
+    session.add(Squad(tournament_id=1, team_id=1, player_id=1))
+    session.commit()
+    yield session
+    session.close()
+
+
+def test_local_squad_edit_is_applied_without_a_rebuild(db):
+    index = player_search.get_search_index(db)
+    squad_cache.squad_version(db)  # baseline fingerprint
+
+    db.add(Squad(tournament_id=1, team_id=2, player_id=2))
+    db.commit()
+    version = squad_cache._state["version"]
+    squad_cache._state["checked_at"] = 0.0  # next periodic check is due
+
+    # The fingerprint changed because of our own commit: re-baselined, not bumped
+    assert squad_cache.squad_version(db) == version
+    assert player_search._state["stale"] is False
+    assert player_search.get_search_index(db) is index
+    assert [p["name"] for p in index.search("bri", team_id=2)] == ["Brian Bennett"]
+
+
+def test_unexplained_fingerprint_change_rebuilds(db):
+    player_search.get_search_index(db)
+    squad_cache.squad_version(db)
+
+    # Another process moves a player (no ORM events here)
+    with engine.begin() as connection:
+        connection.execute(text("UPDATE squads SET team_id = 2, updated_at = '2031-01-01 00:00:00'"))
+
+    squad_cache._state["checked_at"] = 0.0
+    version = squad_cache._state["version"]
+    assert squad_cache.squad_version(db) == version + 1
+    assert player_search._state["stale"] is True
@@ -0,0 +1,54 @@
+import pytest
+
+from database import Base, SessionLocal, engine
+from models import XFactorDef
+from routers.xfactors import XFactorDefUpdate, definition_error
+from xfactor_catalog import XFactorCatalog, seed_defaults
+from xfactor_master import load_default_xfactors
+
+
+@pytest.fixture
+def db():
+    Base.metadata.drop_all(engine)
+    Base.metadata.create_all(engine)
+    session = SessionLocal()
+    yield session
+    session.close()
+
+
+def test_seeding_again_does_not_duplicate(db):
+    seed_defaults(db)
+    seed_defaults(SessionLocal())  # e.g. a second worker starting up
+
+    ids = [row.id for row in db.query(XFactorDef).all()]
+    assert sorted(ids) == sorted(load_default_xfactors())
+
+
+def test_catalog_version_is_the_same_across_workers(db):
+    seed_defaults(db)
+    first, second = XFactorCatalog(), XFactorCatalog()
+    second.invalidate()
+
+    assert first.get().content_version == second.get().content_version
+
+
+@pytest.mark.parametrize("fields", [
+    {"risk": "EXTREME"},
+    {"scope": "umpire", "stat": "runs", "comparator": ">=", "threshold": 1},
+    {"scope": "bowler", "stat": "sixes", "comparator": ">=", "threshold": 1},
+    {"scope": "batter", "stat": "runs", "comparator": "=>", "threshold": 50},
+    {"scope": "batter", "stat": "runs", "comparator": ">="},
+    {"scope": "commentary", "stat": "max_over_runs", "comparator": "<", "threshold": 20},
+    {"stat": "runs"},
+])
+def test_invalid_definitions_are_rejected(fields):
+    data = XFactorDefUpdate(**{"risk": "LOW", "category": "batting", "description": "x", **fields})
+    assert definition_error(data) is not None
+
+
+def test_valid_definition_passes():
+    data = XFactorDefUpdate(
+        risk="HIGH", category="batting", description="Century",
+        scope="batter", stat="runs", comparator=">=", threshold=100,
+    )
+    assert definition_error(data) is None
@@ -0,0 +1,79 @@
+"""
+Compact in-memory user id -> username directory.
+
+Leaderboards and performance views only need usernames, so instead of
+loading User rows (password hash, mobile, email, ...) they read this:
+a list indexed by user id (ids are dense autoincrement values) holding
+interned username strings. A lookup is one list index, no allocation.
+
+Loaded once at startup (main.py), extended on register. Ids created by
+other processes are loaded on demand by ensure().
+"""
+
+import sys
+import threading
+from typing import Iterable, List, Optional
+
+from sqlalchemy.orm import Session
+
+from models import User
+
+
+LOAD_BATCH_SIZE = 10000
+
+
+class UserDirectory:
+
+    def __init__(self):
+        self._names: List[Optional[str]] = []
+        self._lock = threading.Lock()
+        self.loaded = False
+
+    def _set(self, user_id: int, username: str):
+        names = self._names
+        if user_id >= len(names):
+            names.extend([None] * (user_id + 1 - len(names)))
+        names[user_id] = sys.intern(username)
+
+    def load(self, db: Session) -> int:
+        rows = db.query(User.id, User.username).yield_per(LOAD_BATCH_SIZE)
+        with self._lock:
+            count = 0
+            for user_id, username in rows:
+                self._set(user_id, username)
+                count += 1
+            self.loaded = True
+        return count
+
+    def add(self, user_id: int, username: str):
+        with self._lock:
+            self._set(user_id, username)
+
+    def get(self, user_id: int) -> Optional[str]:
+        names = self._names
+        return names[user_id] if 0 <= user_id < len(names) else None
+
+    def ensure(self, db: Session, user_ids: Iterable[int]):
+        """Load any of these ids we don't know yet (one IN query, or none)."""
+        if not self.loaded:
+            self.load(db)
+
+        missing = {user_id for user_id in user_ids if self.get(user_id) is None}
+        if not missing:
+            return
+
+        rows = db.query(User.id, User.username).filter(User.id.in_(missing)).all()
+        with self._lock:
+            for user_id, username in rows:
+                self._set(user_id, username)
+
+    def stats(self) -> dict:
+        names = self._names
+        return {
+            "users": sum(1 for name in names if name is not None),
+            "slots": len(names),
+            "list_bytes": sys.getsizeof(names),
+        }
+
+
+user_directory = UserDirectory()
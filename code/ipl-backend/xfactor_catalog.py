@@ -0,0 +1,183 @@
+"""
+X-factor catalog: single source of truth for X-factor definitions.
+
+Definitions live in the x_factor_definition table (seeded from
+xfactor_master at app startup, see seed_defaults). The catalog loads them once into an
+immutable, indexed snapshot that scoring, result generation and the
+/xfactors API all read. Admin edits call invalidate(), which bumps the
+version and drops the snapshot; the next reader reloads it.
+
+Edits made through another worker are picked up within CATALOG_CHECK_SECONDS:
+get() compares a count / max(serial) / max(updated_at) fingerprint of the
+table with the snapshot's at most that often.
+"""
+
+import hashlib
+import json
+import threading
+import time
+from collections import namedtuple
+from types import MappingProxyType
+
+from sqlalchemy import func
+from sqlalchemy.dialects import postgresql, sqlite
+
+from database import SessionLocal
+from models import XFactorDef
+from services.xf_engine import CompiledRules
+from xfactor_master import load_default_xfactors
+
+
+XFactorEntry = namedtuple("XFactorEntry", [
+    "id", "risk", "category", "description", "status", "result_description",
+    "scope", "stat", "comparator", "threshold", "min_balls",
+])
+
+RISK_LEVELS = ("LOW", "MEDIUM", "HIGH")
+
+RULE_FIELDS = ("scope", "stat", "comparator", "threshold", "min_balls")
+
+CATALOG_CHECK_SECONDS = 30
+
+# INSERT ... ON CONFLICT DO NOTHING, per dialect
+_INSERT = {"postgresql": postgresql.insert, "sqlite": sqlite.insert}
+
+
+class CatalogSnapshot:
+    """Immutable view of the catalog at one version."""
+
+    def __init__(self, version: int, entries, fingerprint=None):
+        self.version = version
+        self.fingerprint = fingerprint
+
+        self.by_id = MappingProxyType({e.id: e for e in entries})
+
+        active = [e for e in entries if e.status]
+
+        by_risk = {risk: [] for risk in RISK_LEVELS}
+        by_category = {}
+        for e in active:
+            by_risk.setdefault(e.risk, []).append(e)
+            by_category.setdefault(e.category, []).append(e)
+
+        self.by_risk = MappingProxyType({k: tuple(v) for k, v in by_risk.items()})
+        self.by_category = MappingProxyType({k: tuple(v) for k, v in by_category.items()})
+
+        self.rules = CompiledRules(active)
+
+        # Pre-serialized API payloads
+        self.xfactors_json = json.dumps({
+            risk: [
+                {"id": e.id, "category": e.category, "description": e.description}
+                for e in items
+            ]
+            for risk, items in self.by_risk.items()
+        }, separators=(",", ":")).encode()
+
+        self.list_json = json.dumps(
+            [e._asdict() for e in active], separators=(",", ":")
+        ).encode()
+
+        # Content-based, so every worker agrees on it
+        self.content_version = hashlib.sha1(self.list_json).hexdigest()[:16]
+        self.etag = f'"xf-{self.content_version}"'
+
+
+def _entry(row: XFactorDef) -> XFactorEntry:
+    return XFactorEntry(**{field: getattr(row, field) for field in XFactorEntry._fields})
+
+
+def _fingerprint(db) -> tuple:
+    return tuple(db.query(
+        func.count(XFactorDef.serial),
+        func.max(XFactorDef.serial),
+        func.max(XFactorDef.updated_at),
+    ).one())
+
+
+def seed_defaults(db) -> None:
+    """
+    Insert missing default definitions, and fill in rule fields on rows
+    created before definitions carried predicates.
+
+    Every worker runs this at startup, so inserts skip ids another worker
+    got to first (unique on id) instead of duplicating them.
+    """
+    defaults = load_default_xfactors()
+
+    insert = _INSERT[db.get_bind().dialect.name]
+    db.execute(
+        insert(XFactorDef)
+        .values([{field: getattr(d, field) for field in XFactorEntry._fields} for d in defaults.values()])
+        .on_conflict_do_nothing(index_elements=["id"])
+    )
+
+    legacy = (
+        db.query(XFactorDef)
+        .filter(XFactorDef.id.in_(defaults), XFactorDef.scope.is_(None))
+        .all()
+    )
+    for row in legacy:
+        for field in RULE_FIELDS:
+            setattr(row, field, getattr(defaults[row.id], field))
+
+    db.commit()
+
+
+class XFactorCatalog:
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._snapshot = None
+        self._version = 1
+        self._checked_at = 0.0
+
+    @property
+    def version(self) -> int:
+        return self._version
+
+    def get(self) -> CatalogSnapshot:
+        snapshot = self._snapshot
+        if snapshot is not None and time.monotonic() - self._checked_at < CATALOG_CHECK_SECONDS:
+            return snapshot
+
+        with self._lock:
+            if self._snapshot is not None and time.monotonic() - self._checked_at >= CATALOG_CHECK_SECONDS:
+                self._check()
+            if self._snapshot is None:
+                self._snapshot = self._load()
+            return self._snapshot
+
+    def _check(self) -> None:
+        """Drop the snapshot if another process changed the table."""
+        db = SessionLocal()
+        try:
+            fingerprint = _fingerprint(db)
+        finally:
+            db.close()
+
+        self._checked_at = time.monotonic()
+        if fingerprint != self._snapshot.fingerprint:
+            self._snapshot = None
+            self._version += 1
+
+    def _load(self) -> CatalogSnapshot:
+        db = SessionLocal()
+        try:
+            entries = [_entry(r) for r in db.query(XFactorDef).order_by(XFactorDef.serial).all()]
+            fingerprint = _fingerprint(db)
+        finally:
+            db.close()
+
+        self._checked_at = time.monotonic()
+        return CatalogSnapshot(self._version, entries, fingerprint)
+
+    def invalidate(self) -> int:
+        """Drop the snapshot after an edit; the next get() reloads."""
+        with self._lock:
+            self._snapshot = None
+            self._version += 1
+            return self._version
+
+
+xfactor_catalog = XFactorCatalog()
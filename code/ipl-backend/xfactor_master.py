@@ -2,18 +2,24 @@ from typing import Dict
 
 from models import XFactorDef
 
-# In-memory catalog for now. You can move this to DB or JSON later.
-XFACTOR_DEFS: Dict[str, XFactorDef] = {}
+# Default catalog. Seeds the x_factor_definition table on first load; the
+# live catalog is read through xfactor_catalog (DB is the source of truth).
+# scope/stat/comparator/threshold/min_balls form the machine-readable rule
+# evaluated by services/xf_engine (scope "commentary" is ball-by-ball only).
 
-def load_default_xfactors():
-    global XFACTOR_DEFS
-    XFACTOR_DEFS = {
+def load_default_xfactors() -> Dict[str, XFactorDef]:
+    return {
         "XF_BAT_SR_180_10B": XFactorDef(
             id="XF_BAT_SR_180_10B",
             risk="MEDIUM",
             category="batting",
             description="Strike rate >= 180 (min 10 balls)",
             status=True,
+            scope="batter",
+            stat="strike_rate",
+            comparator=">=",
+            threshold=180,
+            min_balls=10,
         ),
         "XF_BOWL_9_DOTS": XFactorDef(
             id="XF_BOWL_9_DOTS",
@@ -21,6 +27,11 @@ def load_default_xfactors():
             category="bowling",
             description="Bowled >= 9 dot balls",
             status=True,
+            scope="bowler",
+            stat="dots",
+            comparator=">=",
+            threshold=9,
+            min_balls=0,
         ),
         "XF_BAT_50_RUNS": XFactorDef(
             id="XF_BAT_50_RUNS",
@@ -28,6 +39,11 @@ def load_default_xfactors():
             category="batting",
             description="Scored >= 50 runs",
             status=True,
+            scope="batter",
+            stat="runs",
+            comparator=">=",
+            threshold=50,
+            min_balls=0,
         ),
         "XF_FIELD_CATCH": XFactorDef(
             id="XF_FIELD_CATCH",
@@ -35,6 +51,11 @@ def load_default_xfactors():
             category="fielding",
             description="Took a catch",
             status=True,
+            scope="fielder",
+            stat="catches",
+            comparator=">=",
+            threshold=1,
+            min_balls=0,
         ),
         "XF_BAT_15_RUNS_OVER": XFactorDef(
             id="XF_BAT_15_RUNS_OVER",
@@ -42,6 +63,11 @@ def load_default_xfactors():
             category="batting",
             description="Scored >= 15 runs in a over",
             status=True,
+            scope="commentary",
+            stat="max_over_runs",
+            comparator=">=",
+            threshold=15,
+            min_balls=0,
         ),
         "XF_BOWL_3_WICKETS": XFactorDef(
             id="XF_BOWL_3_WICKETS",
@@ -49,6 +75,11 @@ def load_default_xfactors():
             category="bowling",
             description="took 3 wickets",
             status=True,
+            scope="bowler",
+            stat="wickets",
+            comparator=">=",
+            threshold=3,
+            min_balls=0,
         ),
         "XF_BOWL_7_ECONOMY": XFactorDef(
             id="XF_BOWL_7_ECONOMY",
@@ -56,6 +87,11 @@ def load_default_xfactors():
             category="bowling",
             description="economy <=7",
             status=True,
+            scope="bowler",
+            stat="economy",
+            comparator="<=",
+            threshold=7,
+            min_balls=0,
         ),
         "XF_BAT_8_BOUNDARIES": XFactorDef(
             id="XF_BAT_8_BOUNDARIES",
@@ -63,6 +99,11 @@ def load_default_xfactors():
             category="batting",
             description="hit >=8 boundaries",
             status=True,
+            scope="batter",
+            stat="boundaries",
+            comparator=">=",
+            threshold=8,
+            min_balls=0,
         ),
         "XF_BAT_SR_200_10B": XFactorDef(
             id="XF_BAT_SR_200_10B",
@@ -70,6 +111,11 @@ def load_default_xfactors():
             category="batting",
             description="Strike rate >= 200 (min 10 balls)",
             status=True,
+            scope="batter",
+            stat="strike_rate",
+            comparator=">=",
+            threshold=200,
+            min_balls=10,
         ),
         "XF_BAT_40_RUNS": XFactorDef(
             id="XF_BAT_40_RUNS",
@@ -77,6 +123,11 @@ def load_default_xfactors():
             category="batting",
             description="Scored >= 40 runs",
             status=True,
+            scope="batter",
+            stat="runs",
+            comparator=">=",
+            threshold=40,
+            min_balls=0,
         ),
         "XF_BAT_60_RUNS": XFactorDef(
             id="XF_BAT_60_RUNS",
@@ -84,6 +135,11 @@ def load_default_xfactors():
             category="batting",
             description="Scored >= 60 runs",
             status=True,
+            scope="batter",
+            stat="runs",
+            comparator=">=",
+            threshold=60,
+            min_balls=0,
         ),
         "XF_BAT_SR_160_10B": XFactorDef(
             id="XF_BAT_SR_160_10B",
@@ -91,6 +147,11 @@ def load_default_xfactors():
             category="batting",
             description="Strike rate >= 160 (min 10 balls)",
             status=True,
+            scope="batter",
+            stat="strike_rate",
+            comparator=">=",
+            threshold=160,
+            min_balls=10,
         ),
         "XF_BOWL_6_ECONOMY": XFactorDef(
             id="XF_BOWL_6_ECONOMY",
@@ -98,6 +159,11 @@ def load_default_xfactors():
             category="bowling",
             description="economy <=6",
             status=True,
+            scope="bowler",
+            stat="economy",
+            comparator="<=",
+            threshold=6,
+            min_balls=0,
         ),
         "XF_BOWL_8_ECONOMY": XFactorDef(
             id="XF_BOWL_8_ECONOMY",
@@ -105,10 +171,13 @@ def load_default_xfactors():
             category="bowling",
             description="economy <=8",
             status=True,
+            scope="bowler",
+            stat="economy",
+            comparator="<=",
+            threshold=8,
+            min_balls=0,
         ),
     }
 
-# Call this once at startup (e.g., from main.py)
-load_default_xfactors()
 
 
@@ -0,0 +1,177 @@
+"""
+Historical X-factor hit rates per (player, xf_id).
+
+Counts live in xfactor_player_stats and are updated incrementally whenever
+a match's ActualXFactor rows are written (see match_results), so reads never
+scan the actual_x_factors history.
+
+    python xfactor_stats.py   # count completed matches not tracked yet
+"""
+
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from sqlalchemy.orm import Session
+
+from models import (
+    ActualXFactor, Match, Player, Squad, XFactorPlayerStat, XFactorStatMatch,
+)
+from xfactor_catalog import xfactor_catalog
+
+
+def match_squad_player_ids(db: Session, match: Match) -> Set[int]:
+    if not match.tournament_id:
+        return set()
+    rows = (
+        db.query(Squad.player_id)
+        .filter(Squad.tournament_id == match.tournament_id)
+        .filter(Squad.team_id.in_([match.home_team_id, match.away_team_id]))
+        .all()
+    )
+    return {player_id for (player_id,) in rows}
+
+
+def record_match_xfactors(
+    db: Session,
+    match: Match,
+    old_hits: Iterable[Tuple[Optional[int], str]],
+    new_hits: Iterable[Tuple[Optional[int], str]],
+) -> None:
+    """
+    Apply one match's (player_id, xf_id) hits to the stats (does not commit).
+    First time a match is seen, every squad player gets one opportunity per
+    active X-factor. On re-submission only the hit difference is applied.
+    """
+    new_set = {(p, xf) for p, xf in new_hits if p is not None}
+    tracked = db.get(XFactorStatMatch, match.id) is not None
+
+    delta: Dict[Tuple[int, str], List[int]] = {}  # key -> [hits, opportunities]
+
+    if tracked:
+        old_set = {(p, xf) for p, xf in old_hits if p is not None}
+        for key in new_set - old_set:
+            delta.setdefault(key, [0, 0])[0] += 1
+        for key in old_set - new_set:
+            delta.setdefault(key, [0, 0])[0] -= 1
+    else:
+        for key in new_set:
+            delta.setdefault(key, [0, 0])[0] += 1
+
+        active_xf_ids = [xf_id for xf_id, d in xfactor_catalog.get().by_id.items() if d.status]
+        players = match_squad_player_ids(db, match) | {p for p, _ in new_set}
+        for player_id in players:
+            for xf_id in active_xf_ids:
+                delta.setdefault((player_id, xf_id), [0, 0])[1] += 1
+
+        db.add(XFactorStatMatch(match_id=match.id))
+
+    if not delta:
+        db.flush()
+        return
+
+    # One query for all existing counters touched by this match
+    player_ids = {p for p, _ in delta}
+    xf_ids = {xf for _, xf in delta}
+    existing = {
+        (row.player_id, row.xf_id): row
+        for row in db.query(XFactorPlayerStat).filter(
+            XFactorPlayerStat.player_id.in_(player_ids),
+            XFactorPlayerStat.xf_id.in_(xf_ids),
+        )
+    }
+
+    for (player_id, xf_id), (hits, opportunities) in delta.items():
+        row = existing.get((player_id, xf_id))
+        if row is None:
+            row = XFactorPlayerStat(player_id=player_id, xf_id=xf_id, hits=0, opportunities=0)
+            db.add(row)
+        row.hits = max(0, row.hits + hits)
+        row.opportunities += opportunities
+
+    # Session has autoflush off; make rows visible to the next match in a batch
+    db.flush()
+
+
+# ============================================================================
+# READS
+# ============================================================================
+
+def stat_entry(row: XFactorPlayerStat, player_name: str) -> dict:
+    return {
+        "player_id": row.player_id,
+        "player_name": player_name,
+        "xf_id": row.xf_id,
+        "hits": row.hits,
+        "opportunities": row.opportunities,
+        "hit_rate": round(min(1.0, row.hits / row.opportunities), 3) if row.opportunities else None,
+    }
+
+
+def get_player_stats(db: Session, player_id: int = None, xf_id: str = None) -> List[dict]:
+    query = (
+        db.query(XFactorPlayerStat, Player.name)
+        .join(Player, Player.id == XFactorPlayerStat.player_id)
+    )
+    if player_id is not None:
+        query = query.filter(XFactorPlayerStat.player_id == player_id)
+    if xf_id:
+        query = query.filter(XFactorPlayerStat.xf_id == xf_id)
+
+    return [stat_entry(row, name) for row, name in query.all()]
+
+
+def get_match_player_stats(db: Session, match: Match) -> Dict[str, Dict[str, dict]]:
+    """player name -> xf_id -> stats, for every squad player of the match."""
+    if not match.tournament_id:
+        return {}
+
+    rows = (
+        db.query(XFactorPlayerStat, Player.name)
+        .join(Player, Player.id == XFactorPlayerStat.player_id)
+        .join(Squad, Squad.player_id == Player.id)
+        .filter(Squad.tournament_id == match.tournament_id)
+        .filter(Squad.team_id.in_([match.home_team_id, match.away_team_id]))
+        .all()
+    )
+
+    result: Dict[str, Dict[str, dict]] = {}
+    for row, name in rows:
+        entry = stat_entry(row, name)
+        result.setdefault(name, {})[row.xf_id] = {
+            "hits": entry["hits"],
+            "opportunities": entry["opportunities"],
+            "hit_rate": entry["hit_rate"],
+        }
+    return result
+
+
+# ============================================================================
+# ONE-OFF: count matches completed before stats existed
+# ============================================================================
+
+def track_untracked_matches(db: Session) -> int:
+    tracked = db.query(XFactorStatMatch.match_id)
+    matches = (
+        db.query(Match)
+        .filter(Match.status == "Completed", ~Match.id.in_(tracked))
+        .all()
+    )
+
+    hits_by_match: Dict[int, list] = {}
+    for xf in db.query(ActualXFactor).filter(ActualXFactor.match_id.in_([m.id for m in matches])):
+        hits_by_match.setdefault(xf.match_id, []).append((xf.player_id, xf.xf_id))
+
+    for match in matches:
+        record_match_xfactors(db, match, [], hits_by_match.get(match.id, []))
+
+    db.commit()
+    return len(matches)
+
+
+if __name__ == "__main__":
+    from database import SessionLocal
+
+    db = SessionLocal()
+    try:
+        print(f"✅ Tracked {track_untracked_matches(db)} completed match(es)")
+    finally:
+        db.close()